@@ -0,0 +1,531 @@
+"""Benchmarking cls-compile.py on synthetic proceedings volumes.
+Download, documentation etc: <https://github.com/jacksonllee/cls-proceedings>
+"""
+
+from __future__ import print_function, division
+import sys
+import argparse
+import os
+import csv
+import json
+import platform
+import random
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+from PyPDF2 import (PdfFileWriter, PdfFileReader)
+from PyPDF2.pdf import PageObject
+from PyPDF2.generic import (DictionaryObject, NameObject, NumberObject,
+                            DecodedStreamObject)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# The stages of cls-compile.py, each with the beginning of the master.log
+# message which starts it. A stage ends where the next one starts.
+STAGES = (
+    ('preflight', 'Checking all input pdf files'),
+    ('pagination', 'Checking if all pdf papers are present'),
+    ('headers', "Creating headers' latex files"),
+    ('stamping', 'Creating paper pdfs with headers'),
+    ('toc', 'Creating the table of contents'),
+    ('assembly', 'Working directory:'),
+    ('letter', 'Writing the 8.5" x 11" final proceedings PDF'),
+    ('6x9', 'Writing the 6" x 9" final proceedings PDF'),
+    (None, 'All done!!'),
+)
+
+LOG_LINE_PATTERN = re.compile(
+    r'^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3}): (.*)$')
+
+WORDS = ('the', 'of', 'a', 'language', 'syntax', 'phonology', 'we', 'argue',
+         'that', 'morpheme', 'is', 'in', 'clause', 'data', 'speakers', 'and',
+         'analysis', 'which', 'verb', 'not', 'evidence', 'this', 'from',
+         'semantics', 'to', 'vowel', 'structure', 'as', 'pragmatic', 'case')
+
+FIRST_NAMES = ('Joe', 'Sarah', 'Mary', 'John', 'Ana', 'Wei', 'Olga', 'Kofi',
+               'Priya', 'Lars', 'Yuki', 'Omar')
+LAST_NAMES = ('Smith', 'Johnson', 'Jones', 'Brown', 'Garcia', 'Chen',
+              'Ivanova', 'Mensah', 'Patel', 'Larsen', 'Sato', 'Haddad')
+
+IMAGE_SIZE = 200  # width and height in pixels of the images in the papers
+
+
+# --------------------------------------------------------------------------- #
+# generating synthetic volumes
+
+def text_page(writer, rng):
+    """Return a new letter-size page for *writer* with a page of text in the
+    standard Helvetica font (nothing embedded)."""
+    page = PageObject.createBlankPage(None, 612, 792)
+    lines = ['BT /F1 11 Tf 13.6 TL 90 700 Td']
+
+    for _ in range(44):
+        line = ' '.join(rng.choice(WORDS) for _ in range(14))
+        lines.append('({}) \''.format(line))
+
+    lines.append('ET')
+    content = DecodedStreamObject()
+    content.setData('\n'.join(lines).encode('ascii'))
+
+    font = DictionaryObject()
+    font.update({NameObject('/Type'): NameObject('/Font'),
+                 NameObject('/Subtype'): NameObject('/Type1'),
+                 NameObject('/BaseFont'): NameObject('/Helvetica')})
+    fonts = DictionaryObject()
+    fonts[NameObject('/F1')] = writer._addObject(font)
+    resources = DictionaryObject()
+    resources[NameObject('/Font')] = fonts
+
+    page[NameObject('/Contents')] = writer._addObject(content)
+    page[NameObject('/Resources')] = resources
+    return page
+
+
+def add_image(writer, page):
+    """Draw an image of random pixels on *page* (which already has text)."""
+    image = DecodedStreamObject()
+    image.setData(os.urandom(IMAGE_SIZE * IMAGE_SIZE * 3))
+    image.update({NameObject('/Type'): NameObject('/XObject'),
+                  NameObject('/Subtype'): NameObject('/Image'),
+                  NameObject('/Width'): NumberObject(IMAGE_SIZE),
+                  NameObject('/Height'): NumberObject(IMAGE_SIZE),
+                  NameObject('/ColorSpace'): NameObject('/DeviceRGB'),
+                  NameObject('/BitsPerComponent'): NumberObject(8)})
+    xobjects = DictionaryObject()
+    xobjects[NameObject('/Im1')] = writer._addObject(image)
+    page['/Resources'][NameObject('/XObject')] = xobjects
+
+    content = page['/Contents'].getObject()
+    content.setData(content.getData() +
+                    b'\nq 216 0 0 216 198 300 cm /Im1 Do Q')
+
+
+def copied_page(source_page):
+    """Return a new page object with the contents of *source_page*, so that
+    the same page can be added to a pdf writer more than once."""
+    page = PageObject(None)
+    page.update(source_page)
+    return page
+
+
+def write_paper(path, n_pages, content, font_pages, rng):
+    """Write a synthetic paper of *n_pages* pages to *path*.
+    *content* is "text" (text in a standard font), "images" (text with an
+    image on each page) or "fonts" (pages of real papers from *font_pages*,
+    with their embedded fonts).
+    """
+    writer = PdfFileWriter()
+    offset = rng.randrange(len(font_pages))
+
+    for i in range(n_pages):
+        if content == 'fonts':
+            page = copied_page(font_pages[(offset + i) % len(font_pages)])
+        else:
+            page = text_page(writer, rng)
+
+            if content == 'images':
+                add_image(writer, page)
+
+        writer.addPage(page)
+
+    # compress the content streams like pdflatex does
+    if content != 'fonts':
+        for i in range(writer.getNumPages()):
+            writer.getPage(i).compressContentStreams()
+
+    with open(path, 'wb') as f:
+        writer.write(f)
+
+
+def random_title(rng, n_words):
+    words = [rng.choice(WORDS) for _ in range(n_words)]
+    return ' '.join(words).capitalize()
+
+
+def generate_volume(volume_dir, n_papers, pages, content, headers, seed):
+    """Create a synthetic working directory for cls-compile.py at
+    *volume_dir*, with *n_papers* papers of (*pages* being a tuple of the
+    minimum and maximum) pages each. The front matter, acknowledgments and
+    templates are those of the example volume.
+    *headers* is "short" or "long": long headers are close to the maximum
+    length of 55 characters, and have even longer full authors and titles.
+    Return the total number of pages of the papers.
+    """
+    rng = random.Random(seed)
+    example_dir = os.path.join(SCRIPT_DIR, 'example')
+
+    for dir_name in ('front-matter', 'acknowledgments', 'templates'):
+        shutil.copytree(os.path.join(example_dir, dir_name),
+                        os.path.join(volume_dir, dir_name))
+
+    papers_dir = os.path.join(volume_dir, 'papers-without-headers')
+    os.makedirs(papers_dir)
+
+    example_papers_dir = os.path.join(example_dir, 'papers-without-headers')
+    font_pages = list()
+    example_pdfs = list()
+
+    for filename in sorted(os.listdir(example_papers_dir)):
+        f = open(os.path.join(example_papers_dir, filename), 'rb')
+        example_pdfs.append(f)
+        reader = PdfFileReader(f)
+        font_pages.extend(reader.getPage(i)
+                          for i in range(reader.getNumPages()))
+
+    rows = [['index', 'authors', 'paper title', 'authors in header',
+             'paper title in header', 'paper filename']]
+    total_pages = 0
+
+    for i in range(n_papers):
+        n_pages = rng.randint(*pages)
+        total_pages += n_pages
+        filename = 'paper{:04d}.pdf'.format(i + 1)
+        write_paper(os.path.join(papers_dir, filename), n_pages, content,
+                    font_pages, rng)
+
+        if headers == 'long':
+            names = ['{} {}'.format(rng.choice(FIRST_NAMES),
+                                    rng.choice(LAST_NAMES))
+                     for _ in range(5)]
+            authors = ', '.join(names)
+            authors_in_header = ', '.join(names[:3])[:45] + ', et al.'
+            title = random_title(rng, 20)
+            title_in_header = title[:55].rstrip()
+        else:
+            authors = rng.choice(LAST_NAMES)
+            authors_in_header = ''
+            title = random_title(rng, 4)
+            title_in_header = ''
+
+        rows.append([str(i + 1), authors, title, authors_in_header,
+                     title_in_header, filename])
+
+    for f in example_pdfs:
+        f.close()
+
+    with open(os.path.join(volume_dir, 'organizer.csv'), 'w') as f:
+        csv.writer(f, quoting=csv.QUOTE_ALL).writerows(rows)
+
+    return total_pages
+
+
+# --------------------------------------------------------------------------- #
+# running cls-compile.py and measuring it
+
+def directory_size(abs_dir_path):
+    return sum(os.path.getsize(os.path.join(dir_, filename))
+               for dir_, _, filenames in os.walk(abs_dir_path)
+               for filename in filenames)
+
+
+def stage_times(master_log_path):
+    """Return a dict (key: stage name; value: seconds) of the stages of the
+    cls-compile.py run which wrote *master_log_path*. Stages which did not
+    run (e.g., "6x9" with --skip6by9) are left out."""
+    starts = list()  # (stage, datetime)
+
+    with open(master_log_path) as f:
+        for line in f:
+            match = LOG_LINE_PATTERN.match(line.rstrip('\n'))
+            if not match:
+                continue
+
+            timestamp, message = match.groups()
+
+            for stage, message_start in STAGES:
+                if message.startswith(message_start):
+                    starts.append((stage, datetime.strptime(
+                        timestamp, '%Y-%m-%d %H:%M:%S,%f')))
+
+    times = dict()
+
+    for (stage, start), (_, end) in zip(starts, starts[1:]):
+        times[stage] = (end - start).total_seconds()
+
+    return times
+
+
+def run_compile(script_path, run_dir, volume_dir, compile_args):
+    """Run *script_path* (cls-compile.py) on *volume_dir*, in *run_dir*
+    where its logs go. Return a dict of wall time, CPU time and peak memory
+    (in kB, None where not available) of the run.
+    """
+    command = [sys.executable, script_path, '--directory', volume_dir]
+    command.extend(compile_args)
+
+    with open(os.path.join(run_dir, 'output.log'), 'w') as output:
+        start = time.time()
+        process = subprocess.Popen(command, cwd=run_dir, stdout=output,
+                                   stderr=subprocess.STDOUT)
+
+        # wait4 also gives the resources used by the process (and by the
+        # processes it has started, e.g., pdflatex)
+        if hasattr(os, 'wait4'):
+            _, status, usage = os.wait4(process.pid, 0)
+            process.returncode = status
+        else:
+            process.wait()
+            usage = None
+
+        wall_time = time.time() - start
+
+    if process.returncode:
+        with open(os.path.join(run_dir, 'output.log')) as output:
+            tail = output.read()[-2000:]
+        raise RuntimeError('{} failed in {}:\n{}'.format(
+            ' '.join(command), run_dir, tail))
+
+    result = {'wall_time': wall_time, 'cpu_time': None, 'peak_rss_kb': None}
+
+    if usage is not None:
+        result['cpu_time'] = usage.ru_utime + usage.ru_stime
+        # ru_maxrss is in bytes on macOS, in kB elsewhere
+        result['peak_rss_kb'] = (usage.ru_maxrss // 1024
+                                 if sys.platform == 'darwin'
+                                 else usage.ru_maxrss)
+
+    return result
+
+
+def parse_pages(pages):
+    """Parse "12" or "8-20" into a tuple (minimum, maximum)."""
+    try:
+        if '-' in pages:
+            minimum, maximum = (int(x) for x in pages.split('-', 1))
+        else:
+            minimum = maximum = int(pages)
+    except ValueError:
+        raise argparse.ArgumentTypeError('invalid number of pages: {}'
+                                         .format(pages))
+
+    if not 1 <= minimum <= maximum:
+        raise argparse.ArgumentTypeError('invalid number of pages: {}'
+                                         .format(pages))
+
+    return minimum, maximum
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+
+    if len(values) % 2:
+        return values[middle]
+    else:
+        return (values[middle - 1] + values[middle]) / 2
+
+
+def summarize(runs):
+    """Return a list of ((papers, stage), median seconds over the
+    repetitions in *runs*)."""
+    times = dict()
+
+    for run in runs:
+        for stage, seconds in run['stages'].items():
+            times.setdefault((run['papers'], stage), []).append(seconds)
+        times.setdefault((run['papers'], 'total'), []).append(
+            run['wall_time'])
+
+    # with --pipeline, the stages overlap and are one stage in the stats
+    stage_order = [stage for stage, _ in STAGES if stage] + ['pipeline',
+                                                             'total']
+    return [(key, median(values)) for key, values in
+            sorted(times.items(),
+                   key=lambda item: (item[0][0],
+                                     stage_order.index(item[0][1])))]
+
+
+def print_summary(results, baseline=None):
+    """Print the median time per stage of *results*, compared with those
+    of *baseline* (the results of an earlier benchmark) if given."""
+    baseline_times = dict(summarize(baseline['runs'])) if baseline else {}
+
+    print('{:>8}  {:<12}{:>10}{}'.format(
+        'papers', 'stage', 'seconds',
+        '{:>10}{:>8}'.format('baseline', 'ratio') if baseline else ''))
+
+    for (papers, stage), seconds in summarize(results['runs']):
+        line = '{:>8}  {:<12}{:>10.2f}'.format(papers, stage, seconds)
+
+        if (papers, stage) in baseline_times:
+            old_seconds = baseline_times[(papers, stage)]
+            line += '{:>10.2f}{:>8}'.format(
+                old_seconds,
+                '{:.2f}'.format(seconds / old_seconds) if old_seconds else '-')
+
+        print(line)
+
+
+# --------------------------------------------------------------------------- #
+# parse command line arguments
+
+parser = argparse.ArgumentParser(
+    description='Benchmark cls-compile.py on synthetic proceedings volumes. '
+                'Arguments after "--" are passed on to cls-compile.py, '
+                'e.g.: python cls-benchmark.py --papers 10 100 -- --jobs 4',
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+parser.add_argument('--papers', type=int, nargs='+', default=[10],
+                    help='number(s) of papers of the synthetic volumes; one '
+                         'volume is benchmarked for each number')
+parser.add_argument('--pages', type=parse_pages, default='8-20',
+                    help='number of pages per paper, either fixed (e.g., 12) '
+                         'or a range (e.g., 8-20)')
+parser.add_argument('--content', type=str, default='text',
+                    choices=('text', 'fonts', 'images'),
+                    help='content of the pages: "text" in a standard font, '
+                         'pages of the example papers with their embedded '
+                         '"fonts", or text with "images"')
+parser.add_argument('--headers', type=str, default='short',
+                    choices=('short', 'long'),
+                    help='length of the authors and titles in the headers')
+parser.add_argument('--repeat', type=int, default=1,
+                    help='number of runs on each volume')
+parser.add_argument('--warm', action='store_true',
+                    help='keep the build cache of cls-compile.py between '
+                         'the runs on a volume (by default, each run starts '
+                         'from a fresh copy of the volume)')
+parser.add_argument('--seed', type=int, default=0,
+                    help='seed for generating the synthetic volumes')
+parser.add_argument('--script', type=str,
+                    default=os.path.join(SCRIPT_DIR, 'cls-compile.py'),
+                    help='path of the cls-compile.py to benchmark')
+parser.add_argument('--workdir', type=str, default=None,
+                    help='directory for the synthetic volumes and the runs '
+                         '(by default, a temporary directory which is '
+                         'deleted afterwards)')
+parser.add_argument('--output', type=str, default='benchmark.json',
+                    help='filename of the JSON file for the results')
+parser.add_argument('--compare', type=str, default=None,
+                    help='JSON file of an earlier benchmark to compare the '
+                         'results with')
+parser.add_argument('--nostats', action='store_true',
+                    help='take the stage times from master.log instead of '
+                         'the --stats output of cls-compile.py (for versions '
+                         'of cls-compile.py without --stats)')
+parser.add_argument('compileargs', nargs='*',
+                    help='arguments for cls-compile.py (after "--")')
+command_line_args = parser.parse_args()
+
+if command_line_args.workdir:
+    work_dir = os.path.abspath(command_line_args.workdir)
+    keep_work_dir = True
+
+    if not os.path.isdir(work_dir):
+        os.makedirs(work_dir)
+else:
+    work_dir = tempfile.mkdtemp(prefix='cls-benchmark-')
+    keep_work_dir = False
+
+baseline_results = None
+
+if command_line_args.compare:
+    with open(command_line_args.compare) as f:
+        baseline_results = json.load(f)
+
+script_path = os.path.abspath(command_line_args.script)
+min_pages, max_pages = command_line_args.pages
+
+results = {
+    'date': datetime.now().isoformat(),
+    'platform': platform.platform(),
+    'python_version': platform.python_version(),
+    'script': script_path,
+    'compile_args': command_line_args.compileargs,
+    'pages': [min_pages, max_pages],
+    'content': command_line_args.content,
+    'headers': command_line_args.headers,
+    'seed': command_line_args.seed,
+    'runs': list(),
+}
+
+# --------------------------------------------------------------------------- #
+# generate the volumes and run the benchmarks
+
+try:
+    for n_papers in command_line_args.papers:
+        volume_name = 'volume-{}-papers'.format(n_papers)
+        volume_dir = os.path.join(work_dir, volume_name)
+
+        if os.path.isdir(volume_dir):
+            shutil.rmtree(volume_dir)
+        os.makedirs(volume_dir)
+
+        print('Generating a volume of {} papers at {}'
+              .format(n_papers, volume_dir))
+        total_pages = generate_volume(
+            volume_dir, n_papers, command_line_args.pages,
+            command_line_args.content, command_line_args.headers,
+            command_line_args.seed)
+        input_bytes = directory_size(volume_dir)
+
+        for repetition in range(1, command_line_args.repeat + 1):
+            run_dir = os.path.join(work_dir, '{}-run{}'.format(volume_name,
+                                                               repetition))
+            run_volume_dir = os.path.join(run_dir, 'volume')
+
+            if os.path.isdir(run_dir):
+                shutil.rmtree(run_dir)
+            os.makedirs(run_dir)
+
+            if command_line_args.warm and repetition > 1:
+                previous_run_dir = os.path.join(
+                    work_dir, '{}-run{}'.format(volume_name, repetition - 1))
+                shutil.move(os.path.join(previous_run_dir, 'volume'),
+                            run_volume_dir)
+            else:
+                shutil.copytree(volume_dir, run_volume_dir)
+
+            print('Running {} on {} papers ({} of {})'.format(
+                os.path.basename(script_path), n_papers, repetition,
+                command_line_args.repeat))
+
+            stats_path = os.path.join(run_dir, 'stats.json')
+            compile_args = list(command_line_args.compileargs)
+
+            if not command_line_args.nostats:
+                compile_args.extend(['--stats', stats_path])
+
+            run = run_compile(script_path, run_dir, run_volume_dir,
+                              compile_args)
+
+            if command_line_args.nostats:
+                run['stages'] = stage_times(os.path.join(run_dir,
+                                                         'master.log'))
+            else:
+                with open(stats_path) as f:
+                    stats = json.load(f)
+
+                # the stage times (for --compare) and all the details
+                run['stages'] = dict((stage['stage'], stage['seconds'])
+                                     for stage in stats['stages'])
+                run['stage_stats'] = stats['stages']
+                run['item_stats'] = stats['items']
+
+            run.update({
+                'papers': n_papers,
+                'total_pages': total_pages,
+                'repetition': repetition,
+                'input_bytes': input_bytes,
+                'output_bytes': dict(
+                    (filename, os.path.getsize(
+                        os.path.join(run_volume_dir, filename)))
+                    for filename in os.listdir(run_volume_dir)
+                    if filename.endswith('.pdf')),
+            })
+            results['runs'].append(run)
+
+            # results are saved after each run, in case a later one fails
+            with open(command_line_args.output, 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+finally:
+    if not keep_work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+print()
+print_summary(results, baseline_results)
+print()
+print('Results are in {}'.format(command_line_args.output))
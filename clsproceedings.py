@@ -0,0 +1,4748 @@
+"""A tool for compiling the proceedings of the Chicago Linguistic Society
+<http://chicagolinguisticsociety.org/>.
+Download, documentation etc: <https://github.com/jacksonllee/cls-proceedings>
+Author: Jackson Lee <jacksonlunlee@gmail.com>
+Last updated on 2017-09-18
+"""
+
+from __future__ import print_function
+import sys
+import argparse
+import os
+import csv
+import hashlib
+import heapq
+import io
+import json
+import mmap
+import subprocess
+import zlib
+import platform
+import logging
+import re
+import unicodedata
+import shutil
+import signal
+import tempfile
+import threading
+import time
+import weakref
+import multiprocessing
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+
+from PyPDF2 import (PdfFileWriter, PdfFileReader)
+from PyPDF2.pdf import PageObject
+from PyPDF2.generic import (DictionaryObject, ArrayObject, NameObject,
+                            NumberObject, NullObject, IndirectObject,
+                            StreamObject, DecodedStreamObject,
+                            RectangleObject)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# --------------------------------------------------------------------------- #
+# set up logging
+#
+# Each build (cf. Build) logs to its own master log file, through a logger of
+# its own with this name.
+
+MASTER_LOG_NAME = 'master.log'
+PDFLATEX_LOG_NAME = 'pdflatex.log'
+DIRECTORY_LOG_NAME = 'directory.log'
+
+MASTER_LOGGER = logging.getLogger(__name__)
+MASTER_LOGGER.setLevel(logging.INFO)
+
+
+def master_log_handler(log_dir):
+    """Return a logging handler for the master log file in *log_dir*."""
+    if not os.path.isdir(log_dir):
+        os.makedirs(log_dir)
+
+    handler = logging.FileHandler(os.path.join(log_dir, MASTER_LOG_NAME))
+    handler.setLevel(logging.INFO)
+    handler.setFormatter(logging.Formatter('%(asctime)s: %(message)s'))
+    return handler
+
+# --------------------------------------------------------------------------- #
+# some handy functions
+
+
+def read_csv(fname, delim=',;\t| '):
+    """Read a CSV file (n rows, m columns) with filename *fname*,
+    and return a list containing n lists each containing m strings.
+    """
+    # universal newlines are the default in Python 3, where the "U" mode is
+    # gone; the csv module wants newline='' there
+    if sys.version_info[0] < 3:
+        csvfile = open(fname, 'rU')
+    else:
+        csvfile = open(fname, newline='')
+
+    with csvfile:
+        dialect = csv.Sniffer().sniff(csvfile.read(), delimiters=delim)
+        csvfile.seek(0)
+        data = csv.reader(csvfile, dialect)
+        return list(data)
+
+
+def ensure_empty_dir(abs_dir_path):
+    """Ensure that *abs_dir_path* is an empty folder."""
+    if os.path.isdir(abs_dir_path):
+        # delete everything inside the folder
+        existing_filenames = os.listdir(abs_dir_path)
+        for filename_ in existing_filenames:
+            filename_abs_path = os.path.join(abs_dir_path, filename_)
+            os.remove(filename_abs_path)
+    else:
+        # create the empty folder
+        os.makedirs(abs_dir_path)
+
+
+def ensure_dir(abs_dir_path):
+    """Ensure that *abs_dir_path* is a folder, even if another build (e.g.,
+    of another volume in batch mode) creates it at the same time."""
+    try:
+        os.makedirs(abs_dir_path)
+    except OSError:
+        if not os.path.isdir(abs_dir_path):
+            raise
+
+
+def temporary_path(path):
+    """Return a path for a temporary file next to *path*, which is unique to
+    this process and thread."""
+    return '{}.{}-{}.tmp'.format(path, os.getpid(),
+                                 threading.current_thread().ident)
+
+
+def hash_file(path):
+    """Return the SHA-256 hex digest of the contents of the file *path*."""
+    hash_ = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            hash_.update(chunk)
+    return hash_.hexdigest()
+
+
+def hash_strings(*strings):
+    """Return the SHA-256 hex digest of the sequence *strings*."""
+    hash_ = hashlib.sha256()
+    for string in strings:
+        string = str(string).encode('utf-8')
+        # length-prefixed, so that ('ab', 'c') and ('a', 'bc') differ
+        hash_.update('{}:'.format(len(string)).encode('ascii'))
+        hash_.update(string)
+    return hash_.hexdigest()
+
+
+class BuildCache(object):
+    """A persistent store of build artifacts (files) in *abs_dir_path*.
+
+    An artifact is stored under a key which is a hash of all the inputs that
+    determine the artifact, so an artifact found in the cache is always
+    up-to-date and can be reused as is.
+    If *enabled* is False, nothing is ever found or stored.
+    """
+
+    def __init__(self, abs_dir_path, enabled=True):
+        self.abs_dir_path = abs_dir_path
+        self.enabled = enabled
+        self.hits = dict()  # key: kind of artifact; value: int
+        self.misses = dict()  # key: kind of artifact; value: int
+        self._lock = threading.Lock()  # for hits and misses
+
+    def path(self, kind, key, extension='.pdf'):
+        """Return the path of the artifact of *kind* (str) for *key*."""
+        return os.path.join(self.abs_dir_path, kind, key + extension)
+
+    def fetch(self, kind, key, output_path):
+        """Copy the artifact of *kind* for *key* to *output_path*.
+        Return True if the artifact is found, False otherwise."""
+        cached_path = self.path(kind, key)
+
+        found = self.enabled and os.path.isfile(cached_path)
+
+        if found:
+            shutil.copyfile(cached_path, output_path)
+
+        with self._lock:
+            counts = self.hits if found else self.misses
+            counts[kind] = counts.get(kind, 0) + 1
+
+        return found
+
+    def store(self, kind, key, input_path):
+        """Store the file *input_path* as the artifact of *kind* for *key*."""
+        if not self.enabled:
+            return
+
+        cached_path = self.path(kind, key)
+        ensure_dir(os.path.dirname(cached_path))
+
+        # copy first and then rename, so that an interrupted build never
+        # leaves a partially written artifact in the cache
+        temp_path = temporary_path(cached_path)
+        shutil.copyfile(input_path, temp_path)
+        os.rename(temp_path, cached_path)
+
+    def load(self, kind, key):
+        """Return the data (stored by save()) of *kind* for *key*, or None if
+        there is none."""
+        cached_path = self.path(kind, key, '.json')
+        data = None
+
+        if self.enabled and os.path.isfile(cached_path):
+            try:
+                with open(cached_path) as f:
+                    data = json.load(f)
+            except ValueError:
+                pass
+
+        with self._lock:
+            counts = self.hits if data is not None else self.misses
+            counts[kind] = counts.get(kind, 0) + 1
+
+        return data
+
+    def save(self, kind, key, data):
+        """Store *data* (anything for JSON) as the data of *kind* for
+        *key*."""
+        if not self.enabled:
+            return
+
+        cached_path = self.path(kind, key, '.json')
+        ensure_dir(os.path.dirname(cached_path))
+
+        temp_path = temporary_path(cached_path)
+        with open(temp_path, 'w') as f:
+            json.dump(data, f)
+        os.rename(temp_path, cached_path)
+
+    def summary(self):
+        """Return a one-line summary of cache hits and misses."""
+        kinds = sorted(set(self.hits) | set(self.misses))
+        return '; '.join('{}: {} reused, {} built'
+                         .format(kind, self.hits.get(kind, 0),
+                                 self.misses.get(kind, 0))
+                         for kind in kinds)
+
+
+class BuildStats(object):
+    """Timing and resource use of the stages of a build, and of the items
+    (headers, papers, etc) within the stages.
+
+    A stage starts with start_stage() and ends with the next start_stage() or
+    with end_stage(). For each stage, the wall time, the CPU time of this
+    process and of its child processes (pdflatex, worker processes), the peak
+    memory so far and the bytes read and written are recorded. Peak memory
+    and bytes read/written are None where the operating system does not
+    tell them.
+    """
+
+    FIELDS = ('type', 'stage', 'item', 'paper', 'start', 'end', 'seconds',
+              'cpu_time', 'children_cpu_time', 'peak_rss_kb',
+              'children_peak_rss_kb', 'bytes_read', 'bytes_written', 'pages',
+              'critical', 'bytes')
+
+    def __init__(self):
+        self.stages = list()  # list of dict
+        self.items = list()  # list of dict
+        self.current_stage = None  # (name, snapshot at its start)
+
+    @staticmethod
+    def snapshot():
+        """Return a dict of the resource use of this process so far."""
+        times = os.times()
+        snapshot = {'time': time.time(),
+                    'cpu_time': times[0] + times[1],
+                    'children_cpu_time': times[2] + times[3],
+                    'peak_rss_kb': None, 'children_peak_rss_kb': None,
+                    'bytes_read': None, 'bytes_written': None}
+
+        if resource is not None:
+            # ru_maxrss is in bytes on macOS, in kB elsewhere
+            unit = 1024 if sys.platform == 'darwin' else 1
+            snapshot['peak_rss_kb'] = resource.getrusage(
+                resource.RUSAGE_SELF).ru_maxrss // unit
+            snapshot['children_peak_rss_kb'] = resource.getrusage(
+                resource.RUSAGE_CHILDREN).ru_maxrss // unit
+
+        try:
+            with open('/proc/self/io') as f:  # Linux only
+                counters = dict(line.split(':') for line in f)
+            snapshot['bytes_read'] = int(counters['rchar'])
+            snapshot['bytes_written'] = int(counters['wchar'])
+        except (IOError, OSError, KeyError, ValueError):
+            pass
+
+        return snapshot
+
+    def start_stage(self, name):
+        """End the current stage (if any), and start the stage *name*."""
+        self.end_stage()
+        self.current_stage = (name, self.snapshot())
+
+    def end_stage(self):
+        """End the current stage (if any)."""
+        if self.current_stage is None:
+            return
+
+        name, start = self.current_stage
+        end = self.snapshot()
+        self.current_stage = None
+
+        stage = {'type': 'stage', 'stage': name,
+                 'start': start['time'], 'end': end['time'],
+                 'seconds': end['time'] - start['time'],
+                 'peak_rss_kb': end['peak_rss_kb'],
+                 'children_peak_rss_kb': end['children_peak_rss_kb']}
+
+        for field in ('cpu_time', 'children_cpu_time', 'bytes_read',
+                      'bytes_written'):
+            if end[field] is not None:
+                stage[field] = end[field] - start[field]
+            else:
+                stage[field] = None
+
+        self.stages.append(stage)
+
+    def add_item(self, stage, item, seconds, **metrics):
+        """Record that *item* (str) of *stage* took *seconds*. *metrics* are
+        any other fields, e.g., paper=<paper filename>, pages=<int>."""
+        record = {'type': 'item', 'stage': stage, 'item': item,
+                  'seconds': seconds}
+        record.update(metrics)
+        self.items.append(record)
+
+    def slowest_papers(self, n):
+        """Return a list of (paper, pages, {stage: seconds}, total seconds)
+        of the *n* papers whose items took the longest in total."""
+        papers = OrderedDict()
+
+        for record in self.items:
+            paper = record.get('paper')
+            if paper is None:
+                continue
+
+            pages, seconds = papers.setdefault(paper, [None, dict()])
+            seconds[record['stage']] = (seconds.get(record['stage'], 0) +
+                                        record['seconds'])
+
+            if record.get('pages') is not None:
+                papers[paper][0] = record['pages']
+
+        totals = sorted(((paper, pages, seconds, sum(seconds.values()))
+                         for paper, (pages, seconds) in papers.items()),
+                        key=lambda x: x[3], reverse=True)
+        return totals[:n]
+
+    def write(self, path):
+        """Write the stages and the items to *path*, as CSV if the filename
+        ends with ".csv" and as JSON otherwise."""
+        if path.lower().endswith('.csv'):
+            with open(path, 'w') as f:
+                writer = csv.DictWriter(f, self.FIELDS, restval='',
+                                        lineterminator='\n')
+                writer.writeheader()
+                writer.writerows(self.stages + self.items)
+        else:
+            with open(path, 'w') as f:
+                json.dump({'stages': self.stages, 'items': self.items}, f,
+                          indent=2, sort_keys=True)
+
+
+class ReopenableFile(object):
+    """The file of a PdfFileReader in *registry* (a PdfReaderRegistry), which
+    the registry may close at any time: the file *path* is opened again
+    whenever it is read. (PdfFileReader always seeks before reading, so the
+    position in the file need not be kept.)"""
+
+    def __init__(self, registry, path):
+        self.registry = registry
+        self.path = path
+
+    def __getattr__(self, name):
+        return getattr(self.registry._open(self.path), name)
+
+
+class PdfReaderRegistry(object):
+    """A registry of PdfFileReader objects shared by all stages of a build,
+    so that each pdf file is opened and parsed only once.
+
+    At most *max_open_files* files are kept open at any time. When one more
+    is needed, the least recently used file is closed. Its reader (and the
+    page objects from it, which may still be waiting to be written into an
+    output pdf) remains usable: the file is opened again when the reader
+    reads from it (cf. ReopenableFile), so memory use does not grow with the
+    number of files.
+
+    Readers are dropped by release() when no stage needs them any more,
+    and close() closes all the files when the build is done. A registry may
+    also be shared by several builds (cf. watch()): a file which has changed
+    since its reader was made gets a new reader.
+    """
+
+    def __init__(self, max_open_files=64):
+        self.max_open_files = max(max_open_files, 1)
+        self._readers = dict()  # key: abs path; value: PdfFileReader
+        self._pages = dict()  # key: abs path; value: list of PageObject
+        # key: abs path; value: (modification time, size) of the file
+        self._signatures = dict()
+        # key: abs path; value: file object (least recently used first)
+        self._open_files = OrderedDict()
+
+    @staticmethod
+    def _signature(path):
+        stat = os.stat(path)
+        return stat.st_mtime, stat.st_size
+
+    def get(self, path):
+        """Return the PdfFileReader of the pdf file *path*."""
+        path = os.path.abspath(path)
+
+        if (path in self._readers and
+                self._signatures.get(path) != self._signature(path)):
+            self.release(path)
+
+        if path in self._readers:
+            return self._readers[path]
+
+        self._signatures[path] = self._signature(path)
+        self._readers[path] = PdfFileReader(ReopenableFile(self, path))
+        return self._readers[path]
+
+    def pages(self, path):
+        """Return the list of page objects of the pdf file *path*
+        (which are those set by set_pages(), if any)."""
+        path = os.path.abspath(path)
+
+        if path in self._pages:
+            if self._signatures.get(path) == self._signature(path):
+                return self._pages[path]
+
+            self.release(path)
+
+        reader = self.get(path)
+        return [reader.getPage(i) for i in range(reader.getNumPages())]
+
+    def set_pages(self, path, pages):
+        """Register the page objects *pages* (list) as those of the pdf file
+        *path*, so that later stages can reuse them without parsing *path*
+        again. The pages must have the same content as the file."""
+        path = os.path.abspath(path)
+        self._pages[path] = pages
+        self._signatures[path] = self._signature(path)
+
+    def release(self, path):
+        """Drop the reader and the page objects of the pdf file *path*."""
+        path = os.path.abspath(path)
+        f = self._open_files.pop(path, None)
+
+        if f is not None:
+            f.close()
+
+        self._readers.pop(path, None)
+        self._pages.pop(path, None)
+        self._signatures.pop(path, None)
+
+    def release_dir(self, abs_dir_path):
+        """Drop the readers and the page objects of all pdf files in the
+        directory *abs_dir_path* (and its subdirectories)."""
+        prefix = os.path.join(abs_dir_path, '')
+
+        for path in list(self._signatures):
+            if path.startswith(prefix):
+                self.release(path)
+
+    def close(self):
+        """Close all files and drop all readers."""
+        for path in list(self._readers):
+            self.release(path)
+
+        # files opened again for the page objects of released readers
+        while self._open_files:
+            self._open_files.popitem()[1].close()
+
+    def _open(self, path):
+        """Return the open file *path* (cf. ReopenableFile), opening it, and
+        closing the least recently used file if need be."""
+        if path in self._open_files:
+            # mark as the most recently used
+            self._open_files[path] = self._open_files.pop(path)
+            return self._open_files[path]
+
+        while len(self._open_files) >= self.max_open_files:
+            self._open_files.pop(next(iter(self._open_files))).close()
+
+        self._open_files[path] = open(path, 'rb')
+        return self._open_files[path]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def flate_stream(stream):
+    """Return a copy of *stream* (a stream object without any filter), with
+    its data compressed with the Flate (zlib) filter."""
+    compressed = DecodedStreamObject()
+    compressed.update(stream)
+    compressed._data = zlib.compress(stream._data, 6)
+    compressed[NameObject('/Filter')] = NameObject('/FlateDecode')
+    return compressed
+
+
+class IncrementalPdfWriter(object):
+    """A pdf writer which writes the objects of pages to *output_file* (a file
+    object opened in binary mode) as soon as the pages are added, instead of
+    keeping everything in memory until the end as PdfFileWriter does.
+
+    Objects which pages refer to are copied from their source pdfs (readers)
+    the first time they are needed; after that, a source pdf may be dropped,
+    and memory use is bounded by the largest source pdf rather than the
+    whole output. close() writes the page tree, the catalog and the
+    cross-reference table.
+
+    If *deduplicate* is True, an object (other than a page) which is
+    byte-for-byte identical to one already written, e.g., the same font file
+    or image embedded in several papers, is not written again, and references
+    to it point to the object already written. Objects are written after the
+    objects they refer to, so whole identical resources (a font dictionary
+    with its font file, etc) collapse into one.
+
+    If *compress* is True, the output is a PDF 1.5 file with compressed
+    object streams (which hold all objects other than streams, in groups of
+    OBJECTS_PER_STREAM) and a compressed cross-reference stream, and streams
+    without any filter (e.g., the content streams of pages with headers) are
+    compressed.
+    """
+
+    OBJECTS_PER_STREAM = 100
+
+    def __init__(self, output_file, deduplicate=False, compress=False):
+        self.output_file = output_file
+        self.deduplicate = deduplicate
+        self.compress = compress
+        # index: object number; value: byte offset, or (number of the object
+        # stream, index in the object stream) for an object in an object
+        # stream
+        self.offsets = [None]
+        # (object number, data) of the objects for the next object stream
+        self.pending_objects = list()
+        self.page_numbers = list()  # object numbers of the pages, in order
+        # key: source pdf; value: dict (key: (idnum, generation) in the source
+        # pdf; value: object number in the output)
+        self.object_numbers = weakref.WeakKeyDictionary()
+        self.digests = dict()  # key: hash of an object; value: object number
+        self.copying = set()  # numbers of objects being copied
+        self.cyclic = set()  # numbers referred to while being copied
+        self.duplicate_objects = 0
+        self.duplicate_bytes = 0
+
+        self.output_file.write(b'%PDF-1.5\n' if compress else b'%PDF-1.3\n')
+        self.output_file.write(b'%\xe2\xe3\xcf\xd3\n')
+        self.pages_number = self._new_object_number()
+
+    def add_pages(self, pages):
+        """Add *pages* (list of page objects) and write their objects."""
+        page_numbers = list()
+
+        # Object numbers for all pages are assigned first, so that
+        # references between them (e.g., links) are kept.
+        for page in pages:
+            number = self._new_object_number()
+            page_numbers.append(number)
+
+            if page.indirectRef is not None:
+                self._numbers_for(page.indirectRef.pdf)[
+                    (page.indirectRef.idnum,
+                     page.indirectRef.generation)] = number
+
+        for page, number in zip(pages, page_numbers):
+            page_copy = self._copy(page, skip_keys=('/Parent',))
+            page_copy[NameObject('/Parent')] = IndirectObject(
+                self.pages_number, 0, None)
+            self._write_object(number, page_copy)
+
+        self.page_numbers.extend(page_numbers)
+
+    def close(self):
+        """Write the page tree, the catalog and the cross-reference table."""
+        pages = DictionaryObject({
+            NameObject('/Type'): NameObject('/Pages'),
+            NameObject('/Count'): NumberObject(len(self.page_numbers)),
+            NameObject('/Kids'): ArrayObject(
+                [IndirectObject(number, 0, None)
+                 for number in self.page_numbers]),
+        })
+        self._write_object(self.pages_number, pages)
+
+        catalog_number = self._new_object_number()
+        self._write_object(catalog_number, DictionaryObject({
+            NameObject('/Type'): NameObject('/Catalog'),
+            NameObject('/Pages'): IndirectObject(self.pages_number, 0, None),
+        }))
+
+        if self.compress:
+            self._write_object_stream()
+            self._write_xref_stream(catalog_number)
+            return
+
+        xref_offset = self.output_file.tell()
+        self.output_file.write('xref\n0 {}\n'.format(len(self.offsets))
+                               .encode('ascii'))
+        self.output_file.write(b'0000000000 65535 f \n')
+
+        for offset in self.offsets[1:]:
+            if offset is None:
+                self.output_file.write(b'0000000000 00000 f \n')
+            else:
+                self.output_file.write('{:010d} 00000 n \n'.format(offset)
+                                       .encode('ascii'))
+
+        self.output_file.write('trailer\n<< /Size {} /Root {} 0 R >>\n'
+                               'startxref\n{}\n%%EOF\n'
+                               .format(len(self.offsets), catalog_number,
+                                       xref_offset).encode('ascii'))
+
+    def _new_object_number(self):
+        self.offsets.append(None)
+        return len(self.offsets) - 1
+
+    def _numbers_for(self, pdf):
+        if pdf not in self.object_numbers:
+            self.object_numbers[pdf] = dict()
+        return self.object_numbers[pdf]
+
+    def _write_object(self, number, obj, shareable=False):
+        """Write *obj* as the object *number*, and return *number*.
+        If *shareable* and an identical object has already been written,
+        write nothing and return the number of that object instead."""
+        if (self.compress and isinstance(obj, StreamObject) and
+                '/Filter' not in obj):
+            obj = flate_stream(obj)
+
+        data = io.BytesIO()
+        obj.writeToStream(data, None)
+        data = data.getvalue()
+
+        if self.deduplicate and shareable:
+            digest = hashlib.sha256(data).digest()
+
+            if digest in self.digests:
+                self.duplicate_objects += 1
+                self.duplicate_bytes += len(data)
+                return self.digests[digest]
+
+            self.digests[digest] = number
+
+        if self.compress and not isinstance(obj, StreamObject):
+            self.pending_objects.append((number, data))
+
+            if len(self.pending_objects) >= self.OBJECTS_PER_STREAM:
+                self._write_object_stream()
+
+            return number
+
+        self.offsets[number] = self.output_file.tell()
+        self.output_file.write('{} 0 obj\n'.format(number).encode('ascii'))
+        self.output_file.write(data)
+        self.output_file.write(b'\nendobj\n')
+        return number
+
+    def _write_object_stream(self):
+        """Write the pending objects into an object stream."""
+        if not self.pending_objects:
+            return
+
+        pending_objects = self.pending_objects
+        self.pending_objects = list()
+        stream_number = self._new_object_number()
+        header = list()
+        body = io.BytesIO()
+
+        for index, (number, data) in enumerate(pending_objects):
+            header.append('{} {}'.format(number, body.tell()))
+            body.write(data)
+            body.write(b'\n')
+            self.offsets[number] = (stream_number, index)
+
+        header = (' '.join(header) + '\n').encode('ascii')
+        object_stream = DecodedStreamObject()
+        object_stream._data = header + body.getvalue()
+        object_stream.update({
+            NameObject('/Type'): NameObject('/ObjStm'),
+            NameObject('/N'): NumberObject(len(pending_objects)),
+            NameObject('/First'): NumberObject(len(header)),
+        })
+        self._write_object(stream_number, flate_stream(object_stream))
+
+    def _write_xref_stream(self, catalog_number):
+        """Write the cross-reference stream, and the end of the file."""
+        xref_number = self._new_object_number()
+        xref_offset = self.output_file.tell()
+        self.offsets[xref_number] = xref_offset
+
+        # the widths of the fields of each entry: type; offset (or number of
+        # the object stream); generation (or index in the object stream)
+        widths = (1, max(1, (xref_offset.bit_length() + 7) // 8), 2)
+        rows = bytearray()
+
+        for number, offset in enumerate(self.offsets):
+            if isinstance(offset, tuple):
+                fields = (2,) + offset
+            elif offset is not None:
+                fields = (1, offset, 0)
+            else:
+                fields = (0, 0, 65535 if number == 0 else 0)
+
+            for value, width in zip(fields, widths):
+                rows.extend((value >> (8 * i)) & 0xff
+                            for i in reversed(range(width)))
+
+        xref_stream = DecodedStreamObject()
+        xref_stream._data = bytes(rows)
+        xref_stream.update({
+            NameObject('/Type'): NameObject('/XRef'),
+            NameObject('/Size'): NumberObject(len(self.offsets)),
+            NameObject('/W'): ArrayObject(NumberObject(width)
+                                          for width in widths),
+            NameObject('/Root'): IndirectObject(catalog_number, 0, None),
+        })
+
+        data = io.BytesIO()
+        flate_stream(xref_stream).writeToStream(data, None)
+        self.output_file.write('{} 0 obj\n'.format(xref_number)
+                               .encode('ascii'))
+        self.output_file.write(data.getvalue())
+        self.output_file.write('\nendobj\nstartxref\n{}\n%%EOF\n'
+                               .format(xref_offset).encode('ascii'))
+
+    def _copy(self, obj, skip_keys=()):
+        """Return a copy of *obj* for the output, in which all references
+        point to objects in the output (which are written if necessary)."""
+        if isinstance(obj, IndirectObject):
+            numbers = self._numbers_for(obj.pdf)
+            key = (obj.idnum, obj.generation)
+
+            if key not in numbers:
+                try:
+                    target = obj.getObject()
+                except ValueError:
+                    # an object which cannot be found in the source pdf
+                    return NullObject()
+
+                if isinstance(target, DictionaryObject) and \
+                        target.get('/Type') in ('/Page', '/Pages'):
+                    # a page not (or not yet) in the output, or the page tree
+                    # of the source pdf, which must not be copied
+                    return NullObject()
+
+                number = self._new_object_number()
+                numbers[key] = number
+                self.copying.add(number)
+                copy = self._copy(target)
+                self.copying.discard(number)
+
+                # An object referred to by (objects referred to by) itself
+                # has already been referred to by its number, which must
+                # therefore be kept.
+                numbers[key] = self._write_object(
+                    number, copy, shareable=number not in self.cyclic)
+            elif numbers[key] in self.copying:
+                self.cyclic.add(numbers[key])
+
+            return IndirectObject(numbers[key], 0, None)
+        elif isinstance(obj, StreamObject):
+            copy = DecodedStreamObject()
+            copy._data = obj._data
+            copy.update((key, self._copy_item(value))
+                        for key, value in obj.items())
+            return copy
+        elif isinstance(obj, DictionaryObject):
+            return DictionaryObject((key, self._copy_item(value))
+                                    for key, value in obj.items()
+                                    if key not in skip_keys)
+        elif isinstance(obj, ArrayObject):
+            return ArrayObject(self._copy_item(item) for item in obj)
+        else:
+            return obj
+
+    def _copy_item(self, obj):
+        """Return a copy of *obj*, a value in a dictionary or array."""
+        copy = self._copy(obj)
+
+        if isinstance(copy, StreamObject):
+            # streams must be indirect objects (e.g., the merged content
+            # streams of pages with headers are not)
+            number = self._write_object(self._new_object_number(), copy,
+                                        shareable=True)
+            return IndirectObject(number, 0, None)
+
+        return copy
+
+
+def run_pdflatex(tex_path, output_abs_dir, timeout=None, latex_format=None):
+    """Compile the LaTeX file *tex_path* with pdflatex.
+
+    pdflatex runs in its own scratch directory so that the .aux/.log files of
+    concurrent jobs never collide. The resulting pdf and pdflatex's own log
+    are moved into *output_abs_dir* afterwards.
+    If *timeout* (in seconds) is given, pdflatex is killed when it runs longer.
+
+    *latex_format* is either None or a tuple (path of a precompiled format
+    file, the preamble dumped into it; cf. build_latex_format()). If the LaTeX
+    file starts with that preamble, only the rest of the file is compiled,
+    with the format loaded instead of the preamble. If this fails, the whole
+    LaTeX file is compiled as usual.
+
+    Return a tuple (stdout, error), where *stdout* is the captured console
+    output of pdflatex and *error* is an error message (None if the pdf was
+    created).
+    """
+    basename = os.path.splitext(os.path.basename(tex_path))[0]
+    scratch_dir = tempfile.mkdtemp(prefix='cls-pdflatex-')
+    killed = list()
+    outputs = list()  # console output of each pdflatex run
+
+    def kill(process_):
+        killed.append(True)
+        process_.kill()
+
+    def compile_(source_path, options=(), env=None):
+        """Run pdflatex on *source_path*; return True if a pdf is created."""
+        with open(os.devnull) as devnull:
+            process = subprocess.Popen(('pdflatex', '-interaction=nonstopmode',
+                                        '-output-directory', scratch_dir) +
+                                       tuple(options) + (source_path,),
+                                       stdin=devnull, stdout=subprocess.PIPE,
+                                       stderr=subprocess.STDOUT, env=env)
+        timer = None
+        if timeout:
+            timer = threading.Timer(timeout, kill, (process,))
+            timer.start()
+        try:
+            outputs.append(process.communicate()[0])
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+        return os.path.isfile(os.path.join(scratch_dir, basename + '.pdf'))
+
+    try:
+        compiled = False
+
+        if latex_format is not None:
+            format_path, preamble = latex_format
+
+            with open(tex_path) as f:
+                latex_str = f.read()
+
+            if latex_str.startswith(preamble):
+                # the rest of the document, under the same name
+                body_path = os.path.join(scratch_dir, basename + '.tex')
+                with open(body_path, 'w') as f:
+                    f.write(latex_str[len(preamble):])
+
+                env = dict(os.environ)
+                env['TEXFORMATS'] = (os.path.dirname(format_path) +
+                                     os.pathsep + env.get('TEXFORMATS', ''))
+                format_name = os.path.splitext(
+                    os.path.basename(format_path))[0]
+                compiled = compile_(body_path, ('-fmt=' + format_name,), env)
+
+        if not compiled and not killed:
+            compile_(tex_path)
+
+        for extension in ('.pdf', '.log'):
+            scratch_path = os.path.join(scratch_dir, basename + extension)
+            if os.path.isfile(scratch_path):
+                shutil.move(scratch_path,
+                            os.path.join(output_abs_dir, basename + extension))
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    stdout = '\n'.join(output.decode('utf-8', 'replace')
+                       for output in outputs)
+
+    if killed:
+        error = ('pdflatex timed out after {} seconds for {}'
+                 .format(timeout, tex_path))
+    elif not os.path.isfile(os.path.join(output_abs_dir, basename + '.pdf')):
+        error = 'pdflatex did not produce a pdf for {}'.format(tex_path)
+    else:
+        error = None
+
+    return stdout, error
+
+
+# the placeholders in the templates, e.g., XXStartPageXX
+LATEX_PLACEHOLDER_PATTERN = re.compile(r'XX[A-Za-z]+XX')
+
+
+def split_latex_preamble(latex_str):
+    """Return the static part of the preamble of the LaTeX document (or
+    template) *latex_str*, which can be dumped into a precompiled format:
+    everything up to the last \\usepackage line which comes before both
+    \\begin{document} and the first XX...XX placeholder.
+    Return None if there is no such part.
+    """
+    lines = latex_str.splitlines(True)
+    end = None
+
+    for i, line in enumerate(lines):
+        if (LATEX_PLACEHOLDER_PATTERN.search(line) or
+                '\\begin{document}' in line):
+            break
+        if line.lstrip().startswith('\\usepackage'):
+            end = i + 1
+
+    if end is None:
+        return None
+
+    preamble = ''.join(lines[:end])
+
+    # e.g., package options spanning more lines
+    if (preamble.count('{') != preamble.count('}') or
+            preamble.count('[') != preamble.count(']') or
+            '\\documentclass' not in preamble):
+        return None
+
+    return preamble
+
+
+def qpdf_version():
+    """Return the first line of "qpdf --version" (None if qpdf cannot be
+    run)."""
+    try:
+        output = subprocess.check_output(('qpdf', '--version'))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return output.decode('utf-8', 'replace').strip().split('\n')[0]
+
+
+def linearize_pdf(pdf_path):
+    """Linearize the pdf file *pdf_path* in place with qpdf ("fast web
+    view": the first page can be shown before the whole file is read).
+    Raise RuntimeError if qpdf fails."""
+    linearized_path = temporary_path(pdf_path)
+    process = subprocess.Popen(('qpdf', '--linearize', pdf_path,
+                                linearized_path),
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.STDOUT)
+    stdout = process.communicate()[0]
+
+    # qpdf exits with 3 if there were only warnings
+    if process.returncode not in (0, 3):
+        if os.path.exists(linearized_path):
+            os.remove(linearized_path)
+        raise RuntimeError('qpdf could not linearize {}:\n{}'.format(
+            pdf_path, stdout.decode('utf-8', 'replace')))
+
+    os.rename(linearized_path, pdf_path)
+
+
+def pdflatex_version():
+    """Return the first line of "pdflatex --version" (None if pdflatex cannot
+    be run)."""
+    try:
+        output = subprocess.check_output(('pdflatex', '--version'))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return output.decode('utf-8', 'replace').strip().split('\n')[0]
+
+
+def build_latex_format(preamble, formats_abs_dir, timeout=None):
+    """Dump the LaTeX *preamble* into a precompiled format file in
+    *formats_abs_dir*, unless such a file is already there.
+    The file is named after a hash of the preamble and the version of
+    pdflatex, so a format file is never used with a different preamble or
+    pdflatex.
+
+    Return a tuple (latex_format, stdout), where *latex_format* is the tuple
+    (format path, *preamble*) for run_pdflatex(), or None if the format could
+    not be built, and *stdout* is the console output of pdflatex.
+    """
+    version = pdflatex_version()
+
+    if version is None:
+        return None, ''
+
+    key = hash_strings(preamble, version)
+    format_path = os.path.join(formats_abs_dir, key + '.fmt')
+
+    if os.path.isfile(format_path):
+        return (format_path, preamble), ''
+
+    ensure_dir(formats_abs_dir)
+    scratch_dir = tempfile.mkdtemp(prefix='cls-pdflatex-')
+
+    try:
+        preamble_path = os.path.join(scratch_dir, key + '.tex')
+        with open(preamble_path, 'w') as f:
+            f.write(preamble + '\n\\dump\n')
+
+        with open(os.devnull) as devnull:
+            process = subprocess.Popen(('pdflatex', '-ini',
+                                        '-interaction=nonstopmode',
+                                        '-jobname=' + key,
+                                        '-output-directory', scratch_dir,
+                                        '&pdflatex', preamble_path),
+                                       stdin=devnull, stdout=subprocess.PIPE,
+                                       stderr=subprocess.STDOUT)
+        timer = None
+        if timeout:
+            timer = threading.Timer(timeout, process.kill)
+            timer.start()
+        try:
+            stdout = process.communicate()[0].decode('utf-8', 'replace')
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+        scratch_path = os.path.join(scratch_dir, key + '.fmt')
+
+        if process.returncode or not os.path.isfile(scratch_path):
+            return None, stdout
+
+        # move first and then rename, so that other builds never see a
+        # partially written format file
+        temp_path = temporary_path(format_path)
+        shutil.move(scratch_path, temp_path)
+        os.rename(temp_path, format_path)
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    return (format_path, preamble), stdout
+
+
+def content_stream(data):
+    """Return a content stream object with *data* (bytes)."""
+    stream = DecodedStreamObject()
+    stream._data = data
+    return stream
+
+
+def wrap_page_content(page, before, after):
+    """Put the content streams *before* and *after* (bytes) around the
+    content of *page*, whose own content streams are left as they are (they
+    are not decoded, unlike with page.mergePage(), page.scaleBy(), etc)."""
+    contents = page.get('/Contents')
+
+    if contents is None:
+        contents = list()
+    elif isinstance(contents.getObject(), ArrayObject):
+        contents = list(contents.getObject())
+    else:
+        contents = [contents]
+
+    page[NameObject('/Contents')] = ArrayObject(
+        [content_stream(before)] + contents + [content_stream(after)])
+
+
+def overlay_page(page, overlay):
+    """Superimpose the page *overlay* onto *page*, like
+    page.mergePage(overlay), but without decoding and encoding again the
+    content of *page*: the content of *overlay* becomes a form XObject of
+    *page*, which is drawn after the content of *page*."""
+    form = content_stream(overlay.getContents().getData()
+                          if overlay.getContents() is not None else b'')
+    form.update({
+        NameObject('/Type'): NameObject('/XObject'),
+        NameObject('/Subtype'): NameObject('/Form'),
+        NameObject('/BBox'): overlay.mediaBox,
+    })
+
+    if '/Resources' in overlay:
+        form[NameObject('/Resources')] = overlay.raw_get('/Resources')
+
+    # The resources of the page are copied, so that a resources dictionary
+    # shared by several pages is not changed.
+    resources = DictionaryObject()
+    resources.update(page['/Resources'].getObject()
+                     if '/Resources' in page else {})
+    xobjects = DictionaryObject()
+    xobjects.update(resources['/XObject'].getObject()
+                    if '/XObject' in resources else {})
+
+    name = '/ClsOverlay'
+    while name in xobjects:
+        name += 'X'
+
+    xobjects[NameObject(name)] = form
+    resources[NameObject('/XObject')] = xobjects
+    page[NameObject('/Resources')] = resources
+
+    wrap_page_content(page, b'q\n', '\nQ\n{} Do\n'.format(name)
+                      .encode('ascii'))
+
+    if '/Annots' in overlay:
+        annotations = ArrayObject(page['/Annots'].getObject()
+                                  if '/Annots' in page else [])
+        annotations.extend(overlay['/Annots'].getObject())
+        page[NameObject('/Annots')] = annotations
+
+
+def stamp_paper(paper_pdf, headers_pdf, output_pdf_path, wrap_content=False):
+    """Superimpose each page of *headers_pdf* onto the corresponding page of
+    *paper_pdf* (both PdfFileReader objects), write the result to
+    *output_pdf_path*, and return the list of the merged page objects.
+    If *wrap_content* is True, the pages are merged with overlay_page()
+    instead of page.mergePage()."""
+    output_pdf = PdfFileWriter()
+    pages = list()
+
+    # align the paper pdf and the headers pdf and merge (="superimpose") them
+    for j in range(paper_pdf.getNumPages()):
+        page = paper_pdf.getPage(j)
+
+        if wrap_content:
+            overlay_page(page, headers_pdf.getPage(j))
+        else:
+            page.mergePage(headers_pdf.getPage(j))
+
+        output_pdf.addPage(page)
+        pages.append(page)
+
+    with open(output_pdf_path, 'wb') as f:
+        output_pdf.write(f)
+
+    return pages
+
+
+def stamp_paper_file(paths):
+    """Run stamp_paper() for *paths*, a tuple of the paper pdf path, the
+    headers pdf path, the output pdf path and *wrap_content*. This is a task
+    for a worker process.
+
+    Return a tuple (number_of_pages, elapsed_seconds, error), where *error* is
+    an error message (None if successful).
+    """
+    paper_pdf_path, headers_pdf_path, output_pdf_path, wrap_content = paths
+    start_time = time.time()
+
+    try:
+        with open(paper_pdf_path, 'rb') as paper_file, \
+                open(headers_pdf_path, 'rb') as headers_file:
+            pages = stamp_paper(PdfFileReader(paper_file),
+                                PdfFileReader(headers_file), output_pdf_path,
+                                wrap_content)
+    except Exception as e:
+        return 0, time.time() - start_time, '{}: {}: {}'.format(
+            paper_pdf_path, type(e).__name__, e)
+
+    return len(pages), time.time() - start_time, None
+
+
+def process_pool(processes):
+    """Return a multiprocessing pool of *processes* worker processes.
+
+    The workers import the functions they run from this module. They ignore
+    Ctrl+C, which is handled by the main process (e.g., by watch()).
+    """
+    return multiprocessing.Pool(processes, ignore_interrupts)
+
+
+def ignore_interrupts():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def combine_latex_documents(latex_strs):
+    """Combine the complete LaTeX documents in *latex_strs* into a single
+    document which has the pages of all these documents in the given order.
+
+    The documents are made from the same template, and the preamble of the
+    first document is the preamble of the combined document, as it is.
+    Before the body of each other document, after a page break, the lines of
+    its preamble which are not the same in all the documents (the ones
+    filled in per document: page counter, headers, etc) are repeated, so
+    that they are set anew for each document. Nothing else is repeated, so
+    that e.g. \newcommand is not run twice.
+
+    Raise RuntimeError if the documents have preambles of different lengths
+    (so that they cannot be lined up), or no document body.
+    """
+    preamble_strs = list()
+    bodies = list()
+
+    for latex_str in latex_strs:
+        preamble, begin, rest = latex_str.partition('\\begin{document}')
+        body, end, _ = rest.rpartition('\\end{document}')
+
+        if not begin or not end:
+            raise RuntimeError('Cannot find \\begin{document} and '
+                               '\\end{document} in the LaTeX document:\n' +
+                               latex_str)
+
+        preamble_strs.append(preamble)
+        bodies.append(body)
+
+    preambles = [preamble.splitlines() for preamble in preamble_strs]
+
+    if len(set(len(lines) for lines in preambles)) > 1:
+        raise RuntimeError('The LaTeX documents to combine have preambles of '
+                           'different lengths.')
+
+    # indices of the lines which are not the same in all the preambles
+    varying_lines = [j for j, lines in enumerate(zip(*preambles))
+                     if len(set(lines)) > 1]
+    combined_body = [bodies[0]]
+
+    for lines, body in zip(preambles[1:], bodies[1:]):
+        combined_body.append('\\clearpage\n')
+        combined_body.extend(lines[j] + '\n' for j in varying_lines)
+        combined_body.append(body)
+
+    return '{}\\begin{{document}}\n{}\n\\end{{document}}\n'.format(
+        preamble_strs[0], ''.join(combined_body))
+
+
+def run_in_parallel(func, args_list, jobs):
+    """Return [func(args) for args in *args_list*], computed by a pool of
+    *jobs* worker threads (or sequentially if *jobs* is 1)."""
+    if jobs <= 1 or len(args_list) <= 1:
+        return [func(args) for args in args_list]
+
+    pool = ThreadPool(min(jobs, len(args_list)))
+    try:
+        return pool.map(func, args_list)
+    finally:
+        pool.close()
+        pool.join()
+
+
+# --------------------------------------------------------------------------- #
+# a graph of tasks, each of which runs as soon as the tasks it depends on are
+# done
+
+
+class TaskGraph(object):
+    """A graph of tasks (functions without arguments) with dependencies.
+
+    add() adds a task, which may only depend on tasks already added, so the
+    graph has no cycles (run() still checks, and raises ValueError on a
+    cycle rather than waiting forever). run() runs all the tasks with a
+    number of worker threads: a task starts as soon as all the tasks it
+    depends on are done, and among the tasks which are ready, those added
+    first start first.
+    If a task raises an exception, no more tasks are started, and the
+    exception is raised again by run() when the running tasks are done.
+
+    The start and end time of each task are kept in times, for
+    critical_path().
+    """
+
+    def __init__(self):
+        # key: task name; value: (function, tuple of names of dependencies)
+        self.tasks = OrderedDict()
+        self.times = dict()  # key: task name; value: (start, end)
+
+    def add(self, name, func, dependencies=()):
+        """Add the task *name* (str), which calls *func*, after the tasks
+        *dependencies* (names). Return *name*."""
+        if name in self.tasks:
+            raise ValueError('Duplicate task: {}'.format(name))
+
+        for dependency in dependencies:
+            if dependency not in self.tasks:
+                raise ValueError('Unknown task: {}'.format(dependency))
+
+        self.tasks[name] = (func, tuple(dependencies))
+        return name
+
+    def run(self, threads):
+        """Run all tasks with *threads* worker threads."""
+        order = dict((name, i) for i, name in enumerate(self.tasks))
+        waiting_for = dict((name, set(dependencies))
+                           for name, (_, dependencies) in self.tasks.items())
+        dependents = dict((name, list()) for name in self.tasks)
+
+        for name, (_, dependencies) in self.tasks.items():
+            for dependency in dependencies:
+                dependents[dependency].append(name)
+
+        ready = [(order[name], name) for name in self.tasks
+                 if not waiting_for[name]]
+        heapq.heapify(ready)
+        condition = threading.Condition()
+        state = {'unfinished': len(self.tasks), 'running': 0, 'error': None}
+
+        def worker():
+            while True:
+                with condition:
+                    while (not ready and state['unfinished'] and
+                           state['error'] is None):
+                        if not state['running']:
+                            # Nothing is running which could make the
+                            # unfinished tasks ready.
+                            state['error'] = ValueError(
+                                'Cycle in the tasks: {}'.format(', '.join(
+                                    name_ for name_ in self.tasks
+                                    if waiting_for[name_])))
+                            condition.notify_all()
+                            break
+
+                        condition.wait()
+
+                    if not ready or state['error'] is not None:
+                        return
+
+                    _, name = heapq.heappop(ready)
+                    state['running'] += 1
+
+                start_time = time.time()
+
+                try:
+                    self.tasks[name][0]()
+                except BaseException as e:
+                    with condition:
+                        state['running'] -= 1
+
+                        if state['error'] is None:
+                            state['error'] = e
+                        condition.notify_all()
+                    return
+
+                with condition:
+                    self.times[name] = (start_time, time.time())
+                    state['running'] -= 1
+                    state['unfinished'] -= 1
+
+                    for dependent in dependents[name]:
+                        waiting_for[dependent].discard(name)
+
+                        if not waiting_for[dependent]:
+                            heapq.heappush(ready, (order[dependent],
+                                                   dependent))
+
+                    condition.notify_all()
+
+        workers = [threading.Thread(target=worker)
+                   for _ in range(max(threads, 1))]
+
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        if state['error'] is not None:
+            raise state['error']
+
+    def critical_path(self):
+        """Return the list of the names of the tasks on the critical path of
+        the last run(): the chain of tasks, from a task without dependencies
+        to the task which finished last, in which each task is preceded by
+        the dependency which finished last."""
+        if not self.times:
+            return list()
+
+        name = max(self.times, key=lambda name_: self.times[name_][1])
+        path = [name]
+
+        while self.tasks[name][1]:
+            name = max(self.tasks[name][1],
+                       key=lambda name_: self.times[name_][1])
+            path.append(name)
+
+        return path[::-1]
+
+
+# --------------------------------------------------------------------------- #
+# pagination and the table of contents
+
+
+def page_ranges(page_counts, start_page_number):
+    """Return the list of page ranges ((first page, last page) of each paper)
+    of the papers with *page_counts* (list of int), the first paper starting
+    at *start_page_number*. Every paper starts on a right-hand page, so a
+    paper is followed by a blank page if it ends on a right-hand page."""
+    page_range_list = list()  # list of (int, int)
+    cumulative_start_page = start_page_number
+    current_paper_start_page = start_page_number
+
+    for number_of_pages in page_counts:
+        end_page = current_paper_start_page + number_of_pages - 1
+        page_range_list.append((current_paper_start_page, end_page))
+
+        cumulative_start_page += number_of_pages
+
+        if cumulative_start_page % 2:  # if it is an odd number
+            pass
+
+            # The current paper ends on the *left*-hand side in the printed
+            # volume. The next paper will start immediately afterwards (no
+            # blank page insertion needed), on the right-hand side in the
+            # printed volume.
+        else:
+            cumulative_start_page += 1
+
+            # The paper ends on the *right*-hand side in the printed volume.
+            # We will need to insert a blank page right after this page, so
+            # that the next paper starts on the right-hand side. In terms of
+            # page number tracking, the next paper will skip one page (= the
+            # blank page), and therefore we need to increment
+            # cumulative_start_page by 1.
+
+        current_paper_start_page = cumulative_start_page
+
+    return page_range_list
+
+
+def toc_latex(toc_template, volume, page_range_list):
+    """Return the LaTeX document of the table of contents made from
+    *toc_template* (str) for the papers of *volume* (a Volume) with
+    *page_range_list* (cf. page_ranges())."""
+    toc_entry_template = '\\TocEntry{{{}}}{{{}}}{{{}}}\n\n'
+
+    toc_entries_str = ''
+
+    for i in range(volume.number_of_papers):
+        authors = volume.authors_list[i]
+        paper_title = volume.paper_title_list[i]
+        current_paper_start_page = page_range_list[i][0]
+
+        toc_entries_str += toc_entry_template.format(
+            authors, paper_title, current_paper_start_page)
+
+    return toc_template.replace('XXInsertTocEntriesXX', toc_entries_str)
+
+
+# --------------------------------------------------------------------------- #
+# counting the pages of a pdf file quickly, without parsing the whole file
+
+PDF_TOKEN_PATTERN = re.compile(br'''
+    (?:\s|%[^\r\n]*)*                   # whitespace and comments
+    (?:(?P<dict_start><<)
+      |(?P<dict_end>>>)
+      |(?P<array_start>\[)
+      |(?P<array_end>\])
+      |(?P<name>/[^\s()<>\[\]{}/%]*)
+      |(?P<hex_string><[0-9A-Fa-f\s]*>)
+      |(?P<string>\()
+      |(?P<keyword>[^\s()<>\[\]{}/%]+))
+    ''', re.VERBOSE)
+PDF_INTEGER_PATTERN = re.compile(br'[+-]?\d+$')
+PDF_STRING_PATTERN = re.compile(br'\\.|[()]', re.DOTALL)
+PDF_OBJECT_HEADER_PATTERN = re.compile(br'\s*(\d+)\s+(\d+)\s+obj')
+PDF_STREAM_START_PATTERN = re.compile(br'(?:\s|%[^\r\n]*)*stream\r?\n')
+PDF_XREF_SUBSECTION_PATTERN = re.compile(br'\s*(\d+)\s+(\d+)')
+PDF_XREF_ENTRY_PATTERN = re.compile(br'\s*(\d{10})\s+(\d{5})\s+([nf])')
+
+
+class PdfReference(object):
+    """An indirect reference "*number* *generation* R" to a pdf object."""
+
+    def __init__(self, number, generation):
+        self.number = number
+        self.generation = generation
+
+
+class PdfPageCounter(object):
+    """A minimal pdf reader which finds the number of pages of a pdf file
+    from its cross-reference data (tables or streams), the document catalog
+    and the nodes of the page tree, without parsing anything else (e.g., the
+    contents and resources of the pages).
+
+    *data* is the content of the pdf file, typically a memory-mapped file.
+    Any problem with the file raises an exception (often ValueError).
+    """
+
+    def __init__(self, data):
+        self.data = data
+        # key: object number; value: (1, offset) or (2, object stream, index)
+        self.xref = dict()
+        self.object_streams = dict()  # key: object number; value: bytes
+        self.root = None
+        self.encrypted = False  # set by count_pages()
+
+    def count_pages(self):
+        """Return the number of pages of the pdf file."""
+        startxref = self.data.rfind(b'startxref',
+                                    max(0, len(self.data) - 4096))
+        if startxref < 0:
+            raise ValueError('startxref not found')
+
+        xref_offset = int(self.data[startxref + 9:startxref + 40].split()[0])
+        self.read_xref_sections(xref_offset)
+
+        if not isinstance(self.root, PdfReference):
+            raise ValueError('document catalog not found')
+
+        pages = self.resolve(self.resolve(self.root)[b'/Pages'])
+        count = int(self.resolve(pages[b'/Count']))
+
+        # /Count may be wrong, and PyPDF2 (and so the rest of the build) goes
+        # by the pages actually in the page tree.
+        if self.count_leaves(pages, set()) != count:
+            raise ValueError('/Count does not match the page tree')
+
+        return count
+
+    def count_leaves(self, node, visited):
+        """Return the number of pages in the page tree *node* (dict) the way
+        PyPDF2 finds them: a node without a /Type is taken as /Pages, and
+        nodes which are neither /Pages nor /Page are skipped. *visited* is
+        the set of the object numbers of the nodes seen so far, which must
+        not be seen again."""
+        node_type = self.resolve(node.get(b'/Type', b'/Pages'))
+
+        if node_type == b'/Page':
+            return 1
+        if node_type != b'/Pages':
+            return 0
+
+        count = 0
+
+        for kid in self.resolve(node[b'/Kids']):
+            if isinstance(kid, PdfReference):
+                if kid.number in visited:
+                    raise ValueError('cycle in the page tree')
+                visited.add(kid.number)
+
+            count += self.count_leaves(self.resolve(kid), visited)
+
+        return count
+
+    def read_xref_sections(self, offset):
+        """Read the cross-reference section at *offset* and all earlier
+        sections it links to (newer entries take precedence)."""
+        visited_offsets = set()
+        offsets = [offset]
+
+        while offsets:
+            offset = offsets.pop(0)
+
+            if offset in visited_offsets:
+                continue
+            visited_offsets.add(offset)
+
+            if self.data[offset:offset + 4] == b'xref':
+                trailer = self.read_xref_table(offset + 4)
+            else:
+                trailer = self.read_xref_stream(offset)
+
+            if self.root is None:
+                self.root = trailer.get(b'/Root')
+
+            if b'/Encrypt' in trailer:
+                self.encrypted = True
+
+            # a hybrid file has an xref stream in addition to the table
+            offsets[:0] = [int(trailer[key]) for key in (b'/XRefStm', b'/Prev')
+                           if key in trailer]
+
+    def read_xref_table(self, offset):
+        """Read a cross-reference table at *offset* (after the "xref"
+        keyword), and return its trailer dictionary."""
+        while True:
+            match = PDF_XREF_SUBSECTION_PATTERN.match(self.data, offset)
+            if match is None:
+                break
+
+            first_number, count = int(match.group(1)), int(match.group(2))
+            offset = match.end()
+
+            for number in range(first_number, first_number + count):
+                entry = PDF_XREF_ENTRY_PATTERN.match(self.data, offset)
+                if entry is None:
+                    raise ValueError('malformed xref table')
+                offset = entry.end()
+
+                if entry.group(3) == b'n':
+                    self.xref.setdefault(number, (1, int(entry.group(1))))
+
+        trailer_offset = self.data.find(b'trailer', offset)
+        if trailer_offset < 0:
+            raise ValueError('trailer not found')
+
+        return self.parse(trailer_offset + 7)[0]
+
+    def read_xref_stream(self, offset):
+        """Read a cross-reference stream at *offset*, and return its
+        dictionary (which serves as the trailer)."""
+        stream_dict, data = self.read_indirect_object(offset)
+        widths = [int(w) for w in stream_dict[b'/W']]
+        index = [int(i) for i in stream_dict.get(
+            b'/Index', [0, stream_dict[b'/Size']])]
+        data = bytearray(data)
+        position = 0
+
+        for first_number, count in zip(index[::2], index[1::2]):
+            for number in range(first_number, first_number + count):
+                fields = list()
+                for width in widths:
+                    value = 0
+                    for byte in data[position:position + width]:
+                        value = (value << 8) + byte
+                    fields.append(value)
+                    position += width
+
+                if widths[0] == 0:
+                    fields[0] = 1  # the default type
+
+                if fields[0] == 1:
+                    self.xref.setdefault(number, (1, fields[1]))
+                elif fields[0] == 2:
+                    self.xref.setdefault(number, (2, fields[1], fields[2]))
+
+        if position > len(data):
+            raise ValueError('truncated xref stream')
+
+        return stream_dict
+
+    def resolve(self, obj):
+        """Return the object referred to by *obj* if it is a reference,
+        or *obj* itself otherwise."""
+        if not isinstance(obj, PdfReference):
+            return obj
+
+        entry = self.xref[obj.number]
+
+        if entry[0] == 1:
+            return self.read_indirect_object(entry[1])[0]
+
+        # the object is in an object stream
+        _, stream_number, index = entry
+
+        if stream_number not in self.object_streams:
+            stream_dict, data = self.resolve_stream(stream_number)
+            self.object_streams[stream_number] = (int(stream_dict[b'/N']),
+                                                  int(stream_dict[b'/First']),
+                                                  data)
+
+        number_of_objects, first, data = self.object_streams[stream_number]
+        header = data[:first].split()
+        if index >= number_of_objects:
+            raise ValueError('object not in object stream')
+
+        object_offset = first + int(header[2 * index + 1])
+        return PdfPageCounter(data).parse(object_offset)[0]
+
+    def resolve_stream(self, number):
+        """Return the dictionary and the decoded data of the stream object
+        *number* (which is not in an object stream)."""
+        entry = self.xref[number]
+        if entry[0] != 1:
+            raise ValueError('stream object in an object stream')
+        return self.read_indirect_object(entry[1])
+
+    def read_indirect_object(self, offset):
+        """Read the indirect object "N G obj ... endobj" at *offset*.
+        Return a tuple (object, stream data), where the stream data is
+        the decoded data if the object is a stream, None otherwise."""
+        match = PDF_OBJECT_HEADER_PATTERN.match(self.data, offset)
+        if match is None:
+            raise ValueError('no object at offset {}'.format(offset))
+
+        obj, position = self.parse(match.end())
+        stream_start = PDF_STREAM_START_PATTERN.match(self.data, position)
+
+        if stream_start is None or not isinstance(obj, dict):
+            return obj, None
+
+        length = self.resolve(obj[b'/Length'])
+        data = self.data[stream_start.end():stream_start.end() + int(length)]
+        return obj, self.decode_stream(obj, data)
+
+    def decode_stream(self, stream_dict, data):
+        """Return the decoded *data* of a stream with *stream_dict*, which
+        may be compressed by FlateDecode (possibly with a PNG predictor)."""
+        filters = self.resolve(stream_dict.get(b'/Filter', []))
+        parameters = self.resolve(stream_dict.get(b'/DecodeParms', {}))
+
+        if not isinstance(filters, list):
+            filters = [filters]
+        if isinstance(parameters, list):
+            parameters = parameters[0] if parameters else {}
+        parameters = parameters or {}
+
+        if filters == [b'/FlateDecode']:
+            data = zlib.decompress(data)
+        elif filters:
+            raise ValueError('unsupported stream filter')
+
+        predictor = int(parameters.get(b'/Predictor', 1))
+
+        if predictor >= 10:
+            columns = int(parameters.get(b'/Columns', 1))
+            data = self.undo_png_predictor(bytearray(data), columns)
+        elif predictor != 1:
+            raise ValueError('unsupported predictor')
+
+        return data
+
+    @staticmethod
+    def undo_png_predictor(data, columns):
+        """Return *data* (bytearray) with the PNG predictors undone, for
+        rows of *columns* bytes (and one byte each for the predictor)."""
+        result = bytearray()
+        previous_row = bytearray(columns)
+
+        for row_start in range(0, len(data), columns + 1):
+            predictor = data[row_start]
+            row = data[row_start + 1:row_start + 1 + columns]
+
+            if predictor == 1:  # Sub
+                for i in range(1, len(row)):
+                    row[i] = (row[i] + row[i - 1]) & 0xff
+            elif predictor == 2:  # Up
+                for i in range(len(row)):
+                    row[i] = (row[i] + previous_row[i]) & 0xff
+            elif predictor != 0:
+                raise ValueError('unsupported PNG predictor')
+
+            result += row
+            previous_row = row
+
+        return bytes(result)
+
+    def parse(self, offset):
+        """Parse the pdf object at *offset*. Return a tuple of the object and
+        the offset right after it. Dictionaries are dicts keyed by names,
+        arrays are lists, names are bytes starting with "/", and strings,
+        which are never needed for counting pages, are all None."""
+        match = PDF_TOKEN_PATTERN.match(self.data, offset)
+        if match is None:
+            raise ValueError('unexpected data at offset {}'.format(offset))
+
+        kind = match.lastgroup
+        token = match.group(kind)
+        offset = match.end()
+
+        if kind == 'dict_start':
+            obj = dict()
+            while True:
+                end = PDF_TOKEN_PATTERN.match(self.data, offset)
+                if end is not None and end.lastgroup == 'dict_end':
+                    return obj, end.end()
+                key, offset = self.parse(offset)
+                obj[key], offset = self.parse(offset)
+        elif kind == 'array_start':
+            obj = list()
+            while True:
+                end = PDF_TOKEN_PATTERN.match(self.data, offset)
+                if end is not None and end.lastgroup == 'array_end':
+                    return obj, end.end()
+                item, offset = self.parse(offset)
+                obj.append(item)
+        elif kind == 'name':
+            return bytes(token), offset
+        elif kind == 'hex_string':
+            return None, offset
+        elif kind == 'string':
+            depth = 1
+            while depth:
+                match = PDF_STRING_PATTERN.search(self.data, offset)
+                if match is None:
+                    raise ValueError('unterminated string')
+                offset = match.end()
+                if match.group() == b'(':
+                    depth += 1
+                elif match.group() == b')':
+                    depth -= 1
+            return None, offset
+        elif kind == 'keyword' and PDF_INTEGER_PATTERN.match(token):
+            # an integer, or the object number of a reference "N G R"
+            generation = PDF_TOKEN_PATTERN.match(self.data, offset)
+            if generation is not None and generation.lastgroup == 'keyword' \
+                    and PDF_INTEGER_PATTERN.match(generation.group('keyword')):
+                r = PDF_TOKEN_PATTERN.match(self.data, generation.end())
+                if r is not None and r.group('keyword') == b'R':
+                    return PdfReference(int(token),
+                                        int(generation.group('keyword'))), \
+                        r.end()
+            return int(token), offset
+        elif kind == 'keyword':
+            keywords = {b'true': True, b'false': False, b'null': None}
+            if token in keywords:
+                return keywords[token], offset
+            try:
+                return float(token), offset
+            except ValueError:
+                raise ValueError('unexpected keyword {!r}'.format(token))
+        else:
+            raise ValueError('unexpected {} at offset {}'.format(kind, offset))
+
+
+def count_pdf_pages(path):
+    """Return the number of pages of the pdf file *path* using a
+    PdfPageCounter on the memory-mapped file, or None if the file is
+    malformed in any way that PdfPageCounter cannot handle."""
+    return read_pdf_page_count(path)[0]
+
+
+def read_pdf_page_count(path):
+    """Return a tuple of the number of pages of the pdf file *path* and
+    whether it is encrypted, using a PdfPageCounter on the memory-mapped
+    file, or (None, None) if the file is malformed in any way that
+    PdfPageCounter cannot handle."""
+    try:
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                counter = PdfPageCounter(data)
+                return counter.count_pages(), counter.encrypted
+            finally:
+                data.close()
+    except Exception:
+        return None, None
+
+
+# --------------------------------------------------------------------------- #
+# rendering the paper headers natively, without pdflatex
+
+# Character widths of the Times-Roman font (in units of 1/1000 of the font
+# size, from the Adobe font metrics) by WinAnsiEncoding (cp1252) code
+TIMES_ROMAN_WIDTHS = dict(zip(range(32, 127), (
+    250, 333, 408, 500, 500, 833, 778, 180, 333, 333, 500, 564, 250, 333,
+    250, 278, 500, 500, 500, 500, 500, 500, 500, 500, 500, 500, 278, 278,
+    564, 564, 564, 444, 921, 722, 667, 667, 722, 611, 556, 722, 722, 333,
+    389, 722, 611, 889, 722, 722, 556, 722, 667, 556, 611, 722, 722, 944,
+    722, 722, 611, 333, 278, 333, 469, 500, 333, 444, 500, 444, 500, 444,
+    333, 500, 500, 278, 278, 500, 278, 778, 500, 500, 500, 500, 333, 389,
+    278, 500, 500, 722, 500, 500, 444, 480, 200, 480, 541)))
+TIMES_ROMAN_WIDTHS.update(zip(range(160, 256), (
+    250, 333, 500, 500, 500, 500, 200, 500, 333, 760, 276, 500, 564, 333,
+    760, 333, 400, 564, 300, 300, 333, 500, 453, 250, 333, 300, 310, 500,
+    750, 750, 750, 444, 722, 722, 722, 722, 722, 722, 889, 667, 611, 611,
+    611, 611, 333, 333, 333, 333, 722, 722, 722, 722, 722, 722, 722, 564,
+    722, 722, 722, 722, 722, 722, 556, 500, 444, 444, 444, 444, 444, 444,
+    667, 444, 444, 444, 444, 444, 278, 278, 278, 278, 500, 500, 500, 500,
+    500, 500, 500, 564, 500, 500, 500, 500, 500, 500, 500, 500)))
+TIMES_ROMAN_WIDTHS.update({0x80: 500, 0x82: 333, 0x83: 500, 0x84: 444,
+                           0x85: 1000, 0x86: 500, 0x87: 500, 0x88: 333,
+                           0x89: 1000, 0x8A: 556, 0x8B: 333, 0x8C: 889,
+                           0x8E: 611, 0x91: 333, 0x92: 333, 0x93: 444,
+                           0x94: 444, 0x95: 350, 0x96: 500, 0x97: 1000,
+                           0x98: 333, 0x99: 980, 0x9A: 389, 0x9B: 333,
+                           0x9C: 722, 0x9E: 444, 0x9F: 722})
+
+# The Type 1 font file of Times which pdflatex embeds for \usepackage{times}
+# (URW Nimbus Roman), looked up with kpsewhich. Its metrics are those of
+# Times-Roman. Font descriptor values are from the Times-Roman font metrics.
+HEADER_FONT_FILENAME = 'utmr8a.pfb'
+HEADER_FONT_DESCRIPTOR = {'/Flags': 34, '/Ascent': 683, '/Descent': -217,
+                          '/CapHeight': 662, '/StemV': 84}
+
+# Page geometry of templates/headers.tex (letter paper, 1.5in left/right and
+# 1.25in top margins, 12pt article, fancyhdr), in PDF points.
+# TeX points are 1/72.27 inch, PDF points are 1/72 inch.
+TEX_PT = 72 / 72.27
+HEADERS_PAGE_SIZE = (612, 792)
+HEADERS_LEFT_X = 108
+HEADERS_RIGHT_X = 504
+HEADERS_CENTER_X = 306
+# the header baseline is \headsep (25pt) above the top of the text body
+HEADERS_BASELINE_Y = 792 - 90 + 25 * TEX_PT
+NORMAL_SIZE = 12 * TEX_PT
+FOOTNOTE_SIZE = 10 * TEX_PT
+FOOTNOTE_BASELINE_SKIP = 12 * TEX_PT
+
+# The native header engine only handles headers.tex templates which lay out
+# the headers like the default template does.
+NATIVE_HEADERS_TEMPLATE_LINES = (
+    '\\documentclass[twoside, 12pt]{article}',
+    '\\usepackage[letterpaper, left=1.5in,top=1.25in,right=1.5in,'
+    'bottom=1.25in]{geometry}',
+    '\\usepackage{times}',
+    '\\setcounter{page}{XXStartPageXX}',
+    '\\fancyhead[LE]{\\footnotesize \\thepage}',
+    '\\fancyhead[RO]{\\footnotesize \\thepage}',
+    '\\fancyhead[CE]{\\footnotesize XXAuthorsXX}',
+    '\\fancyhead[CO]{\\footnotesize XXTitleXX}',
+    '\\fancyhead[RO]{\\thepage}',
+    '\\thispagestyle{firststyle}',
+)
+
+LATEX_ACCENT_PATTERN = re.compile(r'\\([`\'^"~=.])\{?([A-Za-z])\}?')
+LATEX_ACCENTS = {'`': u'\u0300', "'": u'\u0301', '^': u'\u0302',
+                 '~': u'\u0303', '=': u'\u0304', '.': u'\u0307',
+                 '"': u'\u0308'}
+# the order matters, e.g., "---" before "--"
+LATEX_SYMBOLS = (('\\copyright', u'\u00a9'), ('\\&', '&'), ('---', u'\u2014'),
+                 ('--', u'\u2013'), ('``', u'\u201c'), ("''", u'\u201d'),
+                 ('`', u'\u2018'), ("'", u'\u2019'), ('"', u'\u201d'),
+                 ('~', u'\u00a0'))
+
+
+def latex_to_text(latex_str):
+    """Return the text typeset by pdflatex for *latex_str*, or None if
+    *latex_str* has LaTeX markup other than accents and a few symbols."""
+    text = LATEX_ACCENT_PATTERN.sub(
+        lambda m: unicodedata.normalize(
+            'NFC', m.group(2) + LATEX_ACCENTS[m.group(1)]),
+        latex_str)
+
+    for latex_symbol, char in LATEX_SYMBOLS:
+        text = text.replace(latex_symbol, char)
+
+    text = text.replace('{', '').replace('}', '')  # braces only group things
+
+    if any(char in text for char in '\\$%#_^'):
+        return None
+
+    return ' '.join(text.split())
+
+
+def parse_headers_template(template_str):
+    """Return the lines of the "Proceedings of CLS ..." header on the first
+    page of a paper (with the placeholder XXPageRangeXX) in the headers
+    template *template_str*, or None if the template is not laid out like the
+    default one and therefore needs pdflatex."""
+    if not all(line in template_str for line in NATIVE_HEADERS_TEMPLATE_LINES):
+        return None
+
+    command = '\\fancyhead[L]{'
+    start = template_str.find(command)
+
+    if start < 0 or template_str.find(command, start + 1) >= 0:
+        return None
+
+    # find the closing brace of the argument of \fancyhead[L]
+    depth = 1
+    for end in range(start + len(command), len(template_str)):
+        if template_str[end] == '{':
+            depth += 1
+        elif template_str[end] == '}':
+            depth -= 1
+            if depth == 0:
+                break
+    else:
+        return None
+
+    argument = template_str[start + len(command): end]
+    argument = argument.replace('\\footnotesize', '')
+    return [line.strip() for line in argument.split('\\\\')]
+
+
+class HeaderFont(object):
+    """The Type 1 font program (a .pfb file, *path*) embedded in the headers
+    rendered natively (cf. render_headers()). Raise RuntimeError if the file
+    is not a Type 1 font in the PFB format."""
+
+    def __init__(self, path):
+        self.path = path
+        # the cleartext part, the binary (encrypted) part and the trailer
+        segments = [b'', b'', b'']
+
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        position = 0
+
+        while position + 2 <= len(data):
+            marker, segment_type = bytearray(data[position:position + 2])
+
+            if marker != 0x80 or segment_type not in (1, 2, 3):
+                raise RuntimeError('{} is not a Type 1 font file in the PFB '
+                                   'format.'.format(path))
+            elif segment_type == 3:  # end of file
+                break
+
+            length = sum(byte << (8 * k) for k, byte in enumerate(
+                bytearray(data[position + 2:position + 6])))
+            segment = data[position + 6:position + 6 + length]
+            position += 6 + length
+
+            if segment_type == 2:
+                segments[1] += segment
+            else:
+                segments[0 if not segments[1] else 2] += segment
+
+        match = re.search(br'/FontName\s*/(\S+)', segments[0])
+        bbox = re.search(br'/FontBBox\s*[{\[]([^}\]]*)[}\]]', segments[0])
+
+        if not segments[1] or match is None or bbox is None:
+            raise RuntimeError('{} is not a Type 1 font file in the PFB '
+                               'format.'.format(path))
+
+        self.name = match.group(1).decode('ascii')
+        self.bbox = [int(float(value)) for value in bbox.group(1).split()]
+        self.segments = segments
+        self.digest = hashlib.sha256(data).hexdigest()
+
+    def add_to(self, pdf):
+        """Add the font, with its font program, to *pdf* (a PdfFileWriter),
+        and return the reference to it."""
+        font_file = DecodedStreamObject()
+        font_file._data = b''.join(self.segments)
+        font_file.update(dict(
+            (NameObject('/Length{}'.format(k + 1)),
+             NumberObject(len(segment)))
+            for k, segment in enumerate(self.segments)))
+
+        descriptor = DictionaryObject({
+            NameObject('/Type'): NameObject('/FontDescriptor'),
+            NameObject('/FontName'): NameObject('/' + self.name),
+            NameObject('/FontBBox'): ArrayObject(
+                NumberObject(value) for value in self.bbox),
+            NameObject('/ItalicAngle'): NumberObject(0),
+            NameObject('/FontFile'): pdf._addObject(font_file),
+        })
+        descriptor.update(dict((NameObject(key), NumberObject(value))
+                               for key, value in
+                               HEADER_FONT_DESCRIPTOR.items()))
+
+        return pdf._addObject(DictionaryObject({
+            NameObject('/Type'): NameObject('/Font'),
+            NameObject('/Subtype'): NameObject('/Type1'),
+            NameObject('/BaseFont'): NameObject('/' + self.name),
+            NameObject('/Encoding'): NameObject('/WinAnsiEncoding'),
+            NameObject('/FirstChar'): NumberObject(32),
+            NameObject('/LastChar'): NumberObject(255),
+            NameObject('/Widths'): ArrayObject(
+                NumberObject(TIMES_ROMAN_WIDTHS.get(char, 0))
+                for char in range(32, 256)),
+            NameObject('/FontDescriptor'): pdf._addObject(descriptor),
+        }))
+
+
+def find_header_font(path=None):
+    """Return the HeaderFont of the font file *path*, or, by default, of
+    HEADER_FONT_FILENAME as found by kpsewhich (None if it is not found)."""
+    if path is None:
+        try:
+            path = subprocess.check_output(
+                ('kpsewhich', HEADER_FONT_FILENAME)).decode('utf-8').strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+        if not path:
+            return None
+
+    if not os.path.isfile(path):
+        raise RuntimeError('The header font file {} does not exist.'
+                           .format(path))
+
+    return HeaderFont(path)
+
+
+def pdf_text(text, size, x, y, align='left'):
+    """Return the PDF content stream operators which show *text* in the
+    header font of *size* at baseline *y*, left-aligned at, centered at or
+    right-aligned at *x* (for *align* 'left', 'center', 'right').
+    Raise UnicodeError if *text* cannot be shown with the header font."""
+    encoded = text.encode('cp1252')
+    width = sum(TIMES_ROMAN_WIDTHS.get(char, 500)
+                for char in bytearray(encoded)) * size / 1000
+    if align == 'center':
+        x -= width / 2
+    elif align == 'right':
+        x -= width
+
+    encoded = encoded.replace(b'\\', b'\\\\')
+    encoded = encoded.replace(b'(', b'\\(').replace(b')', b'\\)')
+    return (('BT /CLSHeaderFont {:.3f} Tf {:.3f} {:.3f} Td ('
+             .format(size, x, y)).encode('ascii') + encoded + b') Tj ET\n')
+
+
+def render_headers(output_pdf_path, first_page_lines, authors_in_header,
+                   paper_title_in_header, start_page, number_of_pages,
+                   header_font):
+    """Write the headers pdf of a paper to *output_pdf_path*, with the same
+    layout as what pdflatex produces with the default templates/headers.tex.
+
+    *first_page_lines* (list of str) is the "Proceedings of CLS ..." header
+    on the first page. *header_font* (a HeaderFont) is embedded. The other
+    arguments are as in the headers template.
+    Return False (and write nothing) if any of the header text cannot be
+    rendered natively, True otherwise.
+    """
+    first_page_lines = [latex_to_text(line) for line in first_page_lines]
+    authors_in_header = latex_to_text(authors_in_header)
+    paper_title_in_header = latex_to_text(paper_title_in_header)
+
+    if None in first_page_lines + [authors_in_header, paper_title_in_header]:
+        return False
+
+    contents = list()
+
+    try:
+        for page_number in range(start_page, start_page + number_of_pages):
+            odd_page = page_number % 2
+            ops = list()
+
+            if page_number == start_page:
+                # \thispagestyle{firststyle}
+                for k, line in enumerate(reversed(first_page_lines)):
+                    ops.append(pdf_text(
+                        line, FOOTNOTE_SIZE, HEADERS_LEFT_X,
+                        HEADERS_BASELINE_Y + k * FOOTNOTE_BASELINE_SKIP))
+                if odd_page:
+                    ops.append(pdf_text(str(page_number), NORMAL_SIZE,
+                                        HEADERS_RIGHT_X, HEADERS_BASELINE_Y,
+                                        align='right'))
+            elif odd_page:
+                ops.append(pdf_text(paper_title_in_header, FOOTNOTE_SIZE,
+                                    HEADERS_CENTER_X, HEADERS_BASELINE_Y,
+                                    align='center'))
+                ops.append(pdf_text(str(page_number), FOOTNOTE_SIZE,
+                                    HEADERS_RIGHT_X, HEADERS_BASELINE_Y,
+                                    align='right'))
+            else:
+                ops.append(pdf_text(str(page_number), FOOTNOTE_SIZE,
+                                    HEADERS_LEFT_X, HEADERS_BASELINE_Y))
+                ops.append(pdf_text(authors_in_header, FOOTNOTE_SIZE,
+                                    HEADERS_CENTER_X, HEADERS_BASELINE_Y,
+                                    align='center'))
+
+            contents.append(b''.join(ops))
+    except UnicodeError:
+        return False
+
+    headers_pdf = PdfFileWriter()
+
+    # one embedded font resource shared by all pages
+    resources = headers_pdf._addObject(DictionaryObject({
+        NameObject('/Font'): DictionaryObject({
+            NameObject('/CLSHeaderFont'): header_font.add_to(headers_pdf)}),
+    }))
+
+    for content in contents:
+        page = headers_pdf.addBlankPage(*HEADERS_PAGE_SIZE)
+        content_stream = DecodedStreamObject()
+        content_stream.setData(content)
+        page[NameObject('/Contents')] = headers_pdf._addObject(content_stream)
+        page[NameObject('/Resources')] = resources
+
+    with open(output_pdf_path, 'wb') as f:
+        headers_pdf.write(f)
+
+    return True
+
+
+# --------------------------------------------------------------------------- #
+# preflight: all the input pdf files are checked before the build, so that all
+# the problems with them are found at once
+
+LETTER_PAGE_SIZE = (612, 792)  # 8.5" x 11", in pt
+
+
+def unembedded_fonts(resources, font_names, seen=None):
+    """Add to *font_names* (set) the names of the fonts in *resources* (a
+    resources dictionary of a page or a form XObject, or None), and in the
+    form XObjects in it, which are not embedded."""
+    if resources is None:
+        return
+
+    if seen is None:
+        seen = set()  # numbers of the form XObjects already looked at
+
+    resources = resources.getObject()
+    fonts = resources.get('/Font')
+
+    for name, font in (fonts.getObject().items() if fonts else []):
+        font = font.getObject()
+
+        if font.get('/Subtype') == '/Type3':
+            continue  # Type 3 fonts are made of pdf operators
+        elif font.get('/Subtype') == '/Type0':
+            descriptor = font['/DescendantFonts'][0].getObject().get(
+                '/FontDescriptor')
+        else:
+            descriptor = font.get('/FontDescriptor')
+
+        descriptor = descriptor.getObject() if descriptor else {}
+
+        if not any(key in descriptor
+                   for key in ('/FontFile', '/FontFile2', '/FontFile3')):
+            font_names.add(font.get('/BaseFont', name).lstrip('/'))
+
+    xobjects = resources.get('/XObject')
+
+    for xobject in (xobjects.getObject().values() if xobjects else []):
+        if isinstance(xobject, IndirectObject):
+            if xobject.idnum in seen:
+                continue
+            seen.add(xobject.idnum)
+
+        xobject = xobject.getObject()
+
+        if xobject.get('/Subtype') == '/Form':
+            unembedded_fonts(xobject.get('/Resources'), font_names, seen)
+
+
+def preflight_pdf(task):
+    """Check a pdf file. This is a task for a worker process. *task* is a
+    tuple of the path of the pdf file and *quick*.
+
+    The file is parsed in full and its pages are checked one by one, and
+    the number of pages found must be the same as in the cross-reference
+    data (cf. PdfPageCounter), which pagination goes by. If *quick* (bool)
+    is true, only the cross-reference data is read, unless it cannot be.
+
+    Return a dict (for JSON) with "pages", the number of pages (None if the
+    file cannot be read); "errors", the problems which would stop a build
+    (list of str: the file cannot be read, is encrypted, has no pages, or
+    its number of pages is wrong in the cross-reference data); and
+    "warnings", the other problems (list of str: cross-reference data which
+    cannot be read quickly, and if the file is parsed in full, pages not
+    8.5" x 11", rotated pages, fonts not embedded).
+    """
+    path, quick = task
+    result = {'pages': None, 'errors': list(), 'warnings': list()}
+    xref_page_count, encrypted = read_pdf_page_count(path)
+
+    if xref_page_count is not None and quick:
+        if encrypted:
+            result['errors'].append('The file is encrypted.')
+            return result
+
+        result['pages'] = xref_page_count
+
+        if xref_page_count == 0:
+            result['errors'].append('The file has no pages.')
+
+        return result
+
+    try:
+        with open(path, 'rb') as f:
+            pdf = PdfFileReader(f)
+
+            if pdf.isEncrypted:
+                result['errors'].append('The file is encrypted.')
+                return result
+
+            number_of_pages = pdf.getNumPages()
+            other_sizes = list()  # list of (page number, width, height)
+            rotated_pages = list()
+            font_names = set()
+
+            for j in range(number_of_pages):
+                page = pdf.getPage(j)
+                width = float(page.mediaBox.getWidth())
+                height = float(page.mediaBox.getHeight())
+
+                if (abs(width - LETTER_PAGE_SIZE[0]) > 1 or
+                        abs(height - LETTER_PAGE_SIZE[1]) > 1):
+                    other_sizes.append((j + 1, width, height))
+
+                if page.get('/Rotate', 0) % 360:
+                    rotated_pages.append(j + 1)
+
+                unembedded_fonts(page.get('/Resources'), font_names)
+    except Exception as e:
+        result['errors'].append('The file cannot be read -- {}: {}'
+                                .format(type(e).__name__, e))
+        return result
+
+    result['pages'] = number_of_pages
+
+    if number_of_pages == 0:
+        result['errors'].append('The file has no pages.')
+
+    if xref_page_count is None:
+        result['warnings'].append('The cross-reference data cannot be read '
+                                  'without parsing the whole file, which '
+                                  'is slow (the file may be damaged).')
+    elif xref_page_count != number_of_pages:
+        result['errors'].append(
+            'The cross-reference data gives {} pages, but {} pages are found '
+            'when the file is parsed in full. The file is damaged; save it '
+            'again (e.g., print it to a new pdf file).'
+            .format(xref_page_count, number_of_pages))
+
+    if other_sizes:
+        page_number, width, height = other_sizes[0]
+        result['warnings'].append(
+            '{} of {} pages are not 8.5" x 11" (e.g., page {} is '
+            '{:.0f} x {:.0f} pt), and may be cut off in the 6" x 9" output.'
+            .format(len(other_sizes), number_of_pages, page_number, width,
+                    height))
+
+    if rotated_pages:
+        result['warnings'].append('Rotated pages: {}'.format(
+            ', '.join(str(page_number) for page_number in rotated_pages)))
+
+    if font_names:
+        result['warnings'].append('Fonts not embedded: {}'.format(
+            ', '.join(sorted(font_names))))
+
+    return result
+
+
+# --------------------------------------------------------------------------- #
+# information about this tool
+
+__author__ = 'Jackson Lee'
+__author_email__ = 'jacksonlunlee@gmail.com'
+__url__ = 'https://github.com/jacksonllee/cls-proceedings'
+
+__longdescr__ = """\
+Compiling the proceedings of the Chicago Linguistic Society\n
+Download, documentation etc: <{}>\n
+Author: {} <{}>""".format(__url__, __author__, __author_email__)
+
+# --------------------------------------------------------------------------- #
+# the settings of a build
+
+
+class Config(object):
+    """The settings of a build of the proceedings.
+
+    The settings have the same names and defaults as the command line options
+    of cls-compile.py (see argument_parser()), e.g.,
+    Config(directory='cls52', jobs=4) is "--directory cls52 --jobs 4".
+    """
+
+    directory = 'example'
+    frontmatter = 'front-matter'
+    acknowledgments = 'acknowledgments'
+    papers = 'papers-without-headers'
+    templates = 'templates'
+    toc = 'table-of-contents'
+    headers = 'headers'
+    papersfinal = 'papers-with-headers'
+    organizer = 'organizer.csv'
+    maxheaderlength = 55
+    output = 'proceedings.pdf'
+    output6by9 = 'proceedings6by9.pdf'
+    scale = 0.95
+    skipletter = False
+    skip6by9 = False
+    startpagenumber = 1
+    jobs = 1
+    timeout = 300
+    batchheaders = False
+    headerengine = 'latex'
+    headerfont = None
+    maxopenfiles = 64
+    reusepages = False
+    streaming = False
+    dedup = False
+    compress = False
+    linearize = False
+    wrapcontent = False
+    stats = None
+    slowest = 0
+    noformat = False
+    watch = False
+    debounce = 2.0
+    cache = 'cache'
+    nocache = False
+    nopreflight = False
+    quickpreflight = False
+    batch = None
+    plan = None
+    pipeline = False
+    index = 'proceedings-index.json'
+    extract = None
+    extractpages = None
+    withfrontmatter = False
+    extractdir = 'extracted'
+
+    def __init__(self, **settings):
+        for name, value in settings.items():
+            if (name.startswith('_') or not hasattr(Config, name) or
+                    callable(getattr(Config, name))):
+                raise TypeError('Unknown setting: {}'.format(name))
+
+            setattr(self, name, value)
+
+    def settings(self):
+        """Return a dict of all the settings."""
+        return dict((name, getattr(self, name)) for name in dir(Config)
+                    if not name.startswith('_') and
+                    not callable(getattr(Config, name)))
+
+    def validate(self):
+        """Raise RuntimeError if the settings cannot be used."""
+        working_dir = os.path.abspath(self.directory)
+
+        if not os.path.isdir(working_dir):
+            raise RuntimeError('The directory {} does not exist.'
+                               .format(working_dir))
+
+        if self.skipletter and self.skip6by9:
+            raise RuntimeError('With both --skipletter and --skip6by9, there '
+                               'would be no proceedings pdf output at all.')
+
+        if self.streaming and self.reusepages:
+            raise RuntimeError('--reusepages keeps all papers in memory, '
+                               'which defeats --streaming. Use only one of '
+                               'them.')
+
+        if self.reusepages and self.jobs > 1:
+            raise RuntimeError('--reusepages keeps the papers with headers '
+                               'made in this process, but with --jobs above '
+                               '1 they are made by worker processes. Use '
+                               'only one of them.')
+
+        if self.nopreflight and self.quickpreflight:
+            raise RuntimeError('--quickpreflight makes some of the checks of '
+                               'the input pdf files which --nopreflight '
+                               'skips. Use only one of them.')
+
+        if self.linearize and qpdf_version() is None:
+            raise RuntimeError('--linearize needs qpdf, which cannot be run. '
+                               'Please install qpdf, or leave out '
+                               '--linearize.')
+
+        if self.plan and (self.watch or self.batch):
+            raise RuntimeError('--plan cannot be used with --watch or '
+                               '--batch.')
+
+        if (self.extract or self.extractpages) and (self.plan or self.watch or
+                                                    self.batch):
+            raise RuntimeError('--extract and --extractpages cannot be used '
+                               'with --plan, --watch or --batch.')
+
+        if self.watch and self.nocache:
+            raise RuntimeError('--watch relies on the build cache to rebuild '
+                               'only what has changed, and cannot be used '
+                               'with --nocache.')
+
+
+# --------------------------------------------------------------------------- #
+# the inputs of a volume
+
+
+class Volume(object):
+    """The inputs of a proceedings volume in the working directory of
+    *config* (a Config): the papers listed in the organizer CSV file, with
+    their authors, titles and headers, and the front matter, acknowledgments
+    and templates. Missing or invalid inputs raise RuntimeError, except that
+    headers which are too long are only listed in header_problems (list of
+    str) if *strict* is False. Progress is logged to *logger*.
+    """
+
+    def __init__(self, config, logger=MASTER_LOGGER, strict=True):
+        self.working_dir = os.path.abspath(config.directory)
+        self.read_organizer(config, logger)
+        self.check_headers(config, logger, strict)
+        self.find_files(config, logger)
+
+    def read_organizer(self, config, logger):
+        logger.info('Reading the organizer CSV file')
+
+        self.organizer_path = os.path.join(self.working_dir, config.organizer)
+
+        if not os.path.isfile(self.organizer_path):
+            raise RuntimeError('The organizer "{}" is not found.'
+                               .format(self.organizer_path))
+
+        organizer = read_csv(self.organizer_path)
+        self.number_of_papers = len(organizer) - 1
+
+        organizer_headers = [x.lower().strip() for x in organizer[0]]
+        expected_organizer_headers = ['index', 'authors', 'paper title',
+                                      'authors in header',
+                                      'paper title in header',
+                                      'paper filename']
+
+        header_to_index = dict()
+        # key: a header in the organizer CSV (e.g., 'index', 'author')
+        # value: the index of that header in the list
+        # expected_organizer_headers
+
+        for expected_header in expected_organizer_headers:
+            try:
+                header_to_index[expected_header] = \
+                    organizer_headers.index(expected_header)
+            except ValueError:
+                raise RuntimeError("The header {} is not found in the "
+                                   "organizer CSV file."
+                                   .format(expected_header))
+
+        def column(header):
+            return [row[header_to_index[header]] for row in organizer[1:]]
+
+        self.authors_list = column('authors')
+        self.paper_title_list = column('paper title')
+        self.authors_in_header_list = column('authors in header')
+        self.paper_title_in_header_list = column('paper title in header')
+        self.paper_filename_list = column('paper filename')
+
+        self.papers_abs_dir = os.path.join(self.working_dir, config.papers)
+        self.paper_path_list = [os.path.join(self.papers_abs_dir, filename)
+                                for filename in self.paper_filename_list]
+
+        logger.info('The organizer is: {}'.format(self.organizer_path))
+
+    def check_headers(self, config, logger, strict=True):
+        logger.info('Checking if any author or paper tile headers are too '
+                    'long')
+
+        for i in range(self.number_of_papers):
+            # if no header specified, use the full author/title name
+            if not self.authors_in_header_list[i]:
+                self.authors_in_header_list[i] = self.authors_list[i]
+            if not self.paper_title_in_header_list[i]:
+                self.paper_title_in_header_list[i] = self.paper_title_list[i]
+
+            logger.info(self.authors_in_header_list[i])
+            logger.info(self.paper_title_in_header_list[i])
+
+        # the maximum header length can be set at command line arguments
+        self.header_problems = list()
+
+        for i in range(self.number_of_papers):
+            for header in (self.authors_in_header_list[i],
+                           self.paper_title_in_header_list[i]):
+                if len(header) > config.maxheaderlength:
+                    self.header_problems.append(
+                        'The header "{}" for paper {} is longer than {} '
+                        'characters.'.format(header, i + 1,
+                                             config.maxheaderlength))
+
+        if strict and self.header_problems:
+            raise RuntimeError(self.header_problems[0])
+
+    def find_files(self, config, logger):
+        # For front matter and acknowledgments, I intentionally use lists
+        # here (front_matter_filenames and acknowledgments_filenames) to allow
+        # the possibility that more than one PDFs---as opposed to just exactly
+        # one---may be allowed for whatever reason. In that case, care should
+        # be taken for where the blank pages should be inserted (cf.
+        # Build.assemble()).
+
+        logger.info('Checking if the front matter file is present')
+
+        self.front_matter_abs_dir = os.path.join(self.working_dir,
+                                                 config.frontmatter)
+        self.front_matter_filenames = self.find_one_pdf(
+            self.front_matter_abs_dir, 'front matter')
+
+        logger.info('Checking if acknowledgments pdf is present')
+
+        self.acknowledgments_abs_dir = os.path.join(self.working_dir,
+                                                    config.acknowledgments)
+        self.acknowledgments_filenames = self.find_one_pdf(
+            self.acknowledgments_abs_dir, 'acknowledgments')
+
+        logger.info('Checking if templates files are present')
+
+        self.templates_abs_dir = os.path.join(self.working_dir,
+                                              config.templates)
+
+        if not os.path.isdir(self.templates_abs_dir):
+            raise RuntimeError('The templates directory {} does not exist.'
+                               .format(self.templates_abs_dir))
+
+        self.headers_template_path = os.path.join(self.templates_abs_dir,
+                                                  'headers.tex')
+        self.blank_page_path = os.path.join(self.templates_abs_dir,
+                                            'blank.pdf')
+        self.toc_template_path = os.path.join(self.templates_abs_dir,
+                                              'table-of-contents.tex')
+
+        for path in (self.headers_template_path, self.blank_page_path,
+                     self.toc_template_path):
+            if not os.path.isfile(path):
+                raise RuntimeError('Expected template file not found -- {}'
+                                   .format(path))
+
+    @staticmethod
+    def find_one_pdf(abs_dir, category):
+        """Return the list of the one pdf filename in *abs_dir*, which has
+        the pdf of *category* (e.g., "front matter")."""
+        if not os.path.isdir(abs_dir):
+            raise RuntimeError('The {} directory {} does not exist.'
+                               .format(category, abs_dir))
+
+        filenames = sorted([x for x in os.listdir(abs_dir)
+                            if x.lower().endswith('.pdf')])
+
+        if len(filenames) == 0:
+            raise RuntimeError('No {} pdf is found at {}'
+                               .format(category, abs_dir))
+
+        if len(filenames) > 1:
+            raise RuntimeError('More than 1 pdf file is found at {}\n'
+                               '(Only 1 pdf is allowed.)'.format(abs_dir))
+
+        return filenames
+
+
+# --------------------------------------------------------------------------- #
+# building the proceedings
+
+
+class Build(object):
+    """A build of the proceedings of the volume in the working directory of
+    *config* (a Config).
+
+    run() runs all the stages of the build. They can also be called one by
+    one, in this order:
+
+        build = Build(Config(directory='cls52'))
+        build.open_logs()
+        build.read_volume()  # build.volume: the inputs (a Volume)
+        build.paginate()  # build.page_range_list, etc
+        build.make_headers()
+        build.stamp_papers()
+        build.make_toc()
+        build.assemble()  # build.output_paths
+        build.finish()
+        build.close()
+
+    The results of each stage are kept as attributes, for the later stages.
+    The log files (master.log, etc) are written to *log_dir* (by default, the
+    current directory).
+
+    A program which runs many builds can keep some things warm between
+    builds: *pdf_readers* (a PdfReaderRegistry) for the pdf files, and *pool*
+    (cf. process_pool()) for stamping the papers in parallel. Otherwise, each
+    build has its own.
+    """
+
+    def __init__(self, config, log_dir=None, pdf_readers=None, pool=None):
+        config.validate()
+
+        self.config = config
+        self.working_dir = os.path.abspath(config.directory)
+        self.log_dir = os.path.abspath(log_dir or os.getcwd())
+        self.use_cache = not config.nocache
+        self.build_cache = BuildCache(os.path.join(self.working_dir,
+                                                   config.cache),
+                                      enabled=self.use_cache)
+        self.build_stats = BuildStats()
+
+        # all pdf files are opened and parsed through this registry
+        self.own_pdf_readers = pdf_readers is None
+        self.pdf_readers = pdf_readers or PdfReaderRegistry(
+            config.maxopenfiles)
+        self.pool = pool
+
+        # A logger of this build only, which is not registered with the
+        # logging module (and so goes away with the build).
+        self.logger = logging.Logger(MASTER_LOGGER.name)
+        self.logger.setLevel(logging.INFO)
+        self.pdflatex_log = None
+        self.directory_log = None
+
+        self.volume = None
+        self.formats_abs_dir = None
+        # key: pdf file path; value: number of pages found by preflight()
+        self.preflight_page_counts = dict()
+
+        # With --pipeline, the stages overlap (cf. run_pipeline()). Things
+        # shared by the tasks are guarded by these locks: *lock* for the log
+        # files and the precompiled formats, and *pdf_lock* for the pdf
+        # readers and the final proceedings pdf output(s).
+        self.pipelined = False
+        self.lock = threading.RLock()
+        self.pdf_lock = threading.Lock()
+        self.output_paths = list()
+        self.output_filenames = list()
+
+    def run(self):
+        """Run all the stages of the build, and return the list of paths of
+        the final proceedings pdf output(s)."""
+        try:
+            self.open_logs()
+            self.read_volume()
+
+            if not self.config.nopreflight:
+                self.preflight()
+
+            if self.config.pipeline:
+                self.run_pipeline()
+            else:
+                self.paginate()
+                self.make_headers()
+                self.stamp_papers()
+                self.make_toc()
+                self.assemble()
+
+            self.finish()
+        finally:
+            self.close()
+
+        return self.output_paths
+
+    # ----------------------------------------------------------------------- #
+
+    def open_logs(self):
+        """Open the log files, and log basic info/metadata."""
+        self.logger.addHandler(master_log_handler(self.log_dir))
+
+        self.logger.info('Defining log filenames and file objects')
+
+        self.pdflatex_log = open(os.path.join(self.log_dir,
+                                              PDFLATEX_LOG_NAME), 'w')
+        self.directory_log = open(os.path.join(self.log_dir,
+                                               DIRECTORY_LOG_NAME), 'w')
+
+        self.logger.info('Logging directory contents before PDF '
+                         'manipulation')
+
+        self.print_directory_log('Before any PDF manipulation:')
+
+        self.logger.info('System: {}'.format(platform.system()))
+        self.logger.info('Node: {}'.format(platform.node()))
+        self.logger.info('Release: {}'.format(platform.release()))
+        self.logger.info('Version: {}'.format(platform.version()))
+        self.logger.info('Machine: {}'.format(platform.machine()))
+        self.logger.info('Processor: {}'.format(platform.processor()))
+        self.logger.info('Python version: {}'
+                         .format(platform.python_version()))
+        self.logger.info('sys.argv: {}'.format(sys.argv))
+        self.logger.info('Settings: {}'.format(self.config.settings()))
+        self.logger.info('Your working directory: {}'
+                         .format(self.working_dir))
+
+    def start_stage(self, name):
+        """Start the stage *name* of the build stats (cf. BuildStats), or end
+        the current stage if *name* is None. With --pipeline, the stages
+        overlap, and the build stats have the tasks instead."""
+        if self.pipelined:
+            return
+        elif name is None:
+            self.build_stats.end_stage()
+        else:
+            self.build_stats.start_stage(name)
+
+    def print_directory_log(self, msg):
+        print(msg, file=self.directory_log)
+        for dir_, _, filenames in os.walk(self.working_dir):
+            for filename in filenames:
+                print(os.path.join(dir_, filename), file=self.directory_log)
+        print(file=self.directory_log)
+
+    def read_volume(self):
+        """Read and check the inputs of the volume."""
+        self.volume = Volume(self.config, self.logger)
+
+    # ----------------------------------------------------------------------- #
+
+    def preflight(self):
+        """Check all the input pdf files (front matter, acknowledgments and
+        papers, cf. preflight_pdf()) in parallel, before anything else is
+        done, and log all the problems found at once. Raise RuntimeError if
+        any of them would stop the build. The results for a file are kept in
+        the build cache, so an unchanged file is not checked again. The
+        numbers of pages found are kept for paginate(), for the files whose
+        cross-reference data cannot be read."""
+        config = self.config
+        volume = self.volume
+        self.logger.info('Checking all input pdf files (preflight)')
+        self.start_stage('preflight')
+
+        paths = ([os.path.join(volume.front_matter_abs_dir, filename)
+                  for filename in volume.front_matter_filenames] +
+                 [os.path.join(volume.acknowledgments_abs_dir, filename)
+                  for filename in volume.acknowledgments_filenames] +
+                 volume.paper_path_list)
+        results = dict()  # key: path; value: cf. preflight_pdf()
+        keys = dict()  # key: path; value: hash of the file
+        errors = list()
+        warnings = list()
+
+        for path in paths:
+            if not os.path.isfile(path):
+                errors.append('{}: The file is not found. Check if the '
+                              'filename matches the one in the organizer CSV '
+                              'file.'.format(os.path.relpath(
+                                  path, self.working_dir)))
+                continue
+
+            keys[path] = hash_strings(hash_file(path), config.quickpreflight)
+            result = self.build_cache.load('preflight', keys[path])
+
+            if result is not None:
+                results[path] = result
+
+        paths_to_check = [path for path in keys if path not in results]
+
+        if config.jobs > 1 and len(paths_to_check) > 1:
+            pool = self.pool or process_pool(min(config.jobs,
+                                                 len(paths_to_check)))
+            try:
+                checked = pool.map(preflight_pdf,
+                                   [(path, config.quickpreflight)
+                                    for path in paths_to_check],
+                                   chunksize=1)
+            finally:
+                if pool is not self.pool:
+                    pool.close()
+                    pool.join()
+        else:
+            checked = [preflight_pdf((path, config.quickpreflight))
+                       for path in paths_to_check]
+
+        for path, result in zip(paths_to_check, checked):
+            results[path] = result
+            self.build_cache.save('preflight', keys[path], result)
+
+        for path in paths:
+            if path not in results:
+                continue
+
+            self.preflight_page_counts[path] = results[path]['pages']
+            relative_path = os.path.relpath(path, self.working_dir)
+            errors.extend('{}: {}'.format(relative_path, error)
+                          for error in results[path]['errors'])
+            warnings.extend('{}: {}'.format(relative_path, warning)
+                            for warning in results[path]['warnings'])
+
+        self.logger.info('{} pdf files checked ({} of them unchanged since '
+                         'checked before): {} error(s), {} warning(s)'
+                         .format(len(keys), len(keys) - len(paths_to_check),
+                                 len(errors), len(warnings)))
+
+        if warnings:
+            self.logger.info('Preflight warnings:\n' +
+                             '\n'.join('\t' + warning
+                                       for warning in warnings))
+
+        if errors:
+            raise RuntimeError('{} problem(s) found in the input pdf files:\n'
+                               '{}'.format(len(errors), '\n'.join(errors)))
+
+    def paginate(self):
+        """Count the pages of the papers, and work out their page ranges."""
+        volume = self.volume
+        self.logger.info('Checking if all pdf papers are present, '
+                         'and getting number of pages for each paper')
+        self.start_stage('pagination')
+
+        for paper_filename, paper_path in zip(volume.paper_filename_list,
+                                              volume.paper_path_list):
+            if not os.path.isfile(paper_path):
+                raise RuntimeError('The file "{}" is not found in {}.\nCheck '
+                                   'if actual filenames match those in the '
+                                   'CSV organizer.'
+                                   .format(paper_filename,
+                                           volume.papers_abs_dir))
+
+        # Page counts are read from the cross-reference data of the pdf files,
+        # which is much faster than parsing the files fully. Only the files
+        # which cannot be read this way (e.g., malformed ones) are parsed
+        # fully, unless preflight() has done so already.
+        paper_page_counts = run_in_parallel(count_pdf_pages,
+                                            volume.paper_path_list,
+                                            self.config.jobs)
+        fully_parsed_papers = 0
+
+        for i, paper_path in enumerate(volume.paper_path_list):
+            if paper_page_counts[i] is None:
+                paper_page_counts[i] = self.preflight_page_counts.get(
+                    paper_path)
+
+            if paper_page_counts[i] is None:
+                with self.pdf_lock:
+                    paper_page_counts[i] = self.pdf_readers.get(
+                        paper_path).getNumPages()
+                fully_parsed_papers += 1
+
+        self.logger.info('Pages counted for {} papers ({} of them fully '
+                         'parsed)'.format(volume.number_of_papers,
+                                          fully_parsed_papers))
+
+        self.number_of_pages_list = paper_page_counts
+        self.page_range_list = page_ranges(paper_page_counts,
+                                           self.config.startpagenumber)
+
+    # ----------------------------------------------------------------------- #
+
+    def get_latex_format(self, template_str, number_of_runs):
+        """Return the precompiled format (cf. run_pdflatex()) for the LaTeX
+        documents made from *template_str*, which pdflatex is about to compile
+        in *number_of_runs* runs. Return None if no format is to be used.
+
+        The static part of the preamble of a template is the same in all
+        LaTeX documents made from the template, so it is dumped once into a
+        precompiled format file, which pdflatex loads instead of going through
+        the preamble. Format files are kept in the build cache for later
+        builds.
+        """
+        # Dumping a format takes about as long as a pdflatex run, so it does
+        # not pay off for one single run unless the format is cached.
+        if self.config.noformat or (not self.use_cache and
+                                    number_of_runs < 2):
+            return None
+
+        preamble = split_latex_preamble(template_str)
+
+        if preamble is None:
+            return None
+
+        # one at a time, so that a format needed by several tasks is built
+        # only once
+        with self.lock:
+            if self.formats_abs_dir is None:
+                if self.use_cache:
+                    self.formats_abs_dir = os.path.join(
+                        self.build_cache.abs_dir_path, 'formats')
+                else:
+                    # deleted by close()
+                    self.formats_abs_dir = tempfile.mkdtemp(
+                        prefix='cls-formats-')
+
+            latex_format, stdout = build_latex_format(
+                preamble, self.formats_abs_dir, self.config.timeout or None)
+            print(stdout, file=self.pdflatex_log)
+
+        if latex_format is None:
+            self.logger.info('A precompiled LaTeX format could not be built, '
+                             'so the whole preamble is loaded for each run')
+        else:
+            self.logger.info('Using the precompiled LaTeX format {}'
+                             .format(latex_format[0]))
+
+        return latex_format
+
+    def make_headers(self):
+        """Create the headers pdf of each paper."""
+        self.prepare_headers()
+        headers_to_compile = self.headers_to_compile
+
+        if headers_to_compile and not (
+                self.config.batchheaders and
+                self.compile_headers_together(self.header_template_str,
+                                              self.headers_latex_strs,
+                                              headers_to_compile)):
+            self.compile_headers_separately(headers_to_compile)
+
+        for i in sorted(self.headers_rendered_natively + headers_to_compile):
+            self.store_headers(i)
+
+    def prepare_headers(self):
+        """Take the headers pdf of each paper from the build cache, or render
+        it natively (with --headerengine=native) where possible. The LaTeX
+        documents of the other headers are left in headers_latex_strs (key:
+        paper index), for compile_headers()."""
+        config = self.config
+        volume = self.volume
+
+        self.logger.info("Creating headers' latex files and "
+                         "generating the headers' pdfs")
+        self.start_stage('headers')
+
+        self.headers_abs_dir = os.path.join(self.working_dir, config.headers)
+        ensure_empty_dir(self.headers_abs_dir)
+        header_template_str = open(volume.headers_template_path).read()
+        self.header_template_str = header_template_str
+        # key: paper index (headers not cached)
+        self.headers_latex_strs = dict()
+        self.headers_key_list = list()  # list of str
+        self.headers_rendered_natively = list()  # list of paper indices
+
+        header_font = None
+
+        if config.headerengine == 'native':
+            native_first_page_lines = parse_headers_template(
+                header_template_str)
+            header_font = find_header_font(config.headerfont)
+
+            if native_first_page_lines is None:
+                self.logger.info('{} is not laid out like the default '
+                                 'headers template, so pdflatex is used for '
+                                 'all headers'
+                                 .format(volume.headers_template_path))
+            elif header_font is None:
+                native_first_page_lines = None
+                self.logger.info('The font file {} (to be embedded in the '
+                                 'headers) is not found, so pdflatex is used '
+                                 'for all headers. Use --headerfont to give '
+                                 'a Type 1 font file of Times.'
+                                 .format(HEADER_FONT_FILENAME))
+        else:
+            native_first_page_lines = None
+
+        for i in range(volume.number_of_papers):
+            # noinspection PyRedeclaration
+            latex_str = header_template_str
+            # all uppercase
+            authors_in_header = volume.authors_in_header_list[i].upper()
+            paper_title_in_header = \
+                volume.paper_title_in_header_list[i].upper()
+            number_of_pages = self.number_of_pages_list[i]
+            current_paper_start_page, end_page = self.page_range_list[i]
+
+            # A header pdf is entirely determined by these inputs.
+            headers_key = hash_strings(config.headerengine,
+                                       header_template_str,
+                                       authors_in_header,
+                                       paper_title_in_header,
+                                       current_paper_start_page,
+                                       number_of_pages,
+                                       *([header_font.digest]
+                                         if header_font else []))
+            headers_pdf_path = os.path.join(self.headers_abs_dir,
+                                            'headers{}.pdf'.format(i))
+            self.headers_key_list.append(headers_key)
+
+            if self.build_cache.fetch('headers', headers_key,
+                                      headers_pdf_path):
+                continue
+
+            page_range_str = '{}-{}'.format(current_paper_start_page,
+                                            end_page)
+            start_time = time.time()
+
+            if native_first_page_lines is not None and render_headers(
+                    headers_pdf_path,
+                    [line.replace('XXPageRangeXX', page_range_str)
+                     for line in native_first_page_lines],
+                    authors_in_header, paper_title_in_header,
+                    current_paper_start_page, number_of_pages, header_font):
+                self.headers_rendered_natively.append(i)
+                self.build_stats.add_item(
+                    'headers', os.path.basename(headers_pdf_path),
+                    time.time() - start_time,
+                    paper=volume.paper_filename_list[i],
+                    pages=number_of_pages)
+                continue
+            insert_pages_str = ('\\newpage\n\n\\mbox{}\n' *
+                                (number_of_pages - 1))
+
+            latex_str = latex_str.replace('XXStartPageXX',
+                                          str(current_paper_start_page))
+            latex_str = latex_str.replace('XXAuthorsXX', authors_in_header)
+            latex_str = latex_str.replace('XXTitleXX', paper_title_in_header)
+            latex_str = latex_str.replace('XXPageRangeXX', page_range_str)
+            latex_str = latex_str.replace('XXInsertPagesXX', insert_pages_str)
+
+            self.headers_latex_strs[i] = latex_str
+
+        self.headers_to_compile = sorted(self.headers_latex_strs)
+        self.headers_latex_format = None
+
+        if config.headerengine == 'native':
+            self.logger.info('{} headers rendered natively, {} headers left '
+                             'for pdflatex'
+                             .format(len(self.headers_rendered_natively),
+                                     len(self.headers_to_compile)))
+
+    def compile_headers_separately(self, headers_to_compile):
+        """Run pdflatex for the headers of each paper of *headers_to_compile*
+        (list of paper indices), with --jobs runs in parallel."""
+        self.logger.info('Running pdflatex for {} headers ({} job(s) in '
+                         'parallel)'.format(len(headers_to_compile),
+                                            self.config.jobs))
+
+        self.headers_latex_format = self.get_latex_format(
+            self.header_template_str, len(headers_to_compile))
+
+        pdflatex_results = run_in_parallel(self.compile_headers,
+                                           headers_to_compile,
+                                           self.config.jobs)
+
+        # pdflatex console output is collected per paper, and is written
+        # to the pdflatex log in paper order (rather than interleaved
+        # across parallel jobs)
+        pdflatex_errors = list()
+
+        for i, result in zip(headers_to_compile, pdflatex_results):
+            error = self.record_headers(i, result)
+            if error:
+                pdflatex_errors.append(error)
+
+        if pdflatex_errors:
+            raise RuntimeError('The headers could not be generated:\n' +
+                               '\n'.join(pdflatex_errors))
+
+    def compile_headers(self, i):
+        """Run pdflatex for the headers of paper *i*, and return (stdout,
+        error, seconds)."""
+        output_latex_path = os.path.join(self.headers_abs_dir,
+                                         'headers{}.tex'.format(i))
+        with open(output_latex_path, 'w') as f:
+            f.write(self.headers_latex_strs[i])
+
+        start_time = time.time()
+        stdout, error = run_pdflatex(output_latex_path, self.headers_abs_dir,
+                                     self.config.timeout or None,
+                                     self.headers_latex_format)
+        return stdout, error, time.time() - start_time
+
+    def record_headers(self, i, result):
+        """Log the *result* of compile_headers() for paper *i*, and return
+        its error (None if there is none)."""
+        stdout, error, seconds = result
+
+        with self.lock:
+            print(stdout, file=self.pdflatex_log)
+
+        self.build_stats.add_item('headers', 'headers{}.tex'.format(i),
+                                  seconds,
+                                  paper=self.volume.paper_filename_list[i],
+                                  pages=self.number_of_pages_list[i])
+        return error
+
+    def store_headers(self, i):
+        """Store the headers pdf of paper *i* in the build cache."""
+        self.build_cache.store('headers', self.headers_key_list[i],
+                               os.path.join(self.headers_abs_dir,
+                                            'headers{}.pdf'.format(i)))
+
+    def compile_headers_together(self, header_template_str,
+                                 headers_latex_strs, headers_to_compile):
+        """Compile the headers of the papers *headers_to_compile* (list of
+        paper indices) in one single pdflatex run (--batchheaders).
+
+        Return True if successful. Otherwise (e.g., the headers template does
+        not work in a combined document), log why and return False, so that
+        the headers are compiled separately instead."""
+        # All headers are in one LaTeX document, compiled by one pdflatex
+        # run. The resulting pdf is then sliced into one headers pdf per paper.
+        self.logger.info('Running pdflatex once for {} headers'
+                         .format(len(headers_to_compile)))
+
+        try:
+            combined_latex_str = combine_latex_documents(
+                [headers_latex_strs[i] for i in headers_to_compile])
+        except RuntimeError as e:
+            self.logger.info('The headers cannot be compiled together, so '
+                             'they are compiled separately -- {}'.format(e))
+            return False
+
+        output_latex_path = os.path.join(self.headers_abs_dir,
+                                         'headers-all.tex')
+        with open(output_latex_path, 'w') as f:
+            f.write(combined_latex_str)
+
+        headers_latex_format = self.get_latex_format(header_template_str, 1)
+
+        start_time = time.time()
+        stdout, error = run_pdflatex(output_latex_path, self.headers_abs_dir,
+                                     self.config.timeout or None,
+                                     headers_latex_format)
+        with self.lock:
+            print(stdout, file=self.pdflatex_log)
+        self.build_stats.add_item('headers', 'headers-all.tex',
+                                  time.time() - start_time)
+
+        if error:
+            self.logger.info('pdflatex failed on the combined headers '
+                             '(headers-all.tex, cf. the pdflatex log), so the '
+                             'headers are compiled separately -- {}'
+                             .format(error))
+            return False
+
+        expected_number_of_pages = sum(self.number_of_pages_list[i]
+                                       for i in headers_to_compile)
+
+        with open(os.path.join(self.headers_abs_dir, 'headers-all.pdf'),
+                  'rb') as f:
+            all_headers_pdf = PdfFileReader(f)
+
+            if all_headers_pdf.getNumPages() != expected_number_of_pages:
+                self.logger.info('The combined headers pdf has {} pages, but '
+                                 '{} are expected, so the headers are '
+                                 'compiled separately. Check if {} keeps its '
+                                 'per-paper settings on lines of their own '
+                                 'before \\begin{{document}}.'
+                                 .format(all_headers_pdf.getNumPages(),
+                                         expected_number_of_pages,
+                                         self.volume.headers_template_path))
+                return False
+
+            headers_page_offset = 0
+
+            for i in headers_to_compile:
+                number_of_pages = self.number_of_pages_list[i]
+
+                headers_pdf = PdfFileWriter()
+                for j in range(number_of_pages):
+                    headers_pdf.addPage(
+                        all_headers_pdf.getPage(headers_page_offset + j))
+                headers_page_offset += number_of_pages
+
+                headers_pdf_path = os.path.join(self.headers_abs_dir,
+                                                'headers{}.pdf'.format(i))
+                with open(headers_pdf_path, 'wb') as headers_pdf_file:
+                    headers_pdf.write(headers_pdf_file)
+
+        return True
+
+    # ----------------------------------------------------------------------- #
+
+    def stamp_papers(self):
+        """Create the paper pdfs with headers."""
+        config = self.config
+        self.prepare_stamping()
+
+        stamping_tasks = list()  # list of (paper index, (paper, headers,
+        # output), key)
+
+        for i in range(self.volume.number_of_papers):
+            stamping_task = self.stamping_task(i)
+
+            if stamping_task is not None:
+                stamping_tasks.append(stamping_task)
+
+        if config.jobs > 1 and len(stamping_tasks) > 1:
+            # Papers are independent of one another, so they are stamped in
+            # parallel by worker processes, each of which reads and writes the
+            # files.
+            self.logger.info('Adding headers to {} papers ({} processes in '
+                             'parallel)'.format(len(stamping_tasks),
+                                                config.jobs))
+
+            pool = self.pool or process_pool(min(config.jobs,
+                                                 len(stamping_tasks)))
+            try:
+                stamping_results = pool.map(
+                    stamp_paper_file,
+                    [paths for _, paths, _ in stamping_tasks], chunksize=1)
+            finally:
+                if pool is not self.pool:
+                    pool.close()
+                    pool.join()
+        else:
+            stamping_results = [self.stamp_paper_here(paths)
+                                for _, paths, _ in stamping_tasks]
+
+        stamping_errors = list()
+
+        for stamping_task, result in zip(stamping_tasks, stamping_results):
+            error = self.record_stamping(stamping_task, result)
+            if error:
+                stamping_errors.append(error)
+
+        if stamping_errors:
+            raise RuntimeError('Headers could not be added to {} paper(s):\n'
+                               '{}'.format(len(stamping_errors),
+                                           '\n'.join(stamping_errors)))
+
+    def prepare_stamping(self):
+        self.logger.info('Creating paper pdfs with headers')
+        self.start_stage('stamping')
+
+        self.papersfinal_abs_dir = os.path.join(self.working_dir,
+                                                self.config.papersfinal)
+        ensure_empty_dir(self.papersfinal_abs_dir)
+
+    def stamping_task(self, i):
+        """Return (i, (paper path, headers path, output path, wrap_content),
+        key) for adding the headers to paper *i*, or None if the paper with
+        headers is taken from the build cache."""
+        paper_filename_abs_path = self.volume.paper_path_list[i]
+        headers_abs_path = os.path.join(self.headers_abs_dir,
+                                        'headers{}.pdf'.format(i))
+        output_pdf_abs_path = os.path.join(
+            self.papersfinal_abs_dir, self.volume.paper_filename_list[i])
+
+        # A paper pdf with headers is entirely determined by the paper pdf
+        # and the headers pdf (whose key is already a hash of all its
+        # inputs), and by how they are merged.
+        paper_with_headers_key = hash_strings(
+            hash_file(paper_filename_abs_path), self.headers_key_list[i],
+            *(['wrapcontent'] if self.config.wrapcontent else []))
+
+        if self.build_cache.fetch('papers', paper_with_headers_key,
+                                  output_pdf_abs_path):
+            return None
+
+        return (i, (paper_filename_abs_path, headers_abs_path,
+                    output_pdf_abs_path, self.config.wrapcontent),
+                paper_with_headers_key)
+
+    def stamp_paper_here(self, paths):
+        """Like stamp_paper_file(), but in this process, with the pdf readers
+        of the build."""
+        (paper_filename_abs_path, headers_abs_path, output_pdf_abs_path,
+         wrap_content) = paths
+        pdf_readers = self.pdf_readers
+        start_time = time.time()
+
+        try:
+            pages = stamp_paper(pdf_readers.get(paper_filename_abs_path),
+                                pdf_readers.get(headers_abs_path),
+                                output_pdf_abs_path, wrap_content)
+        except Exception as e:
+            return 0, time.time() - start_time, '{}: {}: {}'.format(
+                paper_filename_abs_path, type(e).__name__, e)
+
+        if self.config.reusepages:
+            # The merged pages still refer to objects of both the paper pdf
+            # and the headers pdf, so both readers are kept.
+            pdf_readers.set_pages(output_pdf_abs_path, pages)
+        else:
+            pdf_readers.release(paper_filename_abs_path)
+            pdf_readers.release(headers_abs_path)
+
+        return len(pages), time.time() - start_time, None
+
+    def record_stamping(self, stamping_task, result):
+        """Log the *result* of stamp_paper_file() (or stamp_paper_here()) for
+        *stamping_task* (cf. stamping_task()), and return its error (None if
+        there is none)."""
+        i, paths, paper_with_headers_key = stamping_task
+        number_of_pages, elapsed, error = result
+
+        if error:
+            return error
+
+        paper_filename = self.volume.paper_filename_list[i]
+        self.logger.info('\t{}: {} pages, {:.2f} seconds'
+                         .format(paper_filename, number_of_pages, elapsed))
+        self.build_stats.add_item('stamping', paper_filename, elapsed,
+                                  paper=paper_filename, pages=number_of_pages)
+        self.build_cache.store('papers', paper_with_headers_key, paths[2])
+        return None
+
+    # ----------------------------------------------------------------------- #
+
+    def make_toc(self):
+        """Create the table of contents."""
+        volume = self.volume
+
+        self.logger.info('Creating the table of contents')
+        self.start_stage('toc')
+
+        self.toc_abs_dir = os.path.join(self.working_dir, self.config.toc)
+        ensure_empty_dir(self.toc_abs_dir)
+
+        toc_template = open(volume.toc_template_path).read()
+        toc_latex_str = toc_latex(toc_template, volume, self.page_range_list)
+
+        output_toc_tex_path = os.path.join(self.toc_abs_dir,
+                                           'table-of-contents.tex')
+        with open(output_toc_tex_path, 'w') as f:
+            f.write(toc_latex_str)
+
+        # The table of contents pdf is entirely determined by its LaTeX file,
+        # which only changes with the template, the authors and titles, and
+        # the start pages.
+        toc_key = hash_strings(toc_latex_str)
+        output_toc_pdf_path = os.path.join(self.toc_abs_dir,
+                                           'table-of-contents.pdf')
+
+        if not self.build_cache.fetch('toc', toc_key, output_toc_pdf_path):
+            stdout, error = run_pdflatex(output_toc_tex_path,
+                                         self.toc_abs_dir,
+                                         self.config.timeout or None,
+                                         self.get_latex_format(toc_template,
+                                                               1))
+            with self.lock:
+                print(stdout, file=self.pdflatex_log)
+
+            if error:
+                raise RuntimeError(error)
+
+            self.build_cache.store('toc', toc_key, output_toc_pdf_path)
+
+        if self.use_cache:
+            self.logger.info('Build cache at {} -- {}'
+                             .format(self.build_cache.abs_dir_path,
+                                     self.build_cache.summary()))
+
+    # ----------------------------------------------------------------------- #
+
+    def assemble(self):
+        """Create the final proceedings pdf output(s)."""
+        volume = self.volume
+
+        self.start_assembly()
+        self.add_files('front matter', volume.front_matter_filenames,
+                       volume.front_matter_abs_dir)
+        self.add_files('acknowledgments', volume.acknowledgments_filenames,
+                       volume.acknowledgments_abs_dir)
+        self.add_files('table of contents', ['table-of-contents.pdf'],
+                       self.toc_abs_dir)
+        self.add_files('papers', volume.paper_filename_list,
+                       self.papersfinal_abs_dir)
+        self.write_outputs()
+
+    def start_assembly(self):
+        """Set up the final proceedings pdf output(s), for add_files()."""
+        config = self.config
+
+        self.logger.info("""Working directory: {}
+Creating the final proceedings pdf output(s)
+Input pdf files are concatenated in the following order.
+(Blank pages are automatically added if necessary.)"""
+                         .format(self.working_dir))
+        self.start_stage('assembly')
+
+        # Both the 8.5" x 11" and the 6" x 9" outputs are created in a single
+        # pass over the input pdf files: each page is added to the
+        # 8.5" x 11" output as is, and a scaled and cropped copy of it is
+        # added to the 6" x 9" output. With --streaming (or --dedup or
+        # --compress), the pages are written to the output files right away.
+        self.proceedings_pdf_abs_path = os.path.join(self.working_dir,
+                                                     config.output)
+        self.proceedings_pdf_6by9_abs_path = os.path.join(self.working_dir,
+                                                          config.output6by9)
+
+        # Deduplication of resources and compression are done by the
+        # incremental writer too.
+        if config.streaming or config.dedup or config.compress:
+            self.proceedings_pdf = (IncrementalPdfWriter(
+                open(self.proceedings_pdf_abs_path, 'wb'), config.dedup,
+                config.compress)
+                if not config.skipletter else None)
+            self.proceedings_pdf_6by9 = (IncrementalPdfWriter(
+                open(self.proceedings_pdf_6by9_abs_path, 'wb'), config.dedup,
+                config.compress)
+                if not config.skip6by9 else None)
+        else:
+            self.proceedings_pdf = (PdfFileWriter()
+                                    if not config.skipletter else None)
+            self.proceedings_pdf_6by9 = (PdfFileWriter()
+                                         if not config.skip6by9 else None)
+
+        # the 6" x 9" page box, computed from the first page of the volume
+        self.new_lower_left = None
+        self.new_upper_right = None
+
+        self.cumulative_page_count = 0
+        self.index_parts = list()  # for write_index()
+
+    def write_outputs(self):
+        """Finish writing the final proceedings pdf output(s)."""
+        self.output_paths = list()
+        self.output_filenames = list()
+
+        for output_pdf, output_pdf_abs_path, size in (
+                (self.proceedings_pdf, self.proceedings_pdf_abs_path,
+                 '8.5" x 11"'),
+                (self.proceedings_pdf_6by9,
+                 self.proceedings_pdf_6by9_abs_path, '6" x 9"')):
+            if output_pdf is None:
+                continue
+
+            self.logger.info('Writing the {} final proceedings PDF'
+                             .format(size))
+            self.start_stage('letter' if output_pdf is self.proceedings_pdf
+                             else '6x9')
+            start_time = time.time()
+
+            if isinstance(output_pdf, IncrementalPdfWriter):
+                output_pdf.close()
+                output_pdf.output_file.close()
+
+                if self.config.dedup:
+                    self.logger.info('{} duplicate objects ({} bytes) not '
+                                     'written again'
+                                     .format(output_pdf.duplicate_objects,
+                                             output_pdf.duplicate_bytes))
+            else:
+                with open(output_pdf_abs_path, 'wb') as f:
+                    output_pdf.write(f)
+
+            if self.config.linearize:
+                linearize_pdf(output_pdf_abs_path)
+
+            elapsed = time.time() - start_time
+            output_bytes = os.path.getsize(output_pdf_abs_path)
+            self.logger.info('{}: {} bytes, written in {:.2f} s'
+                             .format(os.path.basename(output_pdf_abs_path),
+                                     output_bytes, elapsed))
+            self.build_stats.add_item(
+                'letter' if output_pdf is self.proceedings_pdf else '6x9',
+                os.path.basename(output_pdf_abs_path), elapsed,
+                bytes=output_bytes)
+
+            self.output_paths.append(output_pdf_abs_path)
+            self.output_filenames.append('\tSize {}: {}\n'.format(
+                size, os.path.basename(output_pdf_abs_path)))
+
+        self.start_stage(None)
+        self.write_index()
+
+        # the writers are not needed any more
+        self.proceedings_pdf = None
+        self.proceedings_pdf_6by9 = None
+
+    def write_index(self):
+        """Write the index of the final proceedings pdf output(s) (a JSON
+        file, cf. extract_pdfs()): the parts in order, each with its file and
+        its first page in the outputs, and the papers, each with its page
+        range and its file with headers."""
+        volume = self.volume
+        paper_parts = [part for part in self.index_parts
+                       if part['category'] == 'papers']
+        papers = list()
+
+        for i, part in enumerate(paper_parts):
+            papers.append(OrderedDict([
+                ('index', i + 1),
+                ('filename', volume.paper_filename_list[i]),
+                ('authors', volume.authors_list[i]),
+                ('paper title', volume.paper_title_list[i]),
+                ('pages', part['pages']),
+                ('start page', self.page_range_list[i][0]),
+                ('end page', self.page_range_list[i][1]),
+                ('first pdf page', part['first pdf page']),
+                ('last pdf page', part['first pdf page'] + part['pages'] - 1),
+                ('file with headers', part['file'])]))
+
+        index = OrderedDict([
+            ('outputs', [os.path.basename(path)
+                         for path in self.output_paths]),
+            ('total pages', self.cumulative_page_count),
+            ('blank page', os.path.relpath(volume.blank_page_path,
+                                           self.working_dir)),
+            ('papers', papers),
+            ('parts', self.index_parts)])
+
+        index_abs_path = os.path.join(self.working_dir, self.config.index)
+        with open(index_abs_path, 'w') as f:
+            json.dump(index, f, indent=2)
+
+        self.logger.info('The index of the proceedings is in {}'
+                         .format(index_abs_path))
+
+    def set_6by9_page_box(self, page):
+        """Compute the 6" x 9" page box from the 8.5" x 11" *page*."""
+        scale_factor = self.config.scale
+
+        original_page_width, original_page_height = \
+            page.mediaBox.getUpperRight()
+        original_page_width = float(original_page_width)
+        original_page_height = float(original_page_height)
+
+        new_page_width = original_page_width * scale_factor
+        new_page_height = original_page_height * scale_factor
+
+        page_width_delta = (original_page_width - new_page_width) / 2
+        page_height_delta = (original_page_height - new_page_height) / 2
+
+        trim_from_left_right_margins = (original_page_width * (1.25 / 8.5) -
+                                        page_width_delta)
+        trim_from_top_margin = (original_page_height * (0.67 / 11) -
+                                page_height_delta)
+        trim_from_bottom_margin = (original_page_height * (1.33 / 11) -
+                                   page_height_delta)
+
+        self.new_lower_left = (trim_from_left_right_margins,
+                               trim_from_bottom_margin)
+        self.new_upper_right = (new_page_width - trim_from_left_right_margins,
+                                new_page_height - trim_from_top_margin)
+
+    def scale_to_6by9(self, page):
+        """Return a copy of the 8.5" x 11" *page*, scaled and cropped to
+        6" x 9". The page itself remains intact for the 8.5" x 11" output."""
+        if self.new_lower_left is None:
+            self.set_6by9_page_box(page)
+
+        # a shallow copy, whose own content and page box are replaced
+        page_6by9 = PageObject(page.pdf, page.indirectRef)
+        page_6by9.update(page)
+
+        if self.config.wrapcontent:
+            # the content of the page is scaled as a whole, without decoding
+            # it
+            wrap_page_content(page_6by9,
+                              'q {0:.6f} 0 0 {0:.6f} 0 0 cm\n'
+                              .format(self.config.scale).encode('ascii'),
+                              b'\nQ\n')
+            page_6by9[NameObject('/MediaBox')] = RectangleObject(
+                list(self.new_lower_left) + list(self.new_upper_right))
+            return page_6by9
+
+        page_6by9.scaleBy(self.config.scale)
+        page_6by9.mediaBox.lowerLeft = self.new_lower_left
+        page_6by9.mediaBox.upperRight = self.new_upper_right
+        return page_6by9
+
+    def add_pages(self, pages):
+        """Add *pages* (list of page objects) to the final proceedings pdf
+        output(s)."""
+        outputs = list()
+
+        if self.proceedings_pdf_6by9 is not None:
+            outputs.append((self.proceedings_pdf_6by9,
+                            [self.scale_to_6by9(page) for page in pages]))
+        if self.proceedings_pdf is not None:
+            outputs.append((self.proceedings_pdf, pages))
+
+        for output_pdf, output_pages in outputs:
+            if isinstance(output_pdf, IncrementalPdfWriter):
+                output_pdf.add_pages(output_pages)
+            else:
+                for page in output_pages:
+                    output_pdf.addPage(page)
+
+    def add_files(self, category, filenames_, input_abs_dir):
+        """
+        Handle pdf files for *category* (str).
+            Input pdf files are in *input_abs_dir* (str)
+            *filenames* gives the list of filenames relative to
+            *input_abs_dir*.
+        """
+        self.logger.info('(For {})'.format(category))
+        start_time = time.time()
+        start_page_count = self.cumulative_page_count
+
+        for filename_ in filenames_:
+            input_pdf_path = os.path.join(input_abs_dir, filename_)
+
+            self.logger.info('\t' + os.path.relpath(input_pdf_path,
+                                                    self.working_dir))
+
+            input_pages = self.pdf_readers.pages(input_pdf_path)
+            input_number_of_pages = len(input_pages)
+            self.add_pages(input_pages)
+
+            if self.config.streaming:
+                # everything from this pdf has been written to the output(s)
+                del input_pages
+                self.pdf_readers.release(input_pdf_path)
+
+            part = OrderedDict([
+                ('category', category),
+                ('file', os.path.relpath(input_pdf_path, self.working_dir)),
+                ('pages', input_number_of_pages),
+                ('first pdf page', self.cumulative_page_count + 1)])
+            self.cumulative_page_count += input_number_of_pages
+
+            # check if blank page insertion is needed
+            part['blank page after'] = bool(self.cumulative_page_count % 2)
+
+            if self.cumulative_page_count % 2:  # if odd number
+                self.cumulative_page_count += 1
+                self.add_pages(self.pdf_readers.pages(
+                    self.volume.blank_page_path))
+
+            self.index_parts.append(part)
+
+        self.build_stats.add_item(
+            'assembly', category, time.time() - start_time,
+            pages=self.cumulative_page_count - start_page_count)
+
+    # ----------------------------------------------------------------------- #
+
+    def run_pipeline(self):
+        """Run the stages of the build after read_volume() as a graph of tasks
+        (cf. TaskGraph), so that the stages overlap: the table of contents is
+        made right after pagination, each paper gets its headers as soon as
+        its headers pdf is ready, and each part of the final proceedings pdf
+        output(s) is added as soon as it and all the parts before it are
+        ready. The tasks on the critical path are listed in the master log.
+        """
+        config = self.config
+        volume = self.volume
+        pool = self.pool
+
+        if pool is None and config.jobs > 1:
+            pool = process_pool(config.jobs)
+
+        def start_headers_compilation():
+            if not self.headers_to_compile:
+                return
+            elif config.batchheaders:
+                if not self.compile_headers_together(
+                        self.header_template_str, self.headers_latex_strs,
+                        self.headers_to_compile):
+                    self.compile_headers_separately(self.headers_to_compile)
+
+                for i in self.headers_to_compile:
+                    self.store_headers(i)
+            else:
+                self.logger.info('Running pdflatex for {} headers ({} job(s) '
+                                 'in parallel)'
+                                 .format(len(self.headers_to_compile),
+                                         config.jobs))
+                self.headers_latex_format = self.get_latex_format(
+                    self.header_template_str, len(self.headers_to_compile))
+
+        def make_paper_headers(i):
+            if i in self.headers_rendered_natively:
+                self.store_headers(i)
+            elif i in self.headers_latex_strs and not config.batchheaders:
+                error = self.record_headers(i, self.compile_headers(i))
+
+                if error:
+                    raise RuntimeError('The headers could not be '
+                                       'generated:\n' + error)
+
+                self.store_headers(i)
+
+        def stamp_paper_task(i):
+            stamping_task = self.stamping_task(i)
+
+            if stamping_task is None:
+                return
+            elif pool is not None:
+                result = pool.apply(stamp_paper_file, (stamping_task[1],))
+            else:
+                with self.pdf_lock:
+                    result = self.stamp_paper_here(stamping_task[1])
+
+            error = self.record_stamping(stamping_task, result)
+
+            if error:
+                raise RuntimeError('Headers could not be added to 1 '
+                                   'paper(s):\n' + error)
+
+        def with_pdf_lock(func, *args):
+            def locked_func():
+                with self.pdf_lock:
+                    func(*args)
+            return locked_func
+
+        graph = TaskGraph()
+        graph.add('pagination', self.paginate)
+        graph.add('headers', self.prepare_headers, ['pagination'])
+        headers_compilation = graph.add(
+            'headers batch' if config.batchheaders else 'headers format',
+            start_headers_compilation, ['headers'])
+        graph.add('table of contents', self.make_toc, ['pagination'])
+        graph.add('stamping', self.prepare_stamping)
+        graph.add('assembly', with_pdf_lock(self.start_assembly))
+        previous_part = graph.add(
+            'assembly: front matter',
+            with_pdf_lock(self.add_files, 'front matter',
+                          volume.front_matter_filenames,
+                          volume.front_matter_abs_dir),
+            ['assembly'])
+        previous_part = graph.add(
+            'assembly: acknowledgments',
+            with_pdf_lock(self.add_files, 'acknowledgments',
+                          volume.acknowledgments_filenames,
+                          volume.acknowledgments_abs_dir),
+            [previous_part])
+        previous_part = graph.add(
+            'assembly: table of contents',
+            with_pdf_lock(lambda: self.add_files('table of contents',
+                                                 ['table-of-contents.pdf'],
+                                                 self.toc_abs_dir)),
+            [previous_part, 'table of contents'])
+
+        # Tasks are added paper by paper, so that among the tasks which are
+        # ready, those of the earlier papers go first and the assembly of the
+        # final pdf output(s) can move on.
+        for i, paper_filename in enumerate(volume.paper_filename_list):
+            headers_task = graph.add(
+                'headers {} ({})'.format(i + 1, paper_filename),
+                lambda i_=i: make_paper_headers(i_), [headers_compilation])
+            stamping_task = graph.add(
+                'stamping {} ({})'.format(i + 1, paper_filename),
+                lambda i_=i: stamp_paper_task(i_), [headers_task, 'stamping'])
+            previous_part = graph.add(
+                'assembly {} ({})'.format(i + 1, paper_filename),
+                with_pdf_lock(lambda filename_=paper_filename: self.add_files(
+                    'papers', [filename_], self.papersfinal_abs_dir)),
+                [stamping_task, previous_part])
+
+        graph.add('outputs', with_pdf_lock(self.write_outputs),
+                  [previous_part])
+
+        self.build_stats.start_stage('pipeline')
+        self.pipelined = True
+
+        try:
+            graph.run(config.jobs + 1)  # one more for the assembly
+        finally:
+            self.pipelined = False
+            self.build_stats.end_stage()
+
+            if pool is not None and pool is not self.pool:
+                pool.close()
+                pool.join()
+
+        self.report_critical_path(graph)
+
+    def report_critical_path(self, graph):
+        """Log the critical path of the TaskGraph *graph* which has been run,
+        and add all its tasks to the build stats."""
+        critical_path = graph.critical_path()
+        start_time = min(start for start, _ in graph.times.values())
+        end_time = max(end for _, end in graph.times.values())
+        previous_end = start_time
+        lines = list()
+
+        for name in critical_path:
+            start, end = graph.times[name]
+            lines.append('\t{}: {:.2f} seconds (started {:.2f} seconds after '
+                         'it could)'.format(name, end - start,
+                                            start - previous_end))
+            previous_end = end
+
+        self.logger.info('Critical path of the build ({} tasks, {:.2f} '
+                         'seconds in all):\n{}'
+                         .format(len(graph.times), end_time - start_time,
+                                 '\n'.join(lines)))
+
+        for name, (start, end) in sorted(graph.times.items(),
+                                         key=lambda item: item[1]):
+            self.build_stats.add_item('pipeline', name, end - start,
+                                      start=start, end=end,
+                                      critical=name in critical_path)
+
+    # ----------------------------------------------------------------------- #
+
+    def finish(self):
+        """Report the results of the build."""
+        config = self.config
+
+        if config.slowest > 0:
+            slowest_papers_lines = list()
+
+            for paper, pages, seconds_by_stage, total in \
+                    self.build_stats.slowest_papers(config.slowest):
+                slowest_papers_lines.append(
+                    '\t{}: {} pages, {:.2f} seconds ({})'.format(
+                        paper, pages, total,
+                        ', '.join('{} {:.2f}'.format(stage, seconds)
+                                  for stage, seconds in
+                                  sorted(seconds_by_stage.items()))))
+
+            self.logger.info('The slowest papers:\n' +
+                             '\n'.join(slowest_papers_lines))
+
+        if config.stats:
+            stats_abs_path = os.path.join(self.working_dir, config.stats)
+            self.build_stats.write(stats_abs_path)
+            self.logger.info('Build stats are in {}'.format(stats_abs_path))
+
+        self.logger.info('All done!! Please find these in the working '
+                         'directory:\n' + ''.join(self.output_filenames))
+
+        self.logger.info("Other output files are in the following "
+                         "subfolders:\n{}\n{}\n{}"
+                         .format(os.path.relpath(self.papersfinal_abs_dir,
+                                                 self.working_dir),
+                                 os.path.relpath(self.toc_abs_dir,
+                                                 self.working_dir),
+                                 os.path.relpath(self.headers_abs_dir,
+                                                 self.working_dir)))
+
+        self.logger.info('Log files:')
+        self.logger.info('{} (this current file)'.format(MASTER_LOG_NAME))
+        self.logger.info('{} (log by the "pdflatex" command)'
+                         .format(PDFLATEX_LOG_NAME))
+        self.logger.info('{} (all contents at the working directory)'
+                         .format(DIRECTORY_LOG_NAME))
+
+        self.logger.info('Printing the directory tree after final PDf '
+                         'compilation')
+
+        self.print_directory_log('After completion of final PDF compilation:')
+
+    def close(self):
+        """Close all pdf files and log files of the build."""
+        self.logger.info('Closing all pdf files, and log files for pdflatex '
+                         'and directory tree')
+
+        if self.own_pdf_readers:
+            self.pdf_readers.close()
+        else:
+            # Files made by this build are made again by the next one.
+            for attribute in ('headers_abs_dir', 'papersfinal_abs_dir',
+                              'toc_abs_dir'):
+                if hasattr(self, attribute):
+                    self.pdf_readers.release_dir(getattr(self, attribute))
+
+        if not self.use_cache and self.formats_abs_dir is not None:
+            shutil.rmtree(self.formats_abs_dir, ignore_errors=True)
+
+        for log in (self.pdflatex_log, self.directory_log):
+            if log is not None:
+                log.close()
+
+        for handler in list(self.logger.handlers):
+            handler.close()
+            self.logger.removeHandler(handler)
+
+
+# --------------------------------------------------------------------------- #
+# dry run: the build plan says how the proceedings would be paginated and
+# assembled, from the organizer CSV file and the page counts of the pdf files
+# only, without running pdflatex or writing any pdf files.
+
+
+def count_pages(paths, jobs=1):
+    """Return the lists of the numbers of pages of the pdf files *paths*
+    (None for a file which is missing or cannot be read), and of the
+    problems found (list of str)."""
+    page_counts = run_in_parallel(
+        lambda path: count_pdf_pages(path) if os.path.isfile(path) else None,
+        paths, jobs)
+    problems = list()
+
+    for i, path in enumerate(paths):
+        if page_counts[i] is not None:
+            continue
+        elif not os.path.isfile(path):
+            problems.append('The file "{}" is not found.'.format(path))
+            continue
+
+        try:
+            with open(path, 'rb') as f:
+                page_counts[i] = PdfFileReader(f).getNumPages()
+        except Exception as e:
+            problems.append('The file "{}" cannot be read -- {}: {}'
+                            .format(path, type(e).__name__, e))
+
+    return page_counts, problems
+
+
+def make_plan(config):
+    """Return the build plan (a dict, for JSON) of the proceedings for
+    *config* (a Config).
+
+    The plan has the page range of each paper, its headers and whether a
+    blank page follows it; the parts of the final proceedings pdf output(s)
+    in order (front matter, acknowledgments, table of contents, papers), each
+    with its first page in the pdf; the total numbers of pages of the
+    outputs; and all the problems found (list of str, e.g., headers which are
+    too long), which would stop a build.
+
+    The number of pages of the table of contents is only known if its pdf for
+    these papers and page ranges is in the build cache; otherwise, that of
+    the table of contents of the previous build (if any) is used, and
+    "table of contents pages from" in the plan says which. As every part is
+    padded to an even number of pages, whether a blank page follows a part
+    depends only on its own number of pages, and the first pdf pages and the
+    totals are known up to the number of pages of the table of contents:
+    "first pdf page without the table of contents" and "total pages without
+    the table of contents" are given even when the table of contents is
+    unknown, and the first pdf page of a part after it is that plus the
+    number of pages of the table of contents with its blank page (if any).
+    Page numbers and totals which depend on other unknown numbers of pages
+    (e.g., of a paper which cannot be read) are None.
+    """
+    config.validate()
+    volume = Volume(config, strict=False)
+    problems = list(volume.header_problems)
+
+    paper_page_counts, paper_problems = count_pages(volume.paper_path_list,
+                                                    config.jobs)
+    problems.extend(paper_problems)
+
+    # page ranges are known up to the first paper with an unknown page count
+    known_page_counts = list()
+
+    for number_of_pages in paper_page_counts:
+        if number_of_pages is None:
+            break
+        known_page_counts.append(number_of_pages)
+
+    page_range_list = page_ranges(known_page_counts, config.startpagenumber)
+    page_range_list += ([(None, None)] *
+                        (volume.number_of_papers - len(page_range_list)))
+
+    # the table of contents, from the build cache or the previous build
+    toc_pdf_path = None
+    toc_pages_from = None
+
+    if len(known_page_counts) == volume.number_of_papers:
+        toc_key = hash_strings(toc_latex(open(volume.toc_template_path).read(),
+                                         volume, page_range_list))
+        cached_toc_path = BuildCache(
+            os.path.join(volume.working_dir, config.cache),
+            enabled=not config.nocache).path('toc', toc_key)
+
+        if not config.nocache and os.path.isfile(cached_toc_path):
+            toc_pdf_path = cached_toc_path
+            toc_pages_from = 'build cache'
+
+    if toc_pdf_path is None:
+        previous_toc_path = os.path.join(volume.working_dir, config.toc,
+                                         'table-of-contents.pdf')
+
+        if os.path.isfile(previous_toc_path):
+            toc_pdf_path = previous_toc_path
+            toc_pages_from = 'previous build'
+
+    other_paths = [os.path.join(volume.front_matter_abs_dir, filename)
+                   for filename in volume.front_matter_filenames]
+    other_paths += [os.path.join(volume.acknowledgments_abs_dir, filename)
+                    for filename in volume.acknowledgments_filenames]
+    other_page_counts, other_problems = count_pages(
+        other_paths + ([toc_pdf_path] if toc_pdf_path else []), config.jobs)
+    problems.extend(other_problems)
+
+    if toc_pdf_path is None:
+        other_page_counts.append(None)
+
+    toc_pages = other_page_counts[-1]
+    # with its blank page, if any
+    toc_pdf_pages = (toc_pages + toc_pages % 2 if toc_pages is not None
+                     else None)
+
+    # the parts of the final pdf output(s), as in Build.add_files()
+    categories = (['front matter'] * len(volume.front_matter_filenames) +
+                  ['acknowledgments'] * len(volume.acknowledgments_filenames) +
+                  ['table of contents'])
+    filenames = (volume.front_matter_filenames +
+                 volume.acknowledgments_filenames +
+                 ['table-of-contents.pdf'])
+    parts = list()
+    # the number of pages before the part, without the table of contents
+    cumulative_page_count = 0
+    after_toc = False
+
+    for category, filename, number_of_pages in zip(
+            categories + ['papers'] * volume.number_of_papers,
+            filenames + volume.paper_filename_list,
+            other_page_counts + paper_page_counts):
+        part = OrderedDict([('category', category), ('filename', filename),
+                            ('pages', number_of_pages),
+                            ('first pdf page', None),
+                            ('first pdf page without the table of contents',
+                             None),
+                            ('blank page after', None)])
+
+        if number_of_pages is not None:
+            part['blank page after'] = bool(number_of_pages % 2)
+
+        if cumulative_page_count is not None:
+            part['first pdf page without the table of contents'] = \
+                cumulative_page_count + 1
+
+            if not after_toc:
+                part['first pdf page'] = cumulative_page_count + 1
+            elif toc_pdf_pages is not None:
+                part['first pdf page'] = (cumulative_page_count + 1 +
+                                          toc_pdf_pages)
+
+        if category == 'table of contents':
+            after_toc = True
+        elif cumulative_page_count is not None and number_of_pages is not None:
+            cumulative_page_count += number_of_pages + number_of_pages % 2
+        else:
+            cumulative_page_count = None
+
+        parts.append(part)
+
+    papers = list()
+
+    for i, part in enumerate(parts[len(parts) - volume.number_of_papers:]):
+        papers.append(OrderedDict([
+            ('index', i + 1),
+            ('filename', volume.paper_filename_list[i]),
+            ('authors', volume.authors_list[i]),
+            ('paper title', volume.paper_title_list[i]),
+            ('authors in header', volume.authors_in_header_list[i]),
+            ('paper title in header', volume.paper_title_in_header_list[i]),
+            ('pages', paper_page_counts[i]),
+            ('start page', page_range_list[i][0]),
+            ('end page', page_range_list[i][1]),
+            ('blank page after', part['blank page after']),
+            ('first pdf page', part['first pdf page']),
+            ('first pdf page without the table of contents',
+             part['first pdf page without the table of contents'])]))
+
+    if cumulative_page_count is not None and toc_pdf_pages is not None:
+        total_page_count = cumulative_page_count + toc_pdf_pages
+    else:
+        total_page_count = None
+
+    total_pages = OrderedDict()
+
+    if not config.skipletter:
+        total_pages[config.output] = total_page_count
+    if not config.skip6by9:
+        total_pages[config.output6by9] = total_page_count
+
+    return OrderedDict([
+        ('directory', volume.working_dir),
+        ('organizer', volume.organizer_path),
+        ('start page number', config.startpagenumber),
+        ('max header length', config.maxheaderlength),
+        ('papers', papers),
+        ('parts', parts),
+        ('table of contents pages', toc_pages),
+        ('table of contents pages from', toc_pages_from),
+        ('total pages', total_pages),
+        ('total pages without the table of contents', cumulative_page_count),
+        ('problems', problems)])
+
+
+# --------------------------------------------------------------------------- #
+# extraction: single papers or page ranges of the proceedings are written into
+# pdf files of their own, from the files of the parts of the proceedings
+# listed in the index of the last build, without reading the whole
+# proceedings pdf.
+
+
+def read_index(config):
+    """Return the index (a dict, cf. Build.write_index()) of the last build
+    for *config* (a Config)."""
+    index_abs_path = os.path.join(os.path.abspath(config.directory),
+                                  config.index)
+
+    if not os.path.isfile(index_abs_path):
+        raise RuntimeError('The index {} does not exist. Please build the '
+                           'proceedings first.'.format(index_abs_path))
+
+    with open(index_abs_path) as f:
+        return json.load(f)
+
+
+def extraction_list(config, index):
+    """Return a list of (output filename, list of pdf page numbers in the
+    proceedings) of the pdf files to extract for *config* (a Config) from the
+    proceedings with *index* (cf. read_index())."""
+    papers = index['papers']
+    front_matter_pages = list(range(1, papers[0]['first pdf page'])
+                              if papers else [])
+    extractions = list()
+
+    if config.extract:
+        for name in config.extract.split(','):
+            name = name.strip()
+
+            if name == 'all':
+                selected = papers
+            else:
+                selected = [paper for paper in papers
+                            if name in (str(paper['index']),
+                                        paper['filename'])]
+
+            if not selected:
+                raise RuntimeError('No paper {} in the index (please give '
+                                   'the number of a paper in the organizer '
+                                   'CSV file, its filename, or "all").'
+                                   .format(name))
+
+            for paper in selected:
+                if any(paper['filename'] == filename
+                       for filename, _ in extractions):
+                    continue
+
+                extractions.append((paper['filename'], list(range(
+                    paper['first pdf page'], paper['last pdf page'] + 1))))
+
+    if config.extractpages:
+        match = re.match(r'^(\d+)(?:-(\d+))?$', config.extractpages.strip())
+
+        if match is None:
+            raise RuntimeError('Invalid page range: {} (e.g., "12-30")'
+                               .format(config.extractpages))
+
+        first_page = int(match.group(1))
+        last_page = int(match.group(2) or first_page)
+
+        if not 1 <= first_page <= last_page <= index['total pages']:
+            raise RuntimeError('The page range {} is not within the {} pages '
+                               'of the proceedings.'
+                               .format(config.extractpages,
+                                       index['total pages']))
+
+        extractions.append(('pages-{}-{}.pdf'.format(first_page, last_page),
+                            list(range(first_page, last_page + 1))))
+
+    if config.withfrontmatter:
+        extractions = [(filename, sorted(set(front_matter_pages) |
+                                         set(page_numbers)))
+                       for filename, page_numbers in extractions]
+
+    return extractions
+
+
+def extract_pdfs(config):
+    """Write the pdf files of the papers (--extract) or page range
+    (--extractpages) of the proceedings for *config* (a Config), optionally
+    preceded by the front matter, into the directory --extractdir, and
+    return the list of their paths.
+
+    The pages are taken from the files of the parts of the proceedings (the
+    papers with headers, etc) listed in the index of the last build, so only
+    the files which have some of the pages are read. A file which no longer
+    has the number of pages in the index raises RuntimeError, as the
+    proceedings need to be built again.
+    """
+    config.validate()
+    working_dir = os.path.abspath(config.directory)
+    index = read_index(config)
+
+    # key: pdf page number in the proceedings; value: (file, page index)
+    page_sources = dict()
+
+    for part in index['parts']:
+        for j in range(part['pages']):
+            page_sources[part['first pdf page'] + j] = (part['file'], j)
+
+        if part['blank page after']:
+            page_sources[part['first pdf page'] + part['pages']] = (
+                index['blank page'], 0)
+
+    extract_abs_dir = os.path.join(working_dir, config.extractdir)
+
+    if not os.path.isdir(extract_abs_dir):
+        os.makedirs(extract_abs_dir)
+
+    expected_pages = dict((part['file'], part['pages'])
+                          for part in index['parts'])
+    pdf_readers = PdfReaderRegistry(config.maxopenfiles)
+    output_paths = list()
+
+    try:
+        for filename, page_numbers in extraction_list(config, index):
+            output_path = os.path.join(extract_abs_dir, filename)
+
+            with open(output_path, 'wb') as f:
+                output_pdf = IncrementalPdfWriter(f, config.dedup,
+                                                  config.compress)
+
+                for page_number in page_numbers:
+                    file_, j = page_sources[page_number]
+                    pages = pdf_readers.pages(os.path.join(working_dir,
+                                                           file_))
+
+                    if len(pages) != expected_pages.get(file_, len(pages)):
+                        raise RuntimeError(
+                            '{} has changed since the last build. Please '
+                            'build the proceedings again.'.format(file_))
+
+                    output_pdf.add_pages([pages[j]])
+
+                output_pdf.close()
+
+            output_paths.append(output_path)
+    finally:
+        pdf_readers.close()
+
+    return output_paths
+
+
+# --------------------------------------------------------------------------- #
+# watch mode: the proceedings are built again whenever the inputs change.
+# Everything which has not changed since the previous build is taken from the
+# build cache, e.g., if a paper pdf is replaced and its number of pages is
+# unchanged, only that paper gets its headers added again.
+
+WATCH_POLL_INTERVAL = 0.5  # seconds
+
+
+def watched_files(config):
+    """Return a dict (key: path; value: (modification time, size)) of the
+    files which watch() watches for *config*."""
+    working_dir = os.path.abspath(config.directory)
+    files = dict()
+    organizer_path = os.path.join(working_dir, config.organizer)
+
+    if os.path.isfile(organizer_path):
+        files[organizer_path] = None
+
+    for dir_name in (config.papers, config.templates):
+        abs_dir = os.path.join(working_dir, dir_name)
+        if os.path.isdir(abs_dir):
+            for filename_ in os.listdir(abs_dir):
+                files[os.path.join(abs_dir, filename_)] = None
+
+    for path in list(files):
+        try:
+            stat = os.stat(path)
+        except OSError:  # deleted meanwhile
+            del files[path]
+        else:
+            files[path] = (stat.st_mtime, stat.st_size)
+
+    return files
+
+
+def describe_changes(config, changed_paths, page_counts):
+    """Return a description of the changes in *changed_paths*, and update
+    *page_counts* (key: path of a paper pdf; value: number of pages)."""
+    working_dir = os.path.abspath(config.directory)
+    papers_abs_dir = os.path.join(working_dir, config.papers)
+    descriptions = list()
+
+    for path in sorted(changed_paths):
+        name = os.path.relpath(path, working_dir)
+
+        if os.path.dirname(path) != papers_abs_dir:
+            descriptions.append(name)
+        elif not os.path.isfile(path):
+            page_counts.pop(path, None)
+            descriptions.append('{} (deleted)'.format(name))
+        else:
+            old_count = page_counts.get(path)
+            page_counts[path] = count_pdf_pages(path)
+
+            if old_count is None or page_counts[path] is None:
+                descriptions.append('{} (new or unreadable)'.format(name))
+            elif old_count == page_counts[path]:
+                descriptions.append('{} (same number of pages, only this '
+                                    'paper is updated)'.format(name))
+            else:
+                descriptions.append('{} ({} -> {} pages, the start pages of '
+                                    'later papers and the table of contents '
+                                    'are updated)'.format(name, old_count,
+                                                          page_counts[path]))
+
+    return '; '.join(descriptions)
+
+
+def watch(config, log_dir=None):
+    """Build the proceedings for *config* (a Config), and build them again
+    whenever the paper pdfs, the organizer CSV file or the templates change,
+    until interrupted (Ctrl+C).
+
+    The builds share the pdf readers and the worker processes. After a
+    change, a build waits until nothing has changed for config.debounce
+    seconds. What has changed and how long each build took are printed, and
+    logged to the master log in *log_dir* (by default, the current
+    directory).
+    """
+    config.validate()
+    working_dir = os.path.abspath(config.directory)
+    log_dir = os.path.abspath(log_dir or os.getcwd())
+
+    logger = logging.Logger(MASTER_LOGGER.name)
+    logger.setLevel(logging.INFO)
+    file_handler = master_log_handler(log_dir)
+    logger.addHandler(file_handler)
+
+    def watch_message(message):
+        print(message)
+        logger.info(message)
+
+    pdf_readers = PdfReaderRegistry(config.maxopenfiles)
+    pool = process_pool(config.jobs) if config.jobs > 1 else None
+
+    def rebuild(build_number):
+        """Build the proceedings, and report how long it took."""
+        start_time = time.time()
+
+        try:
+            Build(config, log_dir, pdf_readers, pool).run()
+        except Exception as e:
+            watch_message('Build {} failed after {:.2f} seconds -- {}: {}'
+                          .format(build_number, time.time() - start_time,
+                                  type(e).__name__, e))
+        else:
+            watch_message('Build {} done in {:.2f} seconds'
+                          .format(build_number, time.time() - start_time))
+
+    previous_files = watched_files(config)
+    paper_page_counts = dict(
+        (path, count_pdf_pages(path)) for path in previous_files
+        if os.path.dirname(path) == os.path.join(working_dir, config.papers))
+    number_of_builds = 1
+
+    watch_message('Watching {} for changes (Ctrl+C to stop)'
+                  .format(working_dir))
+    rebuild(number_of_builds)
+
+    try:
+        while True:
+            time.sleep(WATCH_POLL_INTERVAL)
+            current_files = watched_files(config)
+
+            if current_files == previous_files:
+                continue
+
+            # debouncing: wait until the files stop changing, e.g., while a
+            # big pdf is being copied, or several papers are being replaced
+            last_change_time = time.time()
+
+            while time.time() - last_change_time < config.debounce:
+                time.sleep(WATCH_POLL_INTERVAL)
+                newer_files = watched_files(config)
+
+                if newer_files != current_files:
+                    current_files = newer_files
+                    last_change_time = time.time()
+
+            changed_paths = set(
+                path for path in set(previous_files) | set(current_files)
+                if previous_files.get(path) != current_files.get(path))
+            previous_files = current_files
+            number_of_builds += 1
+
+            watch_message('Changed: {}'.format(
+                describe_changes(config, changed_paths, paper_page_counts)))
+            rebuild(number_of_builds)
+    except KeyboardInterrupt:
+        watch_message('Stopped watching {}'.format(working_dir))
+    finally:
+        pdf_readers.close()
+
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+        file_handler.close()
+
+
+# --------------------------------------------------------------------------- #
+# batch mode: several volumes (or variants of a volume, e.g., a draft and the
+# final version, or the parts of a split volume) are built in one process.
+# The volumes share the worker processes, the pdf readers of the papers they
+# have in common, and the build cache (including the precompiled LaTeX
+# formats), whose artifacts are keyed by the hashes of their inputs and so
+# are safe to share.
+
+
+def read_batch_file(path, defaults):
+    """Return the list of Config objects of the volumes in the JSON batch
+    file *path*.
+
+    The file has a list with one item per volume: either the working
+    directory of the volume, or an object with the settings of the volume
+    (e.g., {"directory": "cls52", "startpagenumber": 301}). Settings not given
+    are those of *defaults* (a Config).
+
+    A relative cache directory is in the working directory, as for a single
+    volume: the working directory of the volume for a "cache" setting of a
+    volume, and the working directory of the first volume for the cache
+    directory of *defaults*, which all the other volumes share.
+    """
+    with open(path) as f:
+        try:
+            volumes = json.load(f)
+        except ValueError as e:
+            raise RuntimeError('The batch file {} is not valid JSON -- {}'
+                               .format(path, e))
+
+    if not isinstance(volumes, list) or not volumes:
+        raise RuntimeError('The batch file {} should have a list of volumes.'
+                           .format(path))
+
+    base_settings = defaults.settings()
+    base_settings.update(batch=None)
+    configs = list()
+
+    for i, volume in enumerate(volumes):
+        settings = dict(base_settings)
+
+        if isinstance(volume, dict):
+            settings.update(volume)
+        else:
+            settings['directory'] = volume
+
+        try:
+            configs.append(Config(**settings))
+        except TypeError as e:
+            raise RuntimeError('Volume {} in the batch file {}: {}'
+                               .format(i + 1, path, e))
+
+        if isinstance(volume, dict) and 'cache' in volume:
+            configs[-1].cache = os.path.join(
+                os.path.abspath(configs[-1].directory), configs[-1].cache)
+
+    shared_cache = os.path.join(os.path.abspath(configs[0].directory),
+                                defaults.cache)
+
+    for config, volume in zip(configs, volumes):
+        if not (isinstance(volume, dict) and 'cache' in volume):
+            config.cache = shared_cache
+
+    return configs
+
+
+def build_volumes(configs, log_dirs=None):
+    """Build the proceedings of the volumes of *configs* (list of Config),
+    and return the list of the lists of paths of their final proceedings pdf
+    outputs (None for a volume which failed).
+
+    Volumes in different working directories are built at the same time, by
+    as many threads as the largest --jobs of the volumes, which share the
+    worker processes. Volumes in the same working directory (variants of a
+    volume) share files there, so they are built one after another, with
+    the same pdf readers.
+
+    Each volume writes its log files to its own log directory in *log_dirs*
+    (list of str; by default, logs/<number>-<name of the working directory>
+    in the current directory). Volumes are checked before any is built; a
+    volume which fails later is reported, and the other volumes are built
+    all the same.
+    """
+    for config in configs:
+        config.validate()
+
+        if config.watch:
+            raise RuntimeError('--watch cannot be used in batch mode.')
+
+    if log_dirs is None:
+        log_dirs = [os.path.join(os.getcwd(), 'logs', '{}-{}'.format(
+            i + 1, os.path.basename(os.path.abspath(config.directory))))
+            for i, config in enumerate(configs)]
+
+    logger = logging.Logger(MASTER_LOGGER.name)
+    logger.setLevel(logging.INFO)
+    file_handler = master_log_handler(os.getcwd())
+    logger.addHandler(file_handler)
+
+    def batch_message(message):
+        print(message)
+        logger.info(message)
+
+    jobs = max(config.jobs for config in configs)
+    pool = process_pool(jobs) if jobs > 1 else None
+    working_dirs = [os.path.abspath(config.directory) for config in configs]
+    # key: working directory; value: list of indices of its volumes
+    volume_groups = OrderedDict()
+
+    for i, working_dir in enumerate(working_dirs):
+        volume_groups.setdefault(working_dir, list()).append(i)
+
+    threads = min(jobs, len(volume_groups))
+    # the limit of open files is shared by the volumes built at the same time
+    max_open_files = max(max(config.maxopenfiles for config in configs) //
+                         threads, 1)
+    output_paths_list = [None] * len(configs)
+
+    def build_volume_group(indices):
+        # A pdf reader is not thread-safe, so each group has its own.
+        with PdfReaderRegistry(max_open_files) as pdf_readers:
+            for i in indices:
+                start_time = time.time()
+
+                try:
+                    output_paths_list[i] = Build(configs[i], log_dirs[i],
+                                                 pdf_readers, pool).run()
+                except Exception as e:
+                    batch_message('Volume {} ({}) failed after {:.2f} '
+                                  'seconds -- {}: {}'
+                                  .format(i + 1, working_dirs[i],
+                                          time.time() - start_time,
+                                          type(e).__name__, e))
+                else:
+                    batch_message('Volume {} ({}) done in {:.2f} seconds, '
+                                  'logs in {}'.format(i + 1, working_dirs[i],
+                                                      time.time() -
+                                                      start_time,
+                                                      log_dirs[i]))
+
+    try:
+        run_in_parallel(build_volume_group, list(volume_groups.values()),
+                        threads)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+        file_handler.close()
+
+    return output_paths_list
+
+
+# --------------------------------------------------------------------------- #
+# command line interface
+
+
+def argument_parser():
+    """Return the parser of the command line arguments of cls-compile.py,
+    whose defaults are those of Config."""
+    parser = argparse.ArgumentParser(
+        description=__longdescr__,
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--directory', type=str, default=Config.directory,
+                        help='working directory, where all necessary files '
+                             'and subdirectories are')
+    parser.add_argument('--frontmatter', type=str,
+                        default=Config.frontmatter,
+                        help='directory name for front matter')
+    parser.add_argument('--acknowledgments', type=str,
+                        default=Config.acknowledgments,
+                        help='directory name for acknowledgments')
+    parser.add_argument('--papers', type=str, default=Config.papers,
+                        help='directory name for papers without headers')
+    parser.add_argument('--templates', type=str, default=Config.templates,
+                        help='directory name for templates (for headers etc)')
+    parser.add_argument('--toc', type=str, default=Config.toc,
+                        help='directory name for table of contents')
+    parser.add_argument('--headers', type=str, default=Config.headers,
+                        help='directory name for headers of papers')
+    parser.add_argument('--papersfinal', type=str,
+                        default=Config.papersfinal,
+                        help='directory name for papers with headers')
+    parser.add_argument('--organizer', type=str, default=Config.organizer,
+                        help='filename of the organizer CSV file')
+    parser.add_argument('--maxheaderlength', type=int,
+                        default=Config.maxheaderlength,
+                        help='maximum number of characters in a header')
+    parser.add_argument('--output', type=str, default=Config.output,
+                        help='filename of the final proceedings pdf output '
+                             '(size 8.5" x 11")')
+    parser.add_argument('--output6by9', type=str, default=Config.output6by9,
+                        help='filename of the final proceedings pdf output '
+                             '(size 6" x 9")')
+    parser.add_argument('--scale', type=float, default=Config.scale,
+                        help='Scale factor for the 6" x 9" output based on '
+                             'the 8.5" x 11". Try a slightly smaller value if '
+                             'material is still cut off at the margins.')
+    parser.add_argument('--skipletter', action='store_true',
+                        help='do not create the 8.5" x 11" proceedings pdf '
+                             'output')
+    parser.add_argument('--skip6by9', action='store_true',
+                        help='do not create the 6" x 9" proceedings pdf '
+                             'output')
+    parser.add_argument('--startpagenumber', type=int,
+                        default=Config.startpagenumber,
+                        help='the starting page number of the first paper by '
+                             'order in the volume')
+    parser.add_argument('--jobs', type=int, default=Config.jobs,
+                        help='number of jobs to run in parallel for counting '
+                             'pages, generating the paper headers (pdflatex) '
+                             'and adding them to the papers')
+    parser.add_argument('--timeout', type=int, default=Config.timeout,
+                        help='number of seconds after which a pdflatex job is '
+                             'stopped (0 for no time limit)')
+    parser.add_argument('--batchheaders', action='store_true',
+                        help='compile the headers of all papers in one single '
+                             'pdflatex run (instead of one run per paper)')
+    parser.add_argument('--headerengine', type=str,
+                        default=Config.headerengine,
+                        choices=('latex', 'native'),
+                        help='how the paper headers are rendered: "latex" '
+                             'runs pdflatex on the headers template, "native" '
+                             'draws the headers directly without pdflatex '
+                             '(papers whose headers need LaTeX, or a headers '
+                             'template not laid out like the default one, '
+                             'still go through pdflatex)')
+    parser.add_argument('--headerfont', type=str, default=Config.headerfont,
+                        help='Type 1 font file (.pfb) of Times to embed in '
+                             'the headers drawn by --headerengine=native '
+                             '(default: {}, the font which pdflatex uses, '
+                             'found with kpsewhich)'
+                             .format(HEADER_FONT_FILENAME))
+    parser.add_argument('--maxopenfiles', type=int,
+                        default=Config.maxopenfiles,
+                        help='maximum number of pdf files kept open at the '
+                             'same time')
+    parser.add_argument('--reusepages', action='store_true',
+                        help='keep the papers with headers in memory for the '
+                             'final proceedings pdf output(s), instead of '
+                             'reading them again from the files (faster, but '
+                             'uses more memory; not with --jobs above 1)')
+    parser.add_argument('--streaming', action='store_true',
+                        help='write the final proceedings pdf output(s) '
+                             'incrementally, one input pdf at a time, so that '
+                             'memory use does not grow with the size of the '
+                             'volume')
+    parser.add_argument('--dedup', action='store_true',
+                        help='write identical fonts, images and other '
+                             'resources only once in the final proceedings '
+                             'pdf output(s)')
+    parser.add_argument('--wrapcontent', action='store_true',
+                        help='add the headers to the papers, and scale the '
+                             'pages for the 6" x 9" output, by putting '
+                             'wrappers around the content of the pages '
+                             'instead of rewriting it (faster, and uses less '
+                             'memory, for papers with large figures)')
+    parser.add_argument('--compress', action='store_true',
+                        help='write the final proceedings pdf output(s) as '
+                             'PDF 1.5 with compressed object streams and '
+                             'cross-reference streams, and compress any '
+                             'uncompressed page content (smaller files)')
+    parser.add_argument('--linearize', action='store_true',
+                        help='linearize the final proceedings pdf output(s) '
+                             'for fast web view, with qpdf (which must be '
+                             'installed)')
+    parser.add_argument('--stats', type=str, default=Config.stats,
+                        help='filename of a JSON (or CSV, if the filename '
+                             'ends with ".csv") file for the time and '
+                             'resources taken by each stage of the build, and '
+                             'by each paper')
+    parser.add_argument('--slowest', type=int, default=Config.slowest,
+                        help='number of the slowest papers to list in the '
+                             'master log at the end')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='let the stages of the build overlap: make the '
+                             'table of contents right after counting the '
+                             'pages, add the headers to each paper as soon '
+                             'as its headers are ready, and assemble the '
+                             'final proceedings pdf output(s) as the papers '
+                             'are ready; the critical path of the build is '
+                             'listed in the master log')
+    parser.add_argument('--noformat', action='store_true',
+                        help='load the preamble of the headers and table of '
+                             'contents templates for each pdflatex run, '
+                             'instead of precompiling it into a LaTeX format '
+                             'file')
+    parser.add_argument('--watch', action='store_true',
+                        help='keep running, and rebuild the proceedings '
+                             'whenever the paper pdfs, the organizer CSV file '
+                             'or the templates change (only what the changes '
+                             'affect is built again, thanks to the build '
+                             'cache)')
+    parser.add_argument('--debounce', type=float, default=Config.debounce,
+                        help='with --watch, number of seconds without further '
+                             'changes before a rebuild starts')
+    parser.add_argument('--cache', type=str, default=Config.cache,
+                        help='directory name for the build cache, where '
+                             'headers and papers with headers are kept for '
+                             'reuse by later runs (default: "{}"), relative '
+                             'to the working directory; with --batch, all the '
+                             'volumes share it, in the working directory of '
+                             'the first volume'.format(Config.cache))
+    parser.add_argument('--nocache', action='store_true',
+                        help='build everything from scratch without using the '
+                             'build cache')
+    parser.add_argument('--nopreflight', action='store_true',
+                        help='do not check all the input pdf files (for '
+                             'encryption, damage, page sizes, rotated pages '
+                             'and fonts not embedded) before the build')
+    parser.add_argument('--quickpreflight', action='store_true',
+                        help='when checking the input pdf files before the '
+                             'build, only read their cross-reference data '
+                             '(for encryption and empty files), without '
+                             'parsing them in full')
+    parser.add_argument('--batch', type=str, default=Config.batch,
+                        help='filename of a JSON file with a list of volumes '
+                             '(working directories, or objects of settings '
+                             'named like these options) to build, at the '
+                             'same time for different working directories, '
+                             'sharing the worker processes and the build '
+                             'cache; the other options are the defaults for '
+                             'all volumes')
+    parser.add_argument('--plan', type=str, default=Config.plan,
+                        help='only work out the pagination of the proceedings '
+                             'and check the headers, and write this plan to '
+                             'this JSON file (relative to the working '
+                             'directory; "-" for the standard output), '
+                             'without running pdflatex or writing any pdf '
+                             'files')
+    parser.add_argument('--index', type=str, default=Config.index,
+                        help='filename of the JSON index of the final '
+                             'proceedings pdf output(s), which lists the page '
+                             'range and the file with headers of each paper')
+    parser.add_argument('--extract', type=str, default=Config.extract,
+                        help='instead of building the proceedings, write '
+                             'pdf files of these papers of the last build, '
+                             'from its index (comma-separated numbers of '
+                             'papers in the organizer CSV file, or '
+                             'filenames, or "all" for one pdf file per '
+                             'paper)')
+    parser.add_argument('--extractpages', type=str,
+                        default=Config.extractpages,
+                        help='instead of building the proceedings, write a '
+                             'pdf file of this page range of the last build '
+                             '(e.g., "12-30", counting all the pages of the '
+                             'final proceedings pdf output from 1), from its '
+                             'index')
+    parser.add_argument('--withfrontmatter', action='store_true',
+                        help='with --extract or --extractpages, put the '
+                             'front matter, acknowledgments and table of '
+                             'contents before the extracted pages')
+    parser.add_argument('--extractdir', type=str, default=Config.extractdir,
+                        help='folder for the pdf files written by --extract '
+                             'and --extractpages')
+    return parser
+
+
+def main(argv=None):
+    """Run cls-compile.py with the command line arguments *argv* (by default,
+    those of this process)."""
+    config = Config(**vars(argument_parser().parse_args(argv)))
+
+    if config.plan:
+        plan = make_plan(config)
+
+        if config.plan == '-':
+            json.dump(plan, sys.stdout, indent=2)
+            print()
+        else:
+            with open(os.path.join(os.path.abspath(config.directory),
+                                   config.plan), 'w') as f:
+                json.dump(plan, f, indent=2)
+
+        if plan['problems']:
+            raise RuntimeError('{} problem(s) found:\n{}'.format(
+                len(plan['problems']), '\n'.join(plan['problems'])))
+    elif config.extract or config.extractpages:
+        for output_path in extract_pdfs(config):
+            print(output_path)
+    elif config.batch:
+        output_paths_list = build_volumes(read_batch_file(config.batch,
+                                                          config))
+        failed = output_paths_list.count(None)
+
+        if failed:
+            raise RuntimeError('{} of {} volumes failed.'
+                               .format(failed, len(output_paths_list)))
+    elif config.watch:
+        watch(config)
+    else:
+        Build(config).run()
@@ -0,0 +1,61 @@
+import os
+import shutil
+import sys
+
+import pytest
+from PyPDF2 import PdfFileWriter
+
+# the tests import clsproceedings from the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import clsproceedings  # noqa: E402
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'example')
+
+
+@pytest.fixture
+def example_dir(tmp_path):
+    """A copy of the example volume, for builds which write into it."""
+    path = str(tmp_path / 'example')
+    shutil.copytree(EXAMPLE_DIR, path)
+    return path
+
+
+@pytest.fixture
+def fake_pdflatex(monkeypatch):
+    """Replace pdflatex by a function which writes a pdf with as many pages
+    as the LaTeX document asks for (one, and one more for each \\newpage or
+    \\clearpage; one for a table of contents). Page j of a pdf is 400 + j pt
+    wide, so that slices of it can be told apart. Return the list of the
+    LaTeX sources compiled."""
+    sources = list()
+
+    def run_pdflatex(tex_path, output_abs_dir, timeout=None,
+                     latex_format=None):
+        with open(tex_path) as f:
+            source = f.read()
+
+        sources.append(source)
+
+        if 'TocEntry' in source:
+            number_of_pages = 1
+        else:
+            number_of_pages = (1 + source.count('\\newpage') +
+                               source.count('\\clearpage'))
+
+        pdf = PdfFileWriter()
+
+        for j in range(number_of_pages):
+            pdf.addBlankPage(400 + j, 792)
+
+        basename = os.path.splitext(os.path.basename(tex_path))[0]
+
+        with open(os.path.join(output_abs_dir, basename + '.pdf'), 'wb') as f:
+            pdf.write(f)
+
+        return 'fake pdflatex', None
+
+    monkeypatch.setattr(clsproceedings, 'run_pdflatex', run_pdflatex)
+    monkeypatch.setattr(clsproceedings, 'pdflatex_version', lambda: None)
+    return sources
@@ -0,0 +1,39 @@
+import json
+import os
+
+import clsproceedings
+
+
+def write_batch_file(tmp_path, volumes):
+    path = str(tmp_path / 'batch.json')
+
+    with open(path, 'w') as f:
+        json.dump(volumes, f)
+
+    return path
+
+
+def test_volumes_share_the_cache_of_the_first_volume(tmp_path):
+    path = write_batch_file(tmp_path, [
+        str(tmp_path / 'cls52'),
+        {'directory': str(tmp_path / 'cls53'), 'startpagenumber': 301},
+        {'directory': str(tmp_path / 'cls54'), 'cache': 'own'}])
+    configs = clsproceedings.read_batch_file(
+        path, clsproceedings.Config(jobs=2))
+
+    assert [config.jobs for config in configs] == [2, 2, 2]
+    assert configs[1].startpagenumber == 301
+    assert configs[0].cache == configs[1].cache == \
+        os.path.join(str(tmp_path / 'cls52'), 'cache')
+    assert configs[2].cache == os.path.join(str(tmp_path / 'cls54'), 'own')
+
+
+def test_cache_option_is_relative_to_the_first_volume(tmp_path):
+    path = write_batch_file(tmp_path, [str(tmp_path / 'cls52'),
+                                       str(tmp_path / 'cls53')])
+
+    for cache, expected in (('shared', str(tmp_path / 'cls52' / 'shared')),
+                            (str(tmp_path / 'abs'), str(tmp_path / 'abs'))):
+        configs = clsproceedings.read_batch_file(
+            path, clsproceedings.Config(cache=cache))
+        assert [config.cache for config in configs] == [expected] * 2
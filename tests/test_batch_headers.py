@@ -0,0 +1,108 @@
+import os
+
+import pytest
+from PyPDF2 import PdfFileReader
+
+import clsproceedings
+
+TEMPLATE = r"""\documentclass{article}
+\usepackage[letterpaper,
+  left=1.5in]{geometry}
+\newcommand{\volume}{CLS 48}
+\setcounter{page}{XXStartPageXX}
+\fancyhead[CE]{XXAuthorsXX}
+\begin{document}
+XXInsertPagesXX
+\end{document}
+"""
+
+
+def document(start_page, authors, number_of_pages):
+    return (TEMPLATE.replace('XXStartPageXX', str(start_page))
+            .replace('XXAuthorsXX', authors)
+            .replace('XXInsertPagesXX', '\\mbox{}\n\\newpage\n' *
+                     (number_of_pages - 1) + '\\mbox{}\n'))
+
+
+def page_widths(path):
+    with open(path, 'rb') as f:
+        pdf = PdfFileReader(f)
+        return [int(pdf.getPage(j).mediaBox.getWidth())
+                for j in range(pdf.getNumPages())]
+
+
+def test_preamble_is_used_once():
+    combined = clsproceedings.combine_latex_documents([
+        document(1, 'SMITH', 2), document(3, 'JONES', 1),
+        document(4, 'SMITH', 3)])
+    preamble, _, body = combined.partition('\\begin{document}')
+
+    assert preamble == TEMPLATE.partition('\\begin{document}')[0] \
+        .replace('XXStartPageXX', '1').replace('XXAuthorsXX', 'SMITH')
+    # only the lines filled in per document are repeated
+    assert '\\newcommand' not in body
+    assert 'left=1.5in' not in body
+    assert body.count('\\setcounter{page}') == 2
+    assert body.index('\\setcounter{page}{3}') < \
+        body.index('\\fancyhead[CE]{JONES}') < \
+        body.index('\\setcounter{page}{4}') < \
+        body.index('\\fancyhead[CE]{SMITH}')
+    assert body.count('\\clearpage') == 2
+    assert combined.count('\\end{document}') == 1
+
+
+def test_documents_which_cannot_be_lined_up():
+    with pytest.raises(RuntimeError, match='different lengths'):
+        clsproceedings.combine_latex_documents([
+            document(1, 'SMITH', 1),
+            document(2, 'JONES', 1).replace('\\begin', '% more\n\\begin')])
+
+    with pytest.raises(RuntimeError, match='Cannot find'):
+        clsproceedings.combine_latex_documents(['\\documentclass{article}'])
+
+
+def build(example_dir, tmp_path):
+    config = clsproceedings.Config(directory=example_dir, batchheaders=True,
+                                   nocache=True, skip6by9=True)
+    clsproceedings.Build(config, str(tmp_path / 'logs')).run()
+    return os.path.join(example_dir, config.headers)
+
+
+def test_combined_headers_are_sliced_per_paper(example_dir, tmp_path,
+                                               fake_pdflatex):
+    headers_dir = build(example_dir, tmp_path)
+
+    # one pdflatex run for the headers, one for the table of contents
+    assert len(fake_pdflatex) == 2
+    all_widths = page_widths(os.path.join(headers_dir, 'headers-all.pdf'))
+    offset = 0
+
+    for i in range(3):
+        widths = page_widths(os.path.join(headers_dir,
+                                          'headers{}.pdf'.format(i)))
+        assert widths == all_widths[offset:offset + len(widths)]
+        offset += len(widths)
+
+    assert offset == len(all_widths)
+
+
+def test_headers_are_compiled_separately_if_combining_fails(
+        example_dir, tmp_path, fake_pdflatex, monkeypatch):
+    run_pdflatex = clsproceedings.run_pdflatex
+
+    def failing_run_pdflatex(tex_path, *args, **kwargs):
+        if os.path.basename(tex_path) == 'headers-all.tex':
+            return '! LaTeX Error: Command \\volume already defined.', \
+                'pdflatex failed'
+        return run_pdflatex(tex_path, *args, **kwargs)
+
+    monkeypatch.setattr(clsproceedings, 'run_pdflatex', failing_run_pdflatex)
+    headers_dir = build(example_dir, tmp_path)
+
+    for i in range(3):
+        # each headers pdf starts at its own first page
+        assert page_widths(os.path.join(headers_dir,
+                                        'headers{}.pdf'.format(i)))[0] == 400
+
+    with open(str(tmp_path / 'logs' / 'master.log')) as f:
+        assert 'the headers are compiled separately' in f.read()
@@ -0,0 +1,56 @@
+import os
+
+import clsproceedings
+
+
+def build(example_dir, tmp_path, **settings):
+    """Build the example volume, and return a dict of the numbers of
+    artifacts of each kind which were (reused, built)."""
+    config = clsproceedings.Config(directory=example_dir, skip6by9=True,
+                                   nopreflight=True, **settings)
+    build_ = clsproceedings.Build(config, str(tmp_path / 'logs'))
+    build_.run()
+    cache = build_.build_cache
+    return dict((kind, (cache.hits.get(kind, 0), cache.misses.get(kind, 0)))
+                for kind in ('headers', 'papers', 'toc'))
+
+
+def test_unchanged_volume_is_reused(example_dir, tmp_path, fake_pdflatex):
+    assert build(example_dir, tmp_path) == \
+        {'headers': (0, 3), 'papers': (0, 3), 'toc': (0, 1)}
+    assert build(example_dir, tmp_path) == \
+        {'headers': (3, 0), 'papers': (3, 0), 'toc': (1, 0)}
+
+
+def test_headers_template_is_in_the_key(example_dir, tmp_path,
+                                        fake_pdflatex):
+    build(example_dir, tmp_path)
+
+    with open(os.path.join(example_dir, 'templates', 'headers.tex'),
+              'a') as f:
+        f.write('% changed\n')
+
+    assert build(example_dir, tmp_path) == \
+        {'headers': (0, 3), 'papers': (0, 3), 'toc': (1, 0)}
+
+
+def test_start_page_is_in_the_key(example_dir, tmp_path, fake_pdflatex):
+    build(example_dir, tmp_path)
+    assert build(example_dir, tmp_path, startpagenumber=101) == \
+        {'headers': (0, 3), 'papers': (0, 3), 'toc': (0, 1)}
+
+    # back to the first start page, which is still in the cache
+    assert build(example_dir, tmp_path) == \
+        {'headers': (3, 0), 'papers': (3, 0), 'toc': (1, 0)}
+
+
+def test_paper_pdf_is_in_the_key(example_dir, tmp_path, fake_pdflatex):
+    build(example_dir, tmp_path)
+
+    # the same pages, in a file which is not the same
+    with open(os.path.join(example_dir, 'papers-without-headers',
+                           'smith.pdf'), 'ab') as f:
+        f.write(b'\n% changed\n')
+
+    assert build(example_dir, tmp_path) == \
+        {'headers': (3, 0), 'papers': (2, 1), 'toc': (1, 0)}
@@ -0,0 +1,223 @@
+import io
+import zlib
+
+import pytest
+from PyPDF2 import PdfFileReader, PdfFileWriter
+
+import clsproceedings
+
+
+def pypdf2_count(data):
+    return PdfFileReader(io.BytesIO(data), strict=False).getNumPages()
+
+
+def fast_count(tmp_path, data):
+    path = str(tmp_path / 'test.pdf')
+
+    with open(path, 'wb') as f:
+        f.write(data)
+
+    return clsproceedings.count_pdf_pages(path)
+
+
+def page_tree_objects(number_of_pages):
+    """Return the bodies of the objects (1: catalog, 2: page tree, 3...:
+    pages) of a pdf with *number_of_pages* blank pages."""
+    kids = ' '.join('{} 0 R'.format(3 + j) for j in range(number_of_pages))
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>',
+               '<< /Type /Pages /Kids [{}] /Count {} >>'
+               .format(kids, number_of_pages)]
+    objects += ['<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] >>'
+                ] * number_of_pages
+    return [body.encode('ascii') for body in objects]
+
+
+def write_objects(out, objects, first_number=1):
+    """Write *objects* (list of bytes) to *out* (BytesIO), and return the
+    list of their offsets."""
+    offsets = list()
+
+    for k, body in enumerate(objects):
+        offsets.append(out.tell())
+        out.write('{} 0 obj\n'.format(first_number + k).encode('ascii'))
+        out.write(body + b'\nendobj\n')
+
+    return offsets
+
+
+def xref_table_pdf(objects):
+    out = io.BytesIO()
+    out.write(b'%PDF-1.4\n')
+    offsets = write_objects(out, objects)
+    xref_offset = out.tell()
+    out.write('xref\n0 {}\n0000000000 65535 f \n'
+              .format(len(objects) + 1).encode('ascii'))
+    for offset in offsets:
+        out.write('{:010d} 00000 n \n'.format(offset).encode('ascii'))
+    out.write('trailer\n<< /Size {} /Root 1 0 R >>\nstartxref\n{}\n%%EOF\n'
+              .format(len(objects) + 1, xref_offset).encode('ascii'))
+    return out.getvalue()
+
+
+def xref_stream_pdf(objects, predictor=False):
+    """Return a pdf of *objects* with a cross-reference stream, with the PNG
+    "Up" predictor if *predictor*."""
+    out = io.BytesIO()
+    out.write(b'%PDF-1.5\n')
+    offsets = write_objects(out, objects)
+    xref_number = len(objects) + 1
+    offsets.append(out.tell())
+    rows = [bytearray([0, 0, 0, 0xff])]
+    rows += [bytearray([1, offset >> 8, offset & 0xff, 0])
+             for offset in offsets]
+    data = bytearray()
+    previous_row = bytearray(4)
+
+    for row in rows:
+        if predictor:
+            data.append(2)
+            data += bytearray((b - p) & 0xff
+                              for b, p in zip(row, previous_row))
+        else:
+            data += row
+        previous_row = row
+
+    data = zlib.compress(bytes(data))
+    parameters = (' /DecodeParms << /Predictor 12 /Columns 4 >>'
+                  if predictor else '')
+    out.write('{} 0 obj\n<< /Type /XRef /Size {} /W [1 2 1] /Root 1 0 R '
+              '/Filter /FlateDecode{} /Length {} >>\nstream\n'
+              .format(xref_number, xref_number + 1, parameters, len(data))
+              .encode('ascii'))
+    out.write(data + b'\nendstream\nendobj\n')
+    out.write('startxref\n{}\n%%EOF\n'.format(offsets[-1]).encode('ascii'))
+    return out.getvalue()
+
+
+def incremental_update(data, number_of_pages):
+    """Return *data* (a pdf from xref_table_pdf() of page_tree_objects())
+    with an incremental update which gives it *number_of_pages* pages."""
+    previous_xref = int(data.rsplit(b'startxref', 1)[1].split()[0])
+    old_size = int(data.split(b'/Size ')[-1].split()[0])
+    objects = page_tree_objects(number_of_pages)
+    out = io.BytesIO(data)
+    out.seek(0, 2)
+    offsets = dict()
+
+    # the page tree again, and the pages which are new
+    for number in [2] + list(range(old_size, number_of_pages + 3)):
+        offsets[number] = out.tell()
+        out.write('{} 0 obj\n'.format(number).encode('ascii'))
+        out.write(objects[number - 1] + b'\nendobj\n')
+
+    xref_offset = out.tell()
+    out.write(b'xref\n')
+    for number in sorted(offsets):
+        out.write('{} 1\n{:010d} 00000 n \n'.format(number, offsets[number])
+                  .encode('ascii'))
+    out.write('trailer\n<< /Size {} /Root 1 0 R /Prev {} >>\nstartxref\n{}\n'
+              '%%EOF\n'.format(number_of_pages + 3, previous_xref,
+                               xref_offset).encode('ascii'))
+    return out.getvalue()
+
+
+@pytest.mark.parametrize('number_of_pages', [1, 2, 7])
+def test_xref_table(tmp_path, number_of_pages):
+    data = xref_table_pdf(page_tree_objects(number_of_pages))
+    assert fast_count(tmp_path, data) == pypdf2_count(data) == \
+        number_of_pages
+
+
+def test_pypdf2_writer_output(tmp_path):
+    pdf = PdfFileWriter()
+    for _ in range(5):
+        pdf.addBlankPage(612, 792)
+    out = io.BytesIO()
+    pdf.write(out)
+    data = out.getvalue()
+    assert fast_count(tmp_path, data) == pypdf2_count(data) == 5
+
+
+@pytest.mark.parametrize('predictor', [False, True])
+def test_xref_stream(tmp_path, predictor):
+    data = xref_stream_pdf(page_tree_objects(3), predictor)
+    assert fast_count(tmp_path, data) == pypdf2_count(data) == 3
+
+
+def test_object_streams(tmp_path):
+    reader = PdfFileReader(io.BytesIO(xref_table_pdf(page_tree_objects(4))))
+    out = io.BytesIO()
+    writer = clsproceedings.IncrementalPdfWriter(out, compress=True)
+    writer.add_pages([reader.getPage(j) for j in range(4)])
+    writer.close()
+    data = out.getvalue()
+    assert b'/ObjStm' in data
+    assert fast_count(tmp_path, data) == pypdf2_count(data) == 4
+
+
+@pytest.mark.parametrize('old_pages, new_pages', [(2, 5), (3, 4)])
+def test_incremental_update(tmp_path, old_pages, new_pages):
+    data = incremental_update(xref_table_pdf(page_tree_objects(old_pages)),
+                              new_pages)
+    assert fast_count(tmp_path, data) == pypdf2_count(data) == new_pages
+
+
+def test_nested_page_tree(tmp_path):
+    # 1: catalog, 2: root node, 3 and 4: intermediate nodes (4 without a
+    # /Type), 5...9: pages
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>',
+               b'<< /Type /Pages /Kids [3 0 R 4 0 R 9 0 R] /Count 5 >>',
+               b'<< /Type /Pages /Parent 2 0 R /Kids [5 0 R 6 0 R] '
+               b'/Count 2 >>',
+               b'<< /Parent 2 0 R /Kids [7 0 R 8 0 R] /Count 2 >>']
+    objects += [b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] >>'
+                ] * 5
+    data = xref_table_pdf(objects)
+    assert fast_count(tmp_path, data) == pypdf2_count(data) == 5
+
+
+@pytest.mark.parametrize('count', [2, 4])
+def test_wrong_count(tmp_path, count):
+    # /Count is not trusted if the page tree has another number of pages
+    objects = page_tree_objects(3)
+    objects[1] = objects[1].replace(b'/Count 3',
+                                    '/Count {}'.format(count).encode('ascii'))
+    data = xref_table_pdf(objects)
+    assert fast_count(tmp_path, data) is None
+    assert pypdf2_count(data) == 3
+
+
+def test_page_tree_with_a_cycle(tmp_path):
+    objects = page_tree_objects(2)
+    objects[1] = objects[1].replace(b'[3 0 R 4 0 R]', b'[3 0 R 4 0 R 2 0 R]')
+    assert fast_count(tmp_path, xref_table_pdf(objects)) is None
+
+
+@pytest.mark.parametrize('corrupt', [
+    lambda data: data[:data.rfind(b'startxref')],  # no startxref
+    lambda data: data.replace(b'xref\n0 ', b'xreg\n0 '),  # no xref table
+    lambda data: data.replace(b' 00000 n ', b' 0000x n '),  # bad entries
+    lambda data: data.replace(b'trailer', b'tailer'),  # no trailer
+    lambda data: data[:data.rfind(b'startxref') + 10] + b'99999\n%%EOF\n',
+    lambda data: data.replace(b'/Pages 2 0 R', b'/Pages 9 0 R'),
+])
+def test_corrupt_xref(tmp_path, corrupt):
+    # PyPDF2 cannot read these files either, so there is no page count which
+    # the fast count could agree with.
+    data = corrupt(xref_table_pdf(page_tree_objects(2)))
+    assert fast_count(tmp_path, data) is None
+
+    with pytest.raises(Exception):
+        pypdf2_count(data)
+
+
+def test_unsupported_filter(tmp_path):
+    # a cross-reference stream which the fast count does not decode
+    data = xref_stream_pdf(page_tree_objects(2)).replace(
+        b'/Filter /FlateDecode', b'/Filter /LZWDecode')
+    assert fast_count(tmp_path, data) is None
+
+
+def test_missing_file(tmp_path):
+    assert clsproceedings.count_pdf_pages(str(tmp_path / 'missing.pdf')) \
+        is None
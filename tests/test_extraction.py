@@ -0,0 +1,76 @@
+import os
+
+import pytest
+from PyPDF2 import PdfFileReader
+
+import clsproceedings
+
+# the index of a volume with 4 pages of front matter and 3 papers
+INDEX = {
+    'total pages': 24,
+    'papers': [
+        {'index': 1, 'filename': 'smith.pdf', 'first pdf page': 5,
+         'last pdf page': 10},
+        {'index': 2, 'filename': 'johnson.pdf', 'first pdf page': 11,
+         'last pdf page': 15},
+        {'index': 3, 'filename': 'jones-brown.pdf', 'first pdf page': 17,
+         'last pdf page': 24}]}
+
+
+def extraction_list(**settings):
+    return clsproceedings.extraction_list(clsproceedings.Config(**settings),
+                                          INDEX)
+
+
+def test_papers_by_number_or_filename():
+    assert extraction_list(extract='2, jones-brown.pdf') == [
+        ('johnson.pdf', list(range(11, 16))),
+        ('jones-brown.pdf', list(range(17, 25)))]
+
+
+def test_all_papers_once():
+    assert [filename for filename, _ in
+            extraction_list(extract='3,all,smith.pdf')] == \
+        ['jones-brown.pdf', 'smith.pdf', 'johnson.pdf']
+
+
+def test_page_range():
+    assert extraction_list(extractpages='12-14') == \
+        [('pages-12-14.pdf', [12, 13, 14])]
+    assert extraction_list(extractpages='7') == [('pages-7-7.pdf', [7])]
+
+
+def test_with_front_matter():
+    assert extraction_list(extract='1', extractpages='3-6',
+                           withfrontmatter=True) == [
+        ('smith.pdf', [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]),
+        ('pages-3-6.pdf', [1, 2, 3, 4, 5, 6])]
+
+
+@pytest.mark.parametrize('settings, message', [
+    ({'extract': '4'}, 'No paper 4'),
+    ({'extract': 'brown.pdf'}, 'No paper brown.pdf'),
+    ({'extractpages': '12-'}, 'Invalid page range'),
+    ({'extractpages': '14-12'}, 'not within the 24 pages'),
+    ({'extractpages': '20-25'}, 'not within the 24 pages'),
+])
+def test_invalid_selections(settings, message):
+    with pytest.raises(RuntimeError, match=message):
+        extraction_list(**settings)
+
+
+def test_extract_from_the_build(example_dir, tmp_path, fake_pdflatex):
+    config = clsproceedings.Config(directory=example_dir, skip6by9=True)
+    clsproceedings.Build(config, str(tmp_path / 'logs')).run()
+
+    config = clsproceedings.Config(directory=example_dir, extract='2',
+                                   extractpages='4-8', withfrontmatter=True)
+    paths = clsproceedings.extract_pdfs(config)
+    assert [os.path.basename(path) for path in paths] == \
+        ['johnson.pdf', 'pages-4-8.pdf']
+
+    # 6 pages of front matter (with the acknowledgments and the table of
+    # contents, and their blank pages)
+    for path, number_of_pages in zip(paths, [6 + 6, 8]):
+        with open(path, 'rb') as f:
+            assert PdfFileReader(f).getNumPages() == number_of_pages
@@ -0,0 +1,147 @@
+import io
+
+import pytest
+from PyPDF2 import PdfFileReader, PdfFileWriter
+from PyPDF2.generic import (DecodedStreamObject, DictionaryObject,
+                            NameObject, RectangleObject)
+
+import clsproceedings
+
+FONT_PROGRAM = b'a font program, identical in every paper ' * 100
+
+
+def add_page(pdf, width, height, text, font):
+    page = pdf.addBlankPage(width, height)
+    content = DecodedStreamObject()
+    content.setData('BT /F1 12 Tf 72 72 Td ({}) Tj ET'.format(text)
+                    .encode('ascii'))
+    page[NameObject('/Contents')] = pdf._addObject(content)
+    page[NameObject('/Resources')] = DictionaryObject({
+        NameObject('/Font'): DictionaryObject({NameObject('/F1'): font})})
+
+
+def paper_pdf(name, sizes):
+    """Return a PdfFileReader of a paper with one page of each of *sizes*
+    (list of (width, height)), all using one embedded font."""
+    pdf = PdfFileWriter()
+    font_file = DecodedStreamObject()
+    font_file.setData(FONT_PROGRAM)
+    descriptor = DictionaryObject({
+        NameObject('/Type'): NameObject('/FontDescriptor'),
+        NameObject('/FontName'): NameObject('/TestSerif'),
+        NameObject('/FontFile'): pdf._addObject(font_file)})
+    font = pdf._addObject(DictionaryObject({
+        NameObject('/Type'): NameObject('/Font'),
+        NameObject('/Subtype'): NameObject('/Type1'),
+        NameObject('/BaseFont'): NameObject('/TestSerif'),
+        NameObject('/FontDescriptor'): pdf._addObject(descriptor)}))
+
+    for j, (width, height) in enumerate(sizes):
+        add_page(pdf, width, height, '{} page {}'.format(name, j + 1), font)
+
+    out = io.BytesIO()
+    pdf.write(out)
+    return PdfFileReader(io.BytesIO(out.getvalue()))
+
+
+def pages_of(reader):
+    return [reader.getPage(j) for j in range(reader.getNumPages())]
+
+
+def write(papers, **options):
+    """Write the pages of *papers* (list of PdfFileReader) with an
+    IncrementalPdfWriter with *options*, and return (writer, pdf data)."""
+    out = io.BytesIO()
+    writer = clsproceedings.IncrementalPdfWriter(out, **options)
+
+    for paper in papers:
+        writer.add_pages(pages_of(paper))
+
+    writer.close()
+    return writer, out.getvalue()
+
+
+def font_file_numbers(reader):
+    numbers = set()
+
+    for page in pages_of(reader):
+        font = page['/Resources']['/Font']['/F1']
+        numbers.add(font['/FontDescriptor'].raw_get('/FontFile').idnum)
+
+    return numbers
+
+
+OPTIONS = [{}, {'deduplicate': True}, {'compress': True},
+           {'deduplicate': True, 'compress': True}]
+SIZES = [[(612, 792), (612, 792)], [(595, 842)], [(432, 648)] * 3]
+
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_round_trip(options):
+    papers = [paper_pdf('paper{}'.format(k), sizes)
+              for k, sizes in enumerate(SIZES)]
+    _, data = write(papers, **options)
+    reader = PdfFileReader(io.BytesIO(data))
+    expected_pages = [page for paper in papers for page in pages_of(paper)]
+
+    assert reader.getNumPages() == len(expected_pages)
+
+    for page, expected_page in zip(pages_of(reader), expected_pages):
+        assert page.mediaBox == RectangleObject(expected_page.mediaBox)
+        assert page.getContents().getData() == \
+            expected_page.getContents().getData()
+        font = page['/Resources']['/Font']['/F1']
+        assert font['/FontDescriptor']['/FontFile'].getData() == FONT_PROGRAM
+
+    assert data.startswith(b'%PDF-1.5' if options.get('compress')
+                           else b'%PDF-1.3')
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_dedup_merges_identical_objects(compress):
+    papers = [paper_pdf('paper{}'.format(k), sizes)
+              for k, sizes in enumerate(SIZES)]
+
+    writer, data = write(papers, compress=compress)
+    assert writer.duplicate_objects == 0
+    assert len(font_file_numbers(PdfFileReader(io.BytesIO(data)))) == 3
+
+    writer, deduplicated_data = write(papers, deduplicate=True,
+                                      compress=compress)
+    # the font, its descriptor and its font file of two papers
+    assert writer.duplicate_objects == 6
+    assert len(font_file_numbers(
+        PdfFileReader(io.BytesIO(deduplicated_data)))) == 1
+    assert len(deduplicated_data) < len(data)
+
+    if not compress:
+        assert writer.duplicate_bytes > 2 * len(FONT_PROGRAM)
+        assert len(deduplicated_data) < len(data) - 2 * len(FONT_PROGRAM)
+
+
+def test_compress_writes_object_and_xref_streams():
+    papers = [paper_pdf('paper', [(612, 792)] * 150)]
+    _, plain_data = write(papers)
+    writer, data = write(papers, compress=True)
+
+    assert b'/ObjStm' in data and b'/XRef' in data
+    assert b'\nxref\n' not in data and b'trailer' not in data
+    # more objects than fit in one object stream
+    assert data.count(b'/ObjStm') > 1
+    assert len(data) < len(plain_data)
+    assert PdfFileReader(io.BytesIO(data)).getNumPages() == 150
+
+
+def test_merged_pages_with_direct_content_streams():
+    paper = paper_pdf('paper', [(612, 792)])
+    headers = paper_pdf('headers', [(612, 792)])
+    page = paper.getPage(0)
+    page.mergePage(headers.getPage(0))
+    out = io.BytesIO()
+    writer = clsproceedings.IncrementalPdfWriter(out, compress=True)
+    writer.add_pages([page])
+    writer.close()
+
+    data = PdfFileReader(io.BytesIO(out.getvalue())).getPage(0) \
+        .getContents().getData()
+    assert b'(paper' in data and b'(headers' in data
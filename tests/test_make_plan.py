@@ -0,0 +1,74 @@
+import json
+import os
+
+import clsproceedings
+
+
+def plan(example_dir, **settings):
+    return clsproceedings.make_plan(clsproceedings.Config(
+        directory=example_dir, **settings))
+
+
+def test_plan_without_a_table_of_contents(example_dir):
+    plan_ = plan(example_dir)
+
+    assert plan_['problems'] == []
+    assert plan_['table of contents pages'] is None
+    assert plan_['table of contents pages from'] is None
+    assert plan_['total pages'] == {'proceedings.pdf': None,
+                                    'proceedings6by9.pdf': None}
+    assert plan_['total pages without the table of contents'] == 22
+
+    assert [(part['category'], part['pages'], part['blank page after'])
+            for part in plan_['parts']] == [
+        ('front matter', 2, False), ('acknowledgments', 1, True),
+        ('table of contents', None, None), ('papers', 6, False),
+        ('papers', 6, False), ('papers', 6, False)]
+    assert [part['first pdf page'] for part in plan_['parts']] == \
+        [1, 3, 5, None, None, None]
+
+    papers = plan_['papers']
+    assert [(paper['start page'], paper['end page']) for paper in papers] == \
+        [(1, 6), (7, 12), (13, 18)]
+    assert [paper['first pdf page without the table of contents']
+            for paper in papers] == [5, 11, 17]
+
+
+def test_plan_matches_the_build(example_dir, tmp_path, fake_pdflatex):
+    config = clsproceedings.Config(directory=example_dir)
+    clsproceedings.Build(config, str(tmp_path / 'logs')).run()
+
+    with open(os.path.join(example_dir, config.index)) as f:
+        index = json.load(f)
+
+    for settings, toc_pages_from in (({}, 'build cache'),
+                                     ({'nocache': True}, 'previous build')):
+        plan_ = plan(example_dir, **settings)
+
+        assert plan_['table of contents pages'] == 1
+        assert plan_['table of contents pages from'] == toc_pages_from
+        assert plan_['total pages'] == {'proceedings.pdf': 24,
+                                        'proceedings6by9.pdf': 24}
+        assert [part['first pdf page'] for part in plan_['parts']] == \
+            [part['first pdf page'] for part in index['parts']]
+        assert [part['blank page after'] for part in plan_['parts']] == \
+            [part['blank page after'] for part in index['parts']]
+        assert [paper['first pdf page'] for paper in plan_['papers']] == \
+            [paper['first pdf page'] for paper in index['papers']] == \
+            [7, 13, 19]
+
+
+def test_plan_with_an_unreadable_paper(example_dir):
+    with open(os.path.join(example_dir, 'papers-without-headers',
+                           'johnson.pdf'), 'wb') as f:
+        f.write(b'not a pdf')
+
+    plan_ = plan(example_dir)
+
+    assert len(plan_['problems']) == 1
+    assert 'johnson.pdf' in plan_['problems'][0]
+    assert [(paper['start page'],
+             paper['first pdf page without the table of contents'])
+            for paper in plan_['papers']] == [(1, 5), (None, 11),
+                                              (None, None)]
+    assert plan_['total pages without the table of contents'] is None
@@ -0,0 +1,80 @@
+import os
+import struct
+
+import pytest
+from PyPDF2 import PdfFileReader
+
+import clsproceedings
+
+
+def write_pfb(path, font_name='TestSerif-Regular'):
+    """Write a minimal Type 1 font file in the PFB format to *path*."""
+    cleartext = ('%!PS-AdobeFont-1.0: {0} 001.000\n'
+                 '/FontName /{0} def\n'
+                 '/FontBBox {{-168 -281 1000 924}} readonly def\n'
+                 'currentfile eexec\n'.format(font_name)).encode('ascii')
+    binary = bytes(bytearray(range(256)))
+    trailer = b'0' * 64 + b'\ncleartomark\n'
+
+    with open(path, 'wb') as f:
+        for segment_type, segment in ((1, cleartext), (2, binary),
+                                      (1, trailer)):
+            f.write(struct.pack('<BBI', 0x80, segment_type, len(segment)))
+            f.write(segment)
+        f.write(b'\x80\x03')
+
+    return cleartext, binary, trailer
+
+
+def test_header_font_reads_pfb(tmp_path):
+    path = str(tmp_path / 'font.pfb')
+    cleartext, binary, trailer = write_pfb(path)
+    font = clsproceedings.HeaderFont(path)
+
+    assert font.name == 'TestSerif-Regular'
+    assert font.bbox == [-168, -281, 1000, 924]
+    assert font.segments == [cleartext, binary, trailer]
+
+
+def test_header_font_rejects_other_files(tmp_path):
+    path = str(tmp_path / 'font.pfb')
+
+    with open(path, 'wb') as f:
+        f.write(b'%!PS-AdobeFont-1.0: not a pfb file\n')
+
+    with pytest.raises(RuntimeError):
+        clsproceedings.HeaderFont(path)
+
+
+def test_find_header_font_missing_file(tmp_path):
+    with pytest.raises(RuntimeError):
+        clsproceedings.find_header_font(str(tmp_path / 'missing.pfb'))
+
+
+def test_rendered_headers_embed_one_shared_font(tmp_path):
+    font_path = str(tmp_path / 'font.pfb')
+    cleartext, binary, trailer = write_pfb(font_path)
+    headers_path = str(tmp_path / 'headers.pdf')
+
+    assert clsproceedings.render_headers(
+        headers_path, ['Proceedings of CLS 52', 'pp. 1-4'], 'JOE SMITH',
+        'WHAT IS (NOT) PHONOLOGY?', 1, 4,
+        clsproceedings.HeaderFont(font_path))
+
+    pdf = PdfFileReader(open(headers_path, 'rb'))
+    fonts = [pdf.getPage(j)['/Resources'].raw_get('/Font')
+             .raw_get('/CLSHeaderFont') for j in range(pdf.getNumPages())]
+
+    assert pdf.getNumPages() == 4
+    assert len(set(font.idnum for font in fonts)) == 1
+
+    font_file = fonts[0].getObject()['/FontDescriptor']['/FontFile']
+    assert font_file.getData() == cleartext + binary + trailer
+    assert font_file['/Length1'] == len(cleartext)
+    assert font_file['/Length2'] == len(binary)
+    assert font_file['/Length3'] == len(trailer)
+
+    result = clsproceedings.preflight_pdf((headers_path, False))
+    assert not any(warning.startswith('Fonts not embedded')
+                   for warning in result['warnings'])
+    assert os.path.getsize(headers_path) > len(binary)
@@ -0,0 +1,82 @@
+import io
+
+import pytest
+from PyPDF2 import PdfFileReader
+from PyPDF2.generic import ArrayObject, DictionaryObject, NameObject
+
+import clsproceedings
+from test_incremental_pdf_writer import paper_pdf
+
+
+def test_overlay_keeps_the_content_of_the_page():
+    page = paper_pdf('paper', [(612, 792)]).getPage(0)
+    headers = paper_pdf('headers', [(612, 792)]).getPage(0)
+    contents = page.raw_get('/Contents')
+    resources = page['/Resources']
+
+    clsproceedings.overlay_page(page, headers)
+
+    wrapped = page['/Contents']
+    assert len(wrapped) == 3
+    assert wrapped[0].getData() == b'q\n'
+    assert wrapped[1] == contents
+    assert wrapped[2].getData() == b'\nQ\n/ClsOverlay Do\n'
+
+    form = page['/Resources']['/XObject']['/ClsOverlay']
+    assert form['/Subtype'] == '/Form'
+    assert b'(headers page 1)' in form.getData()
+    assert list(form['/BBox']) == [0, 0, 612, 792]
+    assert '/F1' in form['/Resources']['/Font']
+    # the resources of the paper are copied, not changed
+    assert '/XObject' not in resources
+    assert '/F1' in page['/Resources']['/Font']
+
+
+def test_overlay_name_and_annotations():
+    page = paper_pdf('paper', [(612, 792)]).getPage(0)
+    headers = paper_pdf('headers', [(612, 792)]).getPage(0)
+    page[NameObject('/Resources')][NameObject('/XObject')] = \
+        DictionaryObject({NameObject('/ClsOverlay'): DictionaryObject()})
+    page[NameObject('/Annots')] = ArrayObject([DictionaryObject()])
+    headers[NameObject('/Annots')] = ArrayObject([DictionaryObject()])
+
+    clsproceedings.overlay_page(page, headers)
+
+    assert '/ClsOverlayX' in page['/Resources']['/XObject']
+    assert page['/Contents'][2].getData().endswith(b'/ClsOverlayX Do\n')
+    assert len(page['/Annots']) == 2
+
+
+@pytest.mark.parametrize('wrap_content', [False, True])
+def test_stamp_paper(tmp_path, wrap_content):
+    sizes = [(612, 792), (612, 792), (595, 842)]
+    output_path = str(tmp_path / 'stamped.pdf')
+    clsproceedings.stamp_paper(paper_pdf('paper', sizes),
+                               paper_pdf('headers', sizes), output_path,
+                               wrap_content)
+
+    with open(output_path, 'rb') as f:
+        data = f.read()
+
+    stamped = PdfFileReader(io.BytesIO(data))
+    assert stamped.getNumPages() == 3
+
+    for j, size in enumerate(sizes):
+        page = stamped.getPage(j)
+        assert [float(x) for x in page.mediaBox] == [0, 0] + list(size)
+
+        if wrap_content:
+            # the headers are a form XObject, and the paper's own content
+            # stream is there as it was
+            form = page['/Resources']['/XObject']['/ClsOverlay']
+            assert '(headers page {})'.format(j + 1).encode('ascii') in \
+                form.getData()
+            assert page['/Contents'][1].getObject().getData() == \
+                'BT /F1 12 Tf 72 72 Td (paper page {}) Tj ET'.format(j + 1) \
+                .encode('ascii')
+        else:
+            # one content stream with both
+            content = page.getContents().getData()
+            assert b'(paper' in content
+            assert b'(headers' in content
+            assert '/XObject' not in page['/Resources']
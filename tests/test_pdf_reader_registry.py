@@ -0,0 +1,59 @@
+from PyPDF2 import PdfFileWriter
+
+import clsproceedings
+
+
+def write_pdf(path, sizes):
+    """Write a pdf file with blank pages of *sizes* (list of (width,
+    height)) to *path*."""
+    pdf = PdfFileWriter()
+
+    for width, height in sizes:
+        pdf.addBlankPage(width, height)
+
+    with open(path, 'wb') as f:
+        pdf.write(f)
+
+
+def test_evicted_readers_reopen_their_files(tmp_path):
+    paths = list()
+
+    for k in range(4):
+        paths.append(str(tmp_path / '{}.pdf'.format(k)))
+        write_pdf(paths[-1], [(100 + k, 200)] * (k + 1))
+
+    with clsproceedings.PdfReaderRegistry(max_open_files=2) as registry:
+        readers = [registry.get(path) for path in paths]
+        assert len(registry._open_files) <= 2
+
+        # The first readers have had their files closed, and read them again.
+        for k, reader in enumerate(readers):
+            assert reader.getNumPages() == k + 1
+            assert float(reader.getPage(k).mediaBox.getWidth()) == 100 + k
+            assert len(registry._open_files) <= 2
+
+        # The files are never read into memory.
+        assert all(isinstance(reader.stream, clsproceedings.ReopenableFile)
+                   for reader in readers)
+
+    assert not registry._open_files
+
+
+def test_changed_file_gets_a_new_reader(tmp_path):
+    path = str(tmp_path / 'paper.pdf')
+    write_pdf(path, [(612, 792)])
+
+    with clsproceedings.PdfReaderRegistry() as registry:
+        assert len(registry.pages(path)) == 1
+        write_pdf(path, [(612, 792)] * 3)
+        assert len(registry.pages(path)) == 3
+
+
+def test_pages_of_released_reader_remain_usable(tmp_path):
+    path = str(tmp_path / 'paper.pdf')
+    write_pdf(path, [(612, 792), (300, 400)])
+
+    with clsproceedings.PdfReaderRegistry(max_open_files=1) as registry:
+        pages = registry.pages(path)
+        registry.release(path)
+        assert float(pages[1].mediaBox.getHeight()) == 400
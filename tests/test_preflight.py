@@ -0,0 +1,103 @@
+import io
+
+import pytest
+from PyPDF2 import PdfFileWriter
+
+import clsproceedings
+from test_count_pdf_pages import page_tree_objects, xref_table_pdf
+
+
+def write(tmp_path, data):
+    path = str(tmp_path / 'test.pdf')
+
+    with open(path, 'wb') as f:
+        f.write(data)
+
+    return path
+
+
+def wrong_count_pdf():
+    """Return a pdf with 3 pages, whose page tree says it has 2."""
+    objects = page_tree_objects(3)
+    objects[1] = objects[1].replace(b'/Count 3', b'/Count 2')
+    return xref_table_pdf(objects)
+
+
+def test_quick_preflight_does_not_parse_in_full(tmp_path, monkeypatch):
+    path = write(tmp_path, xref_table_pdf(page_tree_objects(3)))
+
+    def full_parse(*args, **kwargs):
+        raise AssertionError('parsed in full')
+
+    monkeypatch.setattr(clsproceedings, 'PdfFileReader', full_parse)
+    assert clsproceedings.preflight_pdf((path, True)) == \
+        {'pages': 3, 'errors': [], 'warnings': []}
+
+
+def test_preflight_checks_the_pages(tmp_path):
+    objects = page_tree_objects(3)
+    objects[2] = objects[2].replace(b'612 792', b'595 842')
+    objects[3] = objects[3].replace(b'>>', b'/Rotate 90 >>')
+    result = clsproceedings.preflight_pdf((write(tmp_path,
+                                                 xref_table_pdf(objects)),
+                                           False))
+
+    assert result['pages'] == 3
+    assert result['errors'] == []
+    assert result['warnings'][0].startswith('1 of 3 pages are not')
+    assert result['warnings'][1] == 'Rotated pages: 2'
+
+
+def test_wrong_page_count_is_parsed_in_full(tmp_path):
+    path = write(tmp_path, wrong_count_pdf())
+    assert clsproceedings.count_pdf_pages(path) is None
+
+    result = clsproceedings.preflight_pdf((path, True))
+    assert result['pages'] == 3
+    assert result['errors'] == []
+
+
+def test_page_count_which_does_not_match_is_an_error(tmp_path, monkeypatch):
+    path = write(tmp_path, xref_table_pdf(page_tree_objects(3)))
+    monkeypatch.setattr(clsproceedings, 'read_pdf_page_count',
+                        lambda path_: (2, False))
+
+    result = clsproceedings.preflight_pdf((path, False))
+    assert result['pages'] == 3
+    assert len(result['errors']) == 1
+    assert 'gives 2 pages, but 3 pages' in result['errors'][0]
+
+
+def test_files_not_counted_quickly_are_parsed_in_full(tmp_path,
+                                                      monkeypatch):
+    path = write(tmp_path, xref_table_pdf(page_tree_objects(2)))
+    monkeypatch.setattr(clsproceedings, 'read_pdf_page_count',
+                        lambda path_: (None, None))
+
+    for quick in (False, True):
+        result = clsproceedings.preflight_pdf((path, quick))
+        assert result['pages'] == 2
+        assert result['errors'] == []
+        assert result['warnings'][0].startswith(
+            'The cross-reference data cannot be read')
+
+
+@pytest.mark.parametrize('quick', [False, True])
+def test_encrypted_file(tmp_path, quick):
+    pdf = PdfFileWriter()
+    pdf.addBlankPage(612, 792)
+    pdf.encrypt('secret')
+    out = io.BytesIO()
+    pdf.write(out)
+
+    result = clsproceedings.preflight_pdf((write(tmp_path, out.getvalue()),
+                                           quick))
+    assert result['errors'] == ['The file is encrypted.']
+
+
+@pytest.mark.parametrize('quick', [False, True])
+def test_unreadable_file(tmp_path, quick):
+    result = clsproceedings.preflight_pdf((write(tmp_path, b'not a pdf'),
+                                           quick))
+    assert result['pages'] is None
+    assert result['errors'][0].startswith('The file cannot be read')
@@ -0,0 +1,75 @@
+import io
+import os
+
+import pytest
+from PyPDF2 import PdfFileReader, PdfFileWriter
+
+import clsproceedings
+
+# the 6" x 9" box of an 8.5" x 11" page scaled by 0.95 (cf.
+# Build.set_6by9_page_box())
+BOX_6BY9 = [74.7, 75.96, 506.7, 723.96]
+
+
+def letter_page():
+    pdf = PdfFileWriter()
+    page = pdf.addBlankPage(612, 792)
+    page.mergePage(page)  # for a content stream
+    out = io.BytesIO()
+    pdf.write(out)
+    return PdfFileReader(out).getPage(0)
+
+
+def scaler(wrap_content):
+    build = clsproceedings.Build(clsproceedings.Config(
+        wrapcontent=wrap_content))
+    build.new_lower_left = None
+    return build
+
+
+def box(page):
+    return [float(x) for x in page.mediaBox]
+
+
+@pytest.mark.parametrize('wrap_content', [False, True])
+def test_page_box(wrap_content):
+    page = letter_page()
+    page_6by9 = scaler(wrap_content).scale_to_6by9(page)
+
+    assert box(page_6by9) == pytest.approx(BOX_6BY9)
+    assert BOX_6BY9[2] - BOX_6BY9[0] == pytest.approx(6 * 72)
+    assert BOX_6BY9[3] - BOX_6BY9[1] == pytest.approx(9 * 72)
+    # the page for the 8.5" x 11" output is intact
+    assert box(page) == [0, 0, 612, 792]
+    assert page_6by9 is not page
+
+
+def test_content_is_wrapped_in_a_scaling():
+    page = letter_page()
+    contents = page.raw_get('/Contents')
+    page_6by9 = scaler(True).scale_to_6by9(page)
+    wrapped = page_6by9['/Contents']
+
+    assert len(wrapped) == 3
+    assert wrapped[0].getData() == b'q 0.950000 0 0 0.950000 0 0 cm\n'
+    assert wrapped[1] == contents
+    assert wrapped[2].getData() == b'\nQ\n'
+    assert page.raw_get('/Contents') == contents
+
+
+def test_outputs_of_one_pass(example_dir, tmp_path, fake_pdflatex):
+    config = clsproceedings.Config(directory=example_dir, nocache=True)
+    output_paths = clsproceedings.Build(config, str(tmp_path / 'logs')).run()
+    assert [os.path.basename(path) for path in output_paths] == \
+        [config.output, config.output6by9]
+
+    with open(output_paths[0], 'rb') as letter_file, \
+            open(output_paths[1], 'rb') as file_6by9:
+        letter = PdfFileReader(letter_file)
+        pdf_6by9 = PdfFileReader(file_6by9)
+        assert letter.getNumPages() == pdf_6by9.getNumPages() == 24
+
+        # the front matter, the acknowledgments and the first paper
+        for j in (0, 2, 6):
+            assert box(letter.getPage(j)) == [0, 0, 612, 792]
+            assert box(pdf_6by9.getPage(j)) == pytest.approx(BOX_6BY9)
@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+import clsproceedings
+from conftest import EXAMPLE_DIR
+
+
+def template(name):
+    with open(os.path.join(EXAMPLE_DIR, 'templates', name)) as f:
+        return f.read()
+
+
+def test_headers_template():
+    latex_str = template('headers.tex')
+    preamble = clsproceedings.split_latex_preamble(latex_str)
+
+    assert latex_str.startswith(preamble)
+    assert preamble.endswith('\\usepackage{fancyhdr}\n')
+    # the settings after the last \usepackage line are not in the format
+    assert '\\pagestyle' not in preamble
+
+
+def test_table_of_contents_template():
+    preamble = clsproceedings.split_latex_preamble(
+        template('table-of-contents.tex'))
+    assert preamble.startswith('\\documentclass[12pt]{article}\n')
+    assert preamble.endswith('{geometry}\n')
+    assert '\\TocEntry' not in preamble
+
+
+def test_preamble_ends_before_the_first_placeholder():
+    preamble = clsproceedings.split_latex_preamble(
+        '\\documentclass{article}\n\\usepackage{a}\n'
+        '\\setcounter{page}{XXStartPageXX}\n\\usepackage{b}\n'
+        '\\begin{document}\n\\end{document}\n')
+    assert preamble == '\\documentclass{article}\n\\usepackage{a}\n'
+
+
+@pytest.mark.parametrize('latex_str', [
+    # no \usepackage
+    '\\documentclass{article}\n\\begin{document}\n\\end{document}\n',
+    # \usepackage only after \begin{document} or a placeholder
+    '\\documentclass{article}\n\\begin{document}\n\\usepackage{a}\n',
+    '\\documentclass{article}\nXXTitleXX\n\\usepackage{a}\n',
+    # no \documentclass
+    '\\usepackage{a}\n\\begin{document}\n\\end{document}\n',
+    # options of the last \usepackage spanning more lines
+    '\\documentclass{article}\n\\usepackage[a,\n  b]{c}\n\\begin{document}\n',
+])
+def test_no_static_preamble(latex_str):
+    assert clsproceedings.split_latex_preamble(latex_str) is None
@@ -0,0 +1,101 @@
+import time
+
+import pytest
+
+import clsproceedings
+
+
+def recorder(log, name, delay=0.0, error=None):
+    """Return a task which appends *name* to *log* (after *delay* seconds),
+    or raises *error*."""
+    def task():
+        time.sleep(delay)
+
+        if error is not None:
+            raise error
+
+        log.append(name)
+
+    return task
+
+
+@pytest.mark.parametrize('threads', [1, 4])
+def test_tasks_run_after_their_dependencies(threads):
+    log = list()
+    graph = clsproceedings.TaskGraph()
+    graph.add('a', recorder(log, 'a', 0.05))
+    graph.add('b', recorder(log, 'b'))
+    graph.add('c', recorder(log, 'c'), ['a', 'b'])
+    graph.add('d', recorder(log, 'd', 0.01), ['c'])
+    graph.add('e', recorder(log, 'e'), ['a'])
+    graph.run(threads)
+
+    assert sorted(log) == ['a', 'b', 'c', 'd', 'e']
+
+    for name, (_, dependencies) in graph.tasks.items():
+        for dependency in dependencies:
+            assert log.index(dependency) < log.index(name)
+            assert graph.times[dependency][1] <= graph.times[name][0]
+
+    if threads > 1:
+        # 'd' finishes last, after 'c', which started when 'a' was done.
+        assert graph.critical_path() == ['a', 'c', 'd']
+    else:
+        assert graph.critical_path() == ['a', 'e']
+
+
+def test_ready_tasks_start_in_the_order_they_were_added():
+    log = list()
+    graph = clsproceedings.TaskGraph()
+
+    for name in 'edcba':
+        graph.add(name, recorder(log, name))
+
+    graph.run(1)
+    assert log == list('edcba')
+
+
+@pytest.mark.parametrize('threads', [1, 3])
+def test_a_failed_task_stops_its_dependents(threads):
+    log = list()
+    graph = clsproceedings.TaskGraph()
+    graph.add('bad', recorder(log, 'bad', error=RuntimeError('boom')))
+    graph.add('after bad', recorder(log, 'after bad'), ['bad'])
+    graph.add('after that', recorder(log, 'after that'), ['after bad'])
+
+    with pytest.raises(RuntimeError, match='boom'):
+        graph.run(threads)
+
+    assert 'after bad' not in log
+    assert 'after that' not in log
+    assert 'bad' not in graph.times
+
+
+def test_tasks_may_only_depend_on_tasks_already_added():
+    graph = clsproceedings.TaskGraph()
+    graph.add('a', lambda: None)
+
+    with pytest.raises(ValueError, match='Unknown task'):
+        graph.add('b', lambda: None, ['c'])
+
+    with pytest.raises(ValueError, match='Unknown task'):
+        graph.add('self', lambda: None, ['self'])
+
+    with pytest.raises(ValueError, match='Duplicate task'):
+        graph.add('a', lambda: None)
+
+
+@pytest.mark.parametrize('threads', [1, 2])
+def test_run_detects_cycles(threads):
+    log = list()
+    graph = clsproceedings.TaskGraph()
+    graph.add('a', recorder(log, 'a'))
+    graph.add('b', recorder(log, 'b'), ['a'])
+    graph.add('c', recorder(log, 'c'), ['b'])
+    # add() cannot make a cycle, so make one by hand: a -> c -> b -> a.
+    graph.tasks['a'] = (graph.tasks['a'][0], ('c',))
+
+    with pytest.raises(ValueError, match='Cycle in the tasks: a, b, c'):
+        graph.run(threads)
+
+    assert log == list()